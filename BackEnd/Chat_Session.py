@@ -0,0 +1,132 @@
+import hashlib
+import os
+import threading
+
+# Rough Gemini costs used for budgeting without a count_tokens round trip
+CHARS_PER_TOKEN = 4
+IMAGE_TOKENS = 258
+
+
+def estimateTokens(text):
+    """Cheap token estimate for budgeting (about 4 characters per token)"""
+    return len(text or "") // CHARS_PER_TOKEN + 1
+
+
+class ChatSession:
+    """
+    Turn history of one conversation.
+
+    Builds multi-turn request contents that fit a token budget: the newest
+    turns are sent in full, older ones are folded into a short summary, and
+    images from earlier turns are replaced by a text reference instead of
+    being uploaded again.
+    """
+
+    def __init__(self, tokenBudget=8000, summaryBudget=400, summarizer=None):
+        """
+        Initialize the session.
+
+        Args:
+            tokenBudget: Maximum estimated tokens sent per request
+            summaryBudget: Tokens of `tokenBudget` reserved for the summary of trimmed turns
+            summarizer: Optional callable(list of (role, text)) -> summary text;
+                defaults to a truncating extractive summary
+        """
+        self.tokenBudget = tokenBudget
+        self.summaryBudget = summaryBudget
+        self.summarizer = summarizer
+        self.turns = []  # {"role": "user"/"model", "text": str, "image": name or None}
+        self._lock = threading.Lock()
+
+    def addExchange(self, imagePath, textPrompt, responseText):
+        """Record a finished user turn and the model's answer"""
+        with self._lock:
+            self.turns.append(
+                {
+                    "role": "user",
+                    "text": textPrompt,
+                    "image": os.path.basename(imagePath) if imagePath else None,
+                }
+            )
+            self.turns.append({"role": "model", "text": responseText, "image": None})
+
+    def reset(self):
+        with self._lock:
+            self.turns = []
+
+    def fingerprint(self):
+        """Hash of the history, so cached answers are only reused in the same context"""
+        with self._lock:
+            if not self.turns:
+                return None
+            digest = hashlib.sha256()
+            for turn in self.turns:
+                digest.update(f"{turn['role']}\0{turn['text']}\0{turn['image']}\0".encode("utf-8"))
+            return digest.hexdigest()
+
+    @staticmethod
+    def _turnText(turn):
+        if turn["image"]:
+            return f"[Image from an earlier message: {turn['image']}]\n{turn['text']}"
+        return turn["text"]
+
+    def _summarize(self, droppedTurns):
+        if self.summarizer:
+            return self.summarizer([(turn["role"], turn["text"]) for turn in droppedTurns])
+
+        # Keep the start of each trimmed turn, newest last, within the summary budget
+        maxChars = self.summaryBudget * CHARS_PER_TOKEN
+        perTurn = max(40, maxChars // max(1, len(droppedTurns)))
+        lines = []
+        for turn in droppedTurns:
+            speaker = "User" if turn["role"] == "user" else "Assistant"
+            text = " ".join(turn["text"].split())
+            if len(text) > perTurn:
+                text = text[: perTurn - 3] + "..."
+            lines.append(f"{speaker}: {text}")
+        # Drop the oldest lines first when the summary is still too long
+        while len(lines) > 1 and sum(len(line) + 1 for line in lines) > maxChars:
+            lines.pop(0)
+        return "\n".join(lines)[:maxChars]
+
+    def buildContents(self, currentParts):
+        """
+        Return the request contents for a new user turn.
+
+        Args:
+            currentParts: Parts of the new turn (prompt text and optional image)
+        """
+        with self._lock:
+            turns = list(self.turns)
+
+        used = sum(
+            IMAGE_TOKENS if isinstance(part, dict) else estimateTokens(part)
+            for part in currentParts
+        )
+        historyBudget = self.tokenBudget - used - self.summaryBudget
+
+        # Keep whole user/model pairs, newest first, while they fit
+        kept = []
+        index = len(turns)
+        while index >= 2:
+            pair = turns[index - 2 : index]
+            cost = sum(estimateTokens(self._turnText(turn)) for turn in pair)
+            if cost > historyBudget:
+                break
+            historyBudget -= cost
+            kept[:0] = pair
+            index -= 2
+
+        contents = [
+            {"role": turn["role"], "parts": [self._turnText(turn)]} for turn in kept
+        ]
+        newTurn = {"role": "user", "parts": list(currentParts)}
+
+        dropped = turns[:index]
+        if dropped:
+            summary = "Summary of the earlier conversation:\n" + self._summarize(dropped)
+            # Attach it to the first user turn to keep user/model turns alternating
+            (contents[0] if contents else newTurn)["parts"].insert(0, summary)
+
+        contents.append(newTurn)
+        return contents
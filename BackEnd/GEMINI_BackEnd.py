@@ -1,10 +1,18 @@
 import os
 import sys
-import base64
-import io
-from PIL import Image
+import json
+import asyncio
+import threading
+from contextlib import nullcontext
 from dotenv import load_dotenv
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
+from BackEnd.Response_Cache import ResponseCache
+from BackEnd.Image_Pipeline import ImagePipeline
+from BackEnd.Chat_Session import ChatSession
+from BackEnd.Request_Scheduler import RequestScheduler, PRIORITY_INTERACTIVE
+from BackEnd.Resilience import CircuitBreaker, GeminiError, Resilience, classifyError
+from BackEnd.Request_Control import CancelToken, RequestCoalescer
 
 # Load environment variables
 ### from .env file (default)
@@ -16,75 +24,417 @@ load_dotenv('.env.local', override=True)
 # Access specific variables
 geminiApiKey = os.getenv("GEMINI_API_KEY")
 
-if not geminiApiKey:
-    print("Error: No API key found. Please set GEMINI_API_KEY in your environment variables.")
-    sys.exit(1)
+def requireApiKey():
+    """Exit with an error message when no API key is configured (entry points only)"""
+    if not geminiApiKey:
+        print("Error: No API key found. Please set GEMINI_API_KEY in your environment variables.")
+        sys.exit(1)
+
+### Optional client settings (the endpoint can point at a local stand-in server)
+geminiModelName = os.getenv("GEMINI_MODEL", "gemini-2.0-flash-lite")
+geminiTransport = os.getenv("GEMINI_TRANSPORT", "rest")
+geminiApiEndpoint = os.getenv("GEMINI_API_ENDPOINT")
+
+class GeminiSession:
+    """
+    Long-lived Gemini client.
+
+    Builds its own API client once (the process-wide `genai.configure()`
+    default is left alone, so sessions with different keys or endpoints do
+    not affect each other) and caches `GenerativeModel` instances by model
+    name and generation config, so every request reuses that client and its
+    pooled HTTP connections.
+    """
+    def __init__(self, apiKey, transport="rest", apiEndpoint=None, modelName=geminiModelName):
+        """
+        Initialize the session.
+
+        Args:
+            apiKey: Gemini API key
+            transport: Client transport ("rest" keeps a pooled HTTP session)
+            apiEndpoint: Optional API host override, e.g. "http://127.0.0.1:8080"
+            modelName: Default model used when none is requested
+        """
+        self.apiKey = apiKey
+        self.transport = transport
+        self.apiEndpoint = apiEndpoint
+        self.modelName = modelName
+        self._models = {}
+        self._client = None
+        self._asyncClient = None
+        self._lock = threading.Lock()
+
+    def _configure(self):
+        if not self.apiKey:
+            raise GeminiError("auth", "No API key found")
+        clientOptions = {"api_key": self.apiKey}
+        if self.apiEndpoint:
+            clientOptions["api_endpoint"] = self.apiEndpoint
+        self._client = glm.GenerativeServiceClient(
+            transport=self.transport, client_options=clientOptions
+        )
+        if self.transport.startswith("grpc"):
+            # Only the gRPC transport has an async client
+            self._asyncClient = glm.GenerativeServiceAsyncClient(
+                transport="grpc_asyncio", client_options=clientOptions
+            )
+
+    @staticmethod
+    def _configKey(generationConfig):
+        """Turn a generation config into a hashable cache key"""
+        if not generationConfig:
+            return None
+        return json.dumps(generationConfig, sort_keys=True, default=str)
+
+    def getModel(self, modelName=None, generationConfig=None):
+        """Return the cached model for this name and generation config"""
+        modelName = modelName or self.modelName
+        key = (modelName, self._configKey(generationConfig))
+
+        with self._lock:
+            if self._client is None:
+                self._configure()
+
+            model = self._models.get(key)
+            if model is None:
+                print(f"Creating Gemini model {modelName}...")
+                model = genai.GenerativeModel(modelName, generation_config=generationConfig)
+                # Bound to this session's clients, not the shared default ones
+                model._client = self._client
+                model._async_client = self._asyncClient
+                self._models[key] = model
+            return model
+
+    def _transport(self):
+        if self._client is None:
+            self.getModel()
+        return self._client._transport
+
+    def httpSession(self):
+        """Return the pooled HTTP session of the REST client (None for gRPC)"""
+        return getattr(self._transport(), "_session", None)
+
+    def apiHost(self):
+        """Return the base URL of the API host, scheme included"""
+        return self._transport().host
+
+    def warmUp(self):
+        """Open the client connection ahead of the first real request"""
+        try:
+            session = self.httpSession()
+            if session is not None:
+                session.head(self.apiHost(), timeout=5)
+            return True
+        except Exception as e:
+            print(f"Gemini warm-up failed: {e}")
+            return False
+
+geminiSession = GeminiSession(geminiApiKey, transport=geminiTransport, apiEndpoint=geminiApiEndpoint)
+
+### Attachment preprocessing (long edge capped to a model-appropriate size)
+imagePipeline = ImagePipeline(maxEdge=int(os.getenv("GEMINI_IMAGE_MAX_EDGE", "1536")))
+
+### Response cache (set GEMINI_CACHE=0 to bypass it)
+responseCache = ResponseCache(
+    cacheDir=os.getenv("GEMINI_CACHE_DIR", ".cache/responses"),
+    enabled=os.getenv("GEMINI_CACHE", "1") != "0",
+)
+
+def responseCacheKey(imagePath, textPrompt, modelName=None, generationConfig=None, chatSession=None):
+    """Cache key for a prompt, the bytes of its optional image, the model settings and chat history"""
+    imageDigest = imagePipeline.fileDigest(imagePath) if imagePath else None
+    context = chatSession.fingerprint() if chatSession else None
+    return ResponseCache.makeKey(
+        textPrompt, imageDigest, modelName or geminiSession.modelName, generationConfig, context
+    )
+
+### Shared scheduler for every Gemini call (global concurrency, priorities, per-model rate limits)
+requestScheduler = RequestScheduler(
+    maxConcurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "4")),
+    rateLimits={geminiModelName: float(os.getenv("GEMINI_RPM", "0"))} if os.getenv("GEMINI_RPM") else None,
+)
+
+### Timeouts, retries and circuit breaker around every Gemini call
+geminiResilience = Resilience(
+    attemptTimeout=float(os.getenv("GEMINI_TIMEOUT", "30")),
+    deadline=float(os.getenv("GEMINI_DEADLINE", "90")),
+    maxAttempts=int(os.getenv("GEMINI_MAX_ATTEMPTS", "4")),
+    breaker=CircuitBreaker(failureThreshold=5, resetTimeout=30.0),
+)
+
+### Identical requests in flight share a single call
+requestCoalescer = RequestCoalescer()
+
+def schedulerSlot(priority, cancelToken=None):
+    """Slot of `requestScheduler` for one call; a None `priority` means the caller already holds one"""
+    if priority is None:
+        return nullcontext()
+    return requestScheduler.slot(priority, geminiSession.modelName, cancelToken)
+
+def requestOptions(timeout):
+    """Client request options; retries are left to `geminiResilience`"""
+    return {"timeout": timeout, "retry": None}
+
+def newChatSession():
+    """Create a conversation session using the configured token budget"""
+    return ChatSession(tokenBudget=int(os.getenv("GEMINI_CHAT_TOKEN_BUDGET", "8000")))
 
 def getImageData(imagePath):
-    """Read an image and return it as a base64 string"""
+    """Read an image and return it, downscaled and JPEG-encoded, as raw bytes"""
     try:
-        # Open the image
-        with Image.open(imagePath) as img:
-            # Convert to RGB if necessary (e.g., for PNG with transparency)
-            if img.mode in ('RGBA', 'LA'):
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                background.paste(img, mask=img.split()[3])  # 3 is the alpha channel
-                img = background
-            elif img.mode != 'RGB':
-                img = img.convert('RGB')
-                
-            # Save to bytes
-            buffer = io.BytesIO()
-            img.save(buffer, format="JPEG")
-            imageBytes = buffer.getvalue()
-            
-        # Encode as base64
-        return base64.b64encode(imageBytes).decode('utf-8')
+        # Decoding, resizing and encoding are cached per source file.
+        # The bytes go to the client as an inline blob, with no base64 copy.
+        return imagePipeline.prepare(imagePath)
     except Exception as e:
         print(f"Error processing image: {e}")
         return None
 
-def generateGeminiResponse(imagePath, textPrompt):
-    """Generate a response using Gemini API with text prompt and optional image"""
-    try:
-        print(f"Configuring Gemini API with key: {geminiApiKey[:5]}...{geminiApiKey[-5:] if geminiApiKey else 'None'}")
-        
-        # Configure Gemini
-        genai.configure(api_key=geminiApiKey)
-        
-        # Create the model
-        print("Creating Gemini model...")
-        model = genai.GenerativeModel('gemini-2.0-flash-lite')
-        
+def buildContentParts(imagePath, textPrompt):
+    """Build the Gemini request parts for a text prompt and optional image"""
+    # Prepare content parts
+    contentParts = [textPrompt]
+
+    # Add image if provided
+    if imagePath:
+        imageData = getImageData(imagePath)
+        if imageData:
+            imagePart = {
+                "mime_type": "image/jpeg",
+                "data": imageData
+            }
+            contentParts.append(imagePart)
+            print("Image processed and added to request")
+        else:
+            print("Failed to process image, continuing with text only")
+
+    return contentParts
+
+def buildRequestContents(imagePath, textPrompt, chatSession=None):
+    """Build the request contents, including the budgeted chat history when given a session"""
+    contentParts = buildContentParts(imagePath, textPrompt)
+    if chatSession is None:
+        return contentParts
+    return chatSession.buildContents(contentParts)
+
+def requestGeminiResponse(imagePath, textPrompt, useCache=True, chatSession=None, cancelToken=None, priority=PRIORITY_INTERACTIVE):
+    """Like `generateGeminiResponse`, but raises a `GeminiError` instead of returning None.
+
+    Identical requests already in flight share one call; `cancelToken`
+    (a `CancelToken`) lets the caller stop waiting at any time, and closes
+    the HTTP response once every caller has cancelled. Each
+    attempt waits for a slot of `requestScheduler` at `priority`
+    (see `schedulerSlot`).
+    """
+    requestKey = responseCacheKey(imagePath, textPrompt, chatSession=chatSession)
+
+    # Serve repeated prompt+image requests from the cache
+    if useCache:
+        cached = responseCache.get(requestKey)
+        if cached:
+            print("Serving response from cache")
+            if chatSession:
+                chatSession.addExchange(imagePath, textPrompt, cached)
+            return cached
+
+    def generate(sharedToken):
+        # Reuse the configured client and model
+        model = geminiSession.getModel()
+
         # Prepare content parts
-        contentParts = [textPrompt]
-        
-        # Add image if provided
-        if imagePath:
-            imageData = getImageData(imagePath)
-            if imageData:
-                imagePart = {
-                    "mime_type": "image/jpeg",
-                    "data": imageData
-                }
-                contentParts.append(imagePart)
-                print("Image processed and added to request")
-            else:
-                print("Failed to process image, continuing with text only")
-        
+        contents = buildRequestContents(imagePath, textPrompt, chatSession)
+
+        def attempt(timeout):
+            with schedulerSlot(priority, sharedToken):
+                # Streamed underneath, so a cancel closes the connection
+                # instead of waiting for the whole answer
+                response = model.generate_content(
+                    contents, stream=True, request_options=requestOptions(timeout)
+                )
+                sharedToken.onCancel(lambda: stopStream(response))
+                response.resolve()
+                return response
+
         print("Sending request to Gemini API...")
-        response = model.generate_content(contentParts)
-        
-        if response:
-            result = response.text
-            print("Received response from Gemini API")
-            return result
-        else:
+        response = geminiResilience.call(attempt, cancelToken=sharedToken)
+
+        if not response:
             print("No valid response received from Gemini")
             return None
-            
+
+        try:
+            result = response.text
+        except ValueError as e:
+            # Blocked or empty candidates
+            raise GeminiError("bad_request", str(e)) from e
+        print("Received response from Gemini API")
+        if useCache:
+            responseCache.put(requestKey, result)
+        if chatSession:
+            chatSession.addExchange(imagePath, textPrompt, result)
+        return result
+
+    return requestCoalescer.run(requestKey, generate, cancelToken)
+
+def generateGeminiResponse(imagePath, textPrompt, useCache=True, chatSession=None):
+    """Generate a response using Gemini API with text prompt and optional image.
+
+    Returns None on failure; use `requestGeminiResponse` to get a `GeminiError`.
+    """
+    try:
+        return requestGeminiResponse(imagePath, textPrompt, useCache, chatSession)
     except Exception as e:
         print(f"Error in generateGeminiResponse: {e}")
         import traceback
         traceback.print_exc()
         return None
+
+async def requestGeminiResponseAsync(imagePath, textPrompt, useCache=True, chatSession=None, priority=PRIORITY_INTERACTIVE):
+    """Async variant of `requestGeminiResponse` built on the client's async generate call"""
+    if not geminiSession.transport.startswith("grpc"):
+        # The REST transport has no async client; run the blocking call off the loop
+        # once scheduled (no thread is held while waiting) and forward task
+        # cancellation to it
+        cancelToken = CancelToken()
+        try:
+            return await requestScheduler.run(
+                asyncio.to_thread,
+                requestGeminiResponse, imagePath, textPrompt, useCache, chatSession, cancelToken, None,
+                priority=priority,
+                modelName=geminiSession.modelName,
+            )
+        except asyncio.CancelledError:
+            cancelToken.cancel()
+            raise
+
+    cacheKey = responseCacheKey(imagePath, textPrompt, chatSession=chatSession) if useCache else None
+    if cacheKey:
+        cached = await asyncio.to_thread(responseCache.get, cacheKey)
+        if cached:
+            if chatSession:
+                chatSession.addExchange(imagePath, textPrompt, cached)
+            return cached
+
+    model = geminiSession.getModel()
+    # Image decoding is CPU bound, keep it off the event loop
+    contents = await asyncio.to_thread(buildRequestContents, imagePath, textPrompt, chatSession)
+
+    response = await requestScheduler.run(
+        geminiResilience.callAsync,
+        lambda timeout: model.generate_content_async(contents, request_options=requestOptions(timeout)),
+        priority=priority,
+        modelName=geminiSession.modelName,
+    )
+    if not response:
+        return None
+
+    result = response.text
+    if cacheKey:
+        await asyncio.to_thread(responseCache.put, cacheKey, result)
+    if chatSession:
+        chatSession.addExchange(imagePath, textPrompt, result)
+    return result
+
+async def generateGeminiResponseAsync(imagePath, textPrompt, priority=PRIORITY_INTERACTIVE, useCache=True, chatSession=None):
+    """Run an async Gemini request through the shared scheduler"""
+    return await requestGeminiResponseAsync(imagePath, textPrompt, useCache, chatSession, priority)
+
+def stopStream(response):
+    """Close a streaming response so the server stops generating"""
+    cancel = getattr(getattr(response, "_iterator", None), "cancel", None)
+    if cancel:
+        try:
+            cancel()
+        except Exception:
+            pass
+
+def streamGeminiResponse(imagePath, textPrompt, useCache=True, chatSession=None, cancelToken=None, priority=PRIORITY_INTERACTIVE):
+    """Generate a response using Gemini API and yield the text chunks as they arrive.
+
+    Errors are raised to the caller instead of being swallowed, since a
+    partially streamed answer cannot be reported as `None`. An identical
+    stream already in flight is shared: its full text is yielded once ready.
+    The stream holds a slot of `requestScheduler` at `priority` until it ends.
+    """
+    requestKey = responseCacheKey(imagePath, textPrompt, chatSession=chatSession)
+
+    # A cached response is delivered as a single chunk
+    if useCache:
+        cached = responseCache.get(requestKey)
+        if cached:
+            print("Serving response from cache")
+            if chatSession:
+                chatSession.addExchange(imagePath, textPrompt, cached)
+            yield cached
+            return
+
+    entry, isLeader = requestCoalescer.join(requestKey, cancelToken)
+    if not isLeader:
+        print("Joining identical request already in flight")
+        result = requestCoalescer.wait(entry, cancelToken)
+        if result:
+            yield result
+        return
+
+    chunks = []
+    try:
+        with schedulerSlot(priority, entry.token):
+            # Reuse the configured client and model
+            model = geminiSession.getModel()
+
+            # Prepare content parts
+            contents = buildRequestContents(imagePath, textPrompt, chatSession)
+
+            print("Streaming request to Gemini API...")
+            # Retries only cover opening the stream; nothing has been shown yet then
+            response = geminiResilience.call(
+                lambda timeout: model.generate_content(
+                    contents, stream=True, request_options=requestOptions(timeout)
+                ),
+                cancelToken=entry.token,
+            )
+            # Stop the HTTP stream as soon as every caller has cancelled
+            entry.token.onCancel(lambda: stopStream(response))
+
+            try:
+                for chunk in response:
+                    entry.token.raiseIfCancelled()
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        # Chunks without text parts (e.g. safety metadata only)
+                        continue
+                    if text:
+                        chunks.append(text)
+                        # A cancelled leader keeps reading quietly for coalesced callers
+                        if cancelToken is None or not cancelToken.cancelled:
+                            yield text
+            except GeneratorExit:
+                raise
+            except GeminiError:
+                raise
+            except Exception as e:
+                entry.token.raiseIfCancelled()
+                error = classifyError(e)
+                geminiResilience.breaker.recordFailure(error)
+                raise error from e
+    except GeneratorExit:
+        # The consumer stopped reading: end the stream for everyone
+        entry.token.cancel()
+        requestCoalescer.settle(requestKey, entry, error=GeminiError("cancelled", "Stream closed"))
+        raise
+    except BaseException as e:
+        requestCoalescer.settle(requestKey, entry, error=e)
+        raise
+
+    # Only complete answers are cached and added to the conversation
+    result = "".join(chunks)
+    if chunks:
+        if useCache:
+            responseCache.put(requestKey, result)
+        if chatSession:
+            chatSession.addExchange(imagePath, textPrompt, result)
+    requestCoalescer.settle(requestKey, entry, result)
+
+    if cancelToken is not None:
+        cancelToken.raiseIfCancelled()
+    print("Finished streaming response from Gemini API")
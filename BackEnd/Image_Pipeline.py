@@ -0,0 +1,123 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+from PIL import Image
+from BackEnd.Response_Cache import hashFile
+
+
+class ImagePipeline:
+    """
+    Prepares image attachments for Gemini requests.
+
+    Images are decoded at reduced size (JPEG draft mode / `reduce()`),
+    capped to `maxEdge` on the long side, flattened to RGB and encoded as
+    JPEG. Prepared payloads are cached by source file hash, so re-sending
+    the same attachment skips the decode and encode entirely.
+    """
+
+    def __init__(self, maxEdge=1536, quality=None, maxCacheBytes=32 * 1024 * 1024):
+        """
+        Initialize the pipeline.
+
+        Args:
+            maxEdge: Maximum long-edge size in pixels of the sent image
+            quality: Fixed JPEG quality, or None to pick one from the output size
+            maxCacheBytes: Size limit of the prepared payload cache
+        """
+        self.maxEdge = maxEdge
+        self.quality = quality
+        self.maxCacheBytes = maxCacheBytes
+        self._digests = {}
+        self._payloads = OrderedDict()
+        self._cacheBytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def fileDigest(self, imagePath):
+        """SHA-256 of the file, memoized by path, mtime and size"""
+        stat = os.stat(imagePath)
+        statKey = (os.path.realpath(imagePath), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            digest = self._digests.get(statKey)
+        if digest is None:
+            digest = hashFile(imagePath)
+            with self._lock:
+                self._digests[statKey] = digest
+        return digest
+
+    def pickQuality(self, size):
+        """Smaller images keep more detail per pixel, large ones compress harder"""
+        if self.quality:
+            return self.quality
+        longEdge = max(size)
+        if longEdge <= 768:
+            return 90
+        if longEdge <= 1536:
+            return 85
+        return 80
+
+    def prepare(self, imagePath):
+        """Return the JPEG bytes to send for `imagePath`"""
+        key = (self.fileDigest(imagePath), self.maxEdge, self.quality)
+        with self._lock:
+            payload = self._payloads.get(key)
+            if payload is not None:
+                self._payloads.move_to_end(key)
+                self.hits += 1
+                return payload
+            self.misses += 1
+
+        payload = self._encode(imagePath)
+
+        with self._lock:
+            if key not in self._payloads:
+                self._payloads[key] = payload
+                self._cacheBytes += len(payload)
+            while self._cacheBytes > self.maxCacheBytes and len(self._payloads) > 1:
+                _, evicted = self._payloads.popitem(last=False)
+                self._cacheBytes -= len(evicted)
+        return payload
+
+    def _encode(self, imagePath):
+        with Image.open(imagePath) as img:
+            target = (self.maxEdge, self.maxEdge)
+
+            # JPEG: let the decoder scale down by 1/2, 1/4 or 1/8 while decoding
+            img.draft("RGB", target)
+
+            # reduce() rejects palette, bilevel and 16-bit images, among others
+            if img.mode not in ("RGB", "RGBA", "L", "LA"):
+                hasAlpha = "A" in img.getbands() or "transparency" in img.info
+                img = img.convert("RGBA" if hasAlpha else "RGB")
+
+            # Cheap integer downscale first, then a high quality resize to the cap
+            factor = max(img.size) // (self.maxEdge * 2)
+            if factor >= 2:
+                img = img.reduce(factor)
+            if max(img.size) > self.maxEdge:
+                img.thumbnail(target, Image.Resampling.LANCZOS)
+
+            # Convert to RGB, flattening transparency onto white
+            if img.mode in ("RGBA", "LA"):
+                img = img.convert("RGBA")
+                background = Image.new("RGB", img.size, (255, 255, 255))
+                background.paste(img, mask=img.getchannel("A"))
+                img = background
+            elif img.mode != "RGB":
+                img = img.convert("RGB")
+
+            buffer = io.BytesIO()
+            img.save(buffer, format="JPEG", quality=self.pickQuality(img.size))
+            return buffer.getvalue()
+
+    def stats(self):
+        """Return payload cache counters"""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._payloads),
+                "bytes": self._cacheBytes,
+            }
@@ -0,0 +1,101 @@
+import json
+import os
+import shutil
+import threading
+import time
+
+
+class OfflineQueue:
+    """
+    Durable FIFO of prompts written while offline.
+
+    Each entry is a JSON file named after an increasing id, written to a
+    temporary file first and then renamed, so a crash never leaves half a
+    prompt behind. Attached images are copied next to it, so the entry can
+    still be sent if the original file is moved or deleted.
+    """
+
+    def __init__(self, queueDir=".cache/outbox"):
+        """
+        Initialize the queue and load the entries left by a previous run.
+
+        Args:
+            queueDir: Directory holding the queued prompts and their images
+        """
+        self.queueDir = queueDir
+        self._lock = threading.Lock()
+        self._entries = self._load()
+        self._lastId = self._entries[-1]["id"] if self._entries else 0
+
+    def _entryPath(self, entryId):
+        return os.path.join(self.queueDir, f"{entryId:020d}.json")
+
+    def _load(self):
+        entries = []
+        if not os.path.isdir(self.queueDir):
+            return entries
+        for entry in os.scandir(self.queueDir):
+            if not entry.name.endswith(".json"):
+                continue
+            try:
+                with open(entry.path, "r", encoding="utf-8") as f:
+                    entries.append(json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Error reading offline queue entry {entry.name}: {e}")
+        return sorted(entries, key=lambda item: item["id"])
+
+    def put(self, textPrompt, imagePath=None):
+        """Queue a prompt (and a copy of its image); return the new entry"""
+        with self._lock:
+            # Increasing even if the clock goes back
+            entryId = max(time.time_ns(), self._lastId + 1)
+            self._lastId = entryId
+
+        os.makedirs(self.queueDir, exist_ok=True)
+        image = None
+        if imagePath:
+            image = os.path.join(
+                self.queueDir, f"{entryId:020d}{os.path.splitext(imagePath)[1]}"
+            )
+            shutil.copyfile(imagePath, image)
+
+        entry = {
+            "id": entryId,
+            "created": time.time(),
+            "prompt": textPrompt,
+            "image": image,
+        }
+        tmpPath = self._entryPath(entryId) + ".tmp"
+        with open(tmpPath, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmpPath, self._entryPath(entryId))
+
+        with self._lock:
+            self._entries.append(entry)
+        return entry
+
+    def entries(self):
+        """Queued entries, oldest first"""
+        with self._lock:
+            return list(self._entries)
+
+    def remove(self, entryId, keepImage=False):
+        """
+        Drop an entry once it has been sent, with its image copy unless
+        `keepImage` (the caller then deletes it when done with it)
+        """
+        with self._lock:
+            entry = next((e for e in self._entries if e["id"] == entryId), None)
+            if entry is None:
+                return
+            self._entries.remove(entry)
+        for path in (self._entryPath(entryId), None if keepImage else entry["image"]):
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import Future
+
+from BackEnd.Resilience import GeminiError
+
+
+class CancelToken:
+    """Cancel handle for one request; safe to use from any thread"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._callbacks = []
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def cancel(self):
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def onCancel(self, callback):
+        """Call `callback()` once the token is cancelled (immediately if it already is)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def wait(self, timeout):
+        """Sleep up to `timeout` seconds; returns True if cancelled meanwhile"""
+        return self._event.wait(timeout)
+
+    def raiseIfCancelled(self):
+        if self._event.is_set():
+            raise GeminiError("cancelled", "Request cancelled by the user")
+
+
+class _InFlight:
+    def __init__(self):
+        self.future = Future()
+        self.token = CancelToken()  # Cancels the shared work
+        self.waiters = 0
+
+
+class RequestCoalescer:
+    """
+    Shares one execution between identical requests that are in flight at
+    the same time. The work is cancelled only once every caller waiting
+    for it has cancelled.
+    """
+
+    def __init__(self):
+        self._inFlight = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def join(self, key, cancelToken=None):
+        """
+        Register a caller for `key`.
+
+        Returns (entry, isLeader). The leader must do the work with
+        `entry.token` and then call `settle()`; everyone calls `wait()`.
+        """
+        with self._lock:
+            entry = self._inFlight.get(key)
+            isLeader = entry is None
+            if isLeader:
+                entry = self._inFlight[key] = _InFlight()
+            else:
+                self.coalesced += 1
+            entry.waiters += 1
+
+        def leave():
+            with self._lock:
+                entry.waiters -= 1
+                lastWaiter = entry.waiters == 0
+            if lastWaiter:
+                entry.token.cancel()
+
+        if cancelToken is not None:
+            cancelToken.onCancel(leave)
+        return entry, isLeader
+
+    def settle(self, key, entry, result=None, error=None):
+        """Publish the leader's result (or exception) to every waiter"""
+        with self._lock:
+            if self._inFlight.get(key) is entry:
+                del self._inFlight[key]
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(result)
+
+    @staticmethod
+    def wait(entry, cancelToken=None):
+        """Block until the shared result is ready or `cancelToken` is cancelled"""
+        settled = threading.Event()
+        entry.future.add_done_callback(lambda future: settled.set())
+        if cancelToken is not None:
+            cancelToken.onCancel(settled.set)
+        settled.wait()
+
+        if cancelToken is not None:
+            cancelToken.raiseIfCancelled()
+        return entry.future.result()
+
+    def run(self, key, func, cancelToken=None):
+        """
+        Return `func(sharedToken)`, or the result of an identical call already running.
+
+        Raises GeminiError("cancelled") as soon as `cancelToken` is cancelled.
+        """
+        entry, isLeader = self.join(key, cancelToken)
+        if isLeader:
+            try:
+                result = func(entry.token)
+            except BaseException as e:
+                self.settle(key, entry, error=e)
+            else:
+                self.settle(key, entry, result)
+        return self.wait(entry, cancelToken)
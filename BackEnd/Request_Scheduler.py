@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+# Lower values run first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 10
+
+
+class TokenBucket:
+    """
+    Token bucket: `rate` requests per second with bursts up to `capacity`.
+
+    Tokens are handed out in arrival order: `reserve()` takes one, going
+    into debt if needed, and returns how long the caller must wait for it.
+    Safe to use from any thread.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self):
+        """Take a token; return the delay in seconds before it may be used"""
+        with self._lock:
+            self._refill()
+            self.tokens -= 1
+            return max(0.0, -self.tokens / self.rate)
+
+    def refund(self):
+        """Give back a token reserved by a request that was cancelled while waiting"""
+        with self._lock:
+            self.tokens = min(self.capacity, self.tokens + 1)
+
+    async def acquire(self):
+        delay = self.reserve()
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                self.refund()
+                raise
+
+
+class _Waiter:
+    """A request waiting for a slot, either on a thread or on an event loop"""
+
+    def __init__(self, loop=None):
+        self.loop = loop
+        self.future = loop.create_future() if loop else None
+        self.event = None if loop else threading.Event()
+        self.granted = False
+        self.abandoned = False
+
+    def wake(self):
+        if self.loop is None:
+            self.event.set()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+class RequestScheduler:
+    """
+    Schedules Gemini calls, from async code (`run`) and from worker
+    threads (`slot`).
+
+    Each model can have its own token-bucket rate limit; a request first
+    waits for its rate token, then for one of the slots of a global
+    concurrency limit. Waiting requests get slots in priority order (FIFO
+    within a priority), so interactive requests overtake queued batch
+    work.
+    """
+
+    def __init__(self, maxConcurrency=4, rateLimits=None):
+        """
+        Initialize the scheduler.
+
+        Args:
+            maxConcurrency: Maximum number of requests running at once
+            rateLimits: Optional {modelName: requests per minute}
+        """
+        self.maxConcurrency = maxConcurrency
+        self.active = 0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._buckets = {
+            modelName: TokenBucket(rpm / 60.0)
+            for modelName, rpm in (rateLimits or {}).items()
+        }
+
+    def setRateLimit(self, modelName, rpm):
+        """Limit `modelName` to `rpm` requests per minute (None removes the limit)"""
+        if rpm:
+            self._buckets[modelName] = TokenBucket(rpm / 60.0)
+        else:
+            self._buckets.pop(modelName, None)
+
+    def setConcurrency(self, maxConcurrency):
+        """Change the concurrency limit, starting waiting requests if it grew"""
+        with self._lock:
+            self.maxConcurrency = maxConcurrency
+            while self.active < self.maxConcurrency and self._grantNext():
+                self.active += 1
+
+    @property
+    def queued(self):
+        with self._lock:
+            return sum(1 for _, _, waiter in self._waiters if not waiter.abandoned)
+
+    def _enter(self, priority, loop=None):
+        """Take a free slot (returns None) or queue a waiter for one"""
+        with self._lock:
+            if self.active < self.maxConcurrency and not self._waiters:
+                self.active += 1
+                return None
+            waiter = _Waiter(loop)
+            heapq.heappush(self._waiters, (priority, next(self._sequence), waiter))
+            return waiter
+
+    def _abandon(self, waiter):
+        """Withdraw a cancelled waiter; True if it was granted a slot meanwhile"""
+        with self._lock:
+            waiter.abandoned = True
+            return waiter.granted
+
+    def _grantNext(self):
+        # Caller holds the lock
+        while self._waiters:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.abandoned:
+                waiter.granted = True
+                waiter.wake()
+                return True
+        return False
+
+    def _release(self):
+        # Hand the slot straight to the highest priority waiter
+        with self._lock:
+            if self.active > self.maxConcurrency or not self._grantNext():
+                self.active -= 1
+
+    async def _acquire(self, priority):
+        waiter = self._enter(priority, asyncio.get_running_loop())
+        if waiter is None:
+            return
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # The slot may have been handed over just before the cancellation
+            if self._abandon(waiter):
+                self._release()
+            raise
+
+    async def run(self, func, *args, priority=PRIORITY_INTERACTIVE, modelName=None, **kwargs):
+        """Await `func(*args, **kwargs)` once a rate token and a slot are available"""
+        bucket = self._buckets.get(modelName)
+        if bucket is not None:
+            await bucket.acquire()
+        await self._acquire(priority)
+        try:
+            return await func(*args, **kwargs)
+        finally:
+            self._release()
+
+    @contextmanager
+    def slot(self, priority=PRIORITY_INTERACTIVE, modelName=None, cancelToken=None):
+        """
+        Block the calling thread until a rate token and a slot are available,
+        and hold the slot for the body of the `with` statement.
+
+        A cancelled `cancelToken` (a `CancelToken`) stops the wait with
+        GeminiError("cancelled").
+        """
+        bucket = self._buckets.get(modelName)
+        if bucket is not None:
+            delay = bucket.reserve()
+            if delay and cancelToken is None:
+                time.sleep(delay)
+            elif delay and cancelToken.wait(delay):
+                bucket.refund()
+                cancelToken.raiseIfCancelled()
+
+        waiter = self._enter(priority)
+        if waiter is not None:
+            if cancelToken is not None:
+                cancelToken.onCancel(waiter.event.set)
+            waiter.event.wait()
+            if cancelToken is not None and cancelToken.cancelled:
+                if self._abandon(waiter):
+                    self._release()
+                cancelToken.raiseIfCancelled()
+        try:
+            yield
+        finally:
+            self._release()
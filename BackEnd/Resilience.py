@@ -0,0 +1,244 @@
+import asyncio
+import random
+import threading
+import time
+
+try:
+    import requests
+except ImportError:  # Only used to classify REST transport errors
+    requests = None
+
+# HTTP status codes worth retrying
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+
+
+class GeminiError(Exception):
+    """
+    Structured error for failed Gemini requests.
+
+    `kind` is one of: "timeout", "rate_limited", "unavailable", "network",
+    "circuit_open", "bad_request", "auth", "cancelled", "unknown".
+    """
+
+    USER_MESSAGES = {
+        "timeout": "Gemini took too long to respond. Please try again.",
+        "rate_limited": "Too many requests right now. Please wait a moment and try again.",
+        "unavailable": "Gemini is temporarily unavailable. Please try again later.",
+        "network": "Could not reach Gemini. Please check your connection.",
+        "circuit_open": "Gemini is failing repeatedly; pausing requests for a short while.",
+        "bad_request": "Gemini rejected the request.",
+        "auth": "The Gemini API key was rejected. Please check GEMINI_API_KEY.",
+        "cancelled": "The request was cancelled.",
+    }
+
+    def __init__(self, kind, message, statusCode=None, retryable=False, retryAfter=None, attempts=1):
+        super().__init__(message)
+        self.kind = kind
+        self.message = message
+        self.statusCode = statusCode
+        self.retryable = retryable
+        self.retryAfter = retryAfter
+        self.attempts = attempts
+
+    @property
+    def userMessage(self):
+        return self.USER_MESSAGES.get(self.kind, f"Error: {self.message}")
+
+    def __str__(self):
+        return f"{self.kind}: {self.message}"
+
+
+def _retryAfterSeconds(exc):
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None  # HTTP-date form is not worth parsing here
+
+
+def classifyError(exc):
+    """Map any exception from the client to a GeminiError"""
+    if isinstance(exc, GeminiError):
+        return exc
+
+    message = str(exc) or type(exc).__name__
+    status = getattr(exc, "code", None)
+    status = status if isinstance(status, int) else None
+
+    if isinstance(exc, (TimeoutError, asyncio.TimeoutError)) or status in (408, 504):
+        return GeminiError("timeout", message, status, retryable=True)
+    if status == 429:
+        return GeminiError("rate_limited", message, status, retryable=True, retryAfter=_retryAfterSeconds(exc))
+    if status in RETRYABLE_STATUS:
+        return GeminiError("unavailable", message, status, retryable=True, retryAfter=_retryAfterSeconds(exc))
+    if status in (401, 403):
+        return GeminiError("auth", message, status)
+    if status is not None and 400 <= status < 500:
+        return GeminiError("bad_request", message, status)
+
+    if requests is not None:
+        if isinstance(exc, requests.exceptions.Timeout):
+            return GeminiError("timeout", message, retryable=True)
+        if isinstance(exc, requests.exceptions.ConnectionError):
+            return GeminiError("network", message, retryable=True)
+    if isinstance(exc, ConnectionError):
+        return GeminiError("network", message, retryable=True)
+
+    return GeminiError("unknown", message)
+
+
+class CircuitBreaker:
+    """
+    Fails fast while the endpoint is unhealthy.
+
+    Opens after `failureThreshold` consecutive retryable failures, rejects
+    calls for `resetTimeout` seconds, then lets a single trial call through
+    (half-open) and closes again if it succeeds.
+    """
+
+    def __init__(self, failureThreshold=5, resetTimeout=30.0):
+        self.failureThreshold = failureThreshold
+        self.resetTimeout = resetTimeout
+        self.state = "closed"
+        self.failures = 0
+        self._openedAt = 0.0
+        self._lock = threading.Lock()
+
+    def before(self):
+        """Raise GeminiError("circuit_open") if calls are currently rejected"""
+        with self._lock:
+            if self.state == "open":
+                remaining = self.resetTimeout - (time.monotonic() - self._openedAt)
+                if remaining > 0:
+                    raise GeminiError(
+                        "circuit_open",
+                        f"Circuit open after {self.failures} failures",
+                        retryAfter=remaining,
+                    )
+                self.state = "half-open"
+            elif self.state == "half-open":
+                raise GeminiError("circuit_open", "Waiting for the trial request", retryAfter=1.0)
+
+    def recordSuccess(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def recordFailure(self, error):
+        with self._lock:
+            if not error.retryable:
+                # The endpoint answered; a bad request says nothing about its health
+                if self.state == "half-open":
+                    self.state = "closed"
+                return
+            self.failures += 1
+            if self.state == "half-open" or self.failures >= self.failureThreshold:
+                self.state = "open"
+                self._openedAt = time.monotonic()
+
+    def releaseTrial(self):
+        """Give up the half-open trial without an outcome (e.g. it was cancelled)"""
+        with self._lock:
+            if self.state == "half-open":
+                # Still open, but the next call may start a new trial right away
+                self.state = "open"
+                self._openedAt = time.monotonic() - self.resetTimeout
+
+
+class Resilience:
+    """
+    Runs client calls with a per-request deadline, classified retries with
+    exponential backoff and full jitter (honoring Retry-After), and a
+    circuit breaker.
+    """
+
+    def __init__(self, attemptTimeout=30.0, deadline=90.0, maxAttempts=4, baseDelay=0.5, maxDelay=10.0, breaker=None):
+        """
+        Initialize the resilience layer.
+
+        Args:
+            attemptTimeout: Timeout in seconds of a single attempt
+            deadline: Total time in seconds allowed for a request, retries included
+            maxAttempts: Maximum attempts per request
+            baseDelay: First backoff delay in seconds (doubled per retry)
+            maxDelay: Upper bound of a single backoff delay
+            breaker: CircuitBreaker shared by all requests
+        """
+        self.attemptTimeout = attemptTimeout
+        self.deadline = deadline
+        self.maxAttempts = maxAttempts
+        self.baseDelay = baseDelay
+        self.maxDelay = maxDelay
+        self.breaker = breaker or CircuitBreaker()
+
+    def _backoff(self, attempt, error):
+        delay = random.uniform(0, min(self.maxDelay, self.baseDelay * 2 ** attempt))
+        if error.retryAfter is not None:
+            delay = max(delay, error.retryAfter)
+        return delay
+
+    def _nextStep(self, attempt, error, startTime):
+        """Return the delay before the next attempt, or raise the final error"""
+        self.breaker.recordFailure(error)
+        error.attempts = attempt + 1
+        if not error.retryable or attempt + 1 >= self.maxAttempts:
+            raise error
+
+        delay = self._backoff(attempt, error)
+        if time.monotonic() - startTime + delay >= self.deadline:
+            raise error
+        print(f"Gemini request failed ({error}), retrying in {delay:.1f}s...")
+        return delay
+
+    def _attemptTimeout(self, startTime):
+        remaining = self.deadline - (time.monotonic() - startTime)
+        if remaining <= 0:
+            raise GeminiError("timeout", "Request deadline exceeded")
+        return min(self.attemptTimeout, remaining)
+
+    def call(self, func, cancelToken=None):
+        """
+        Call `func(timeout)` until it succeeds, or raise a GeminiError.
+
+        A cancelled `cancelToken` stops further attempts and interrupts backoff.
+        """
+        startTime = time.monotonic()
+        for attempt in range(self.maxAttempts):
+            if cancelToken is not None:
+                cancelToken.raiseIfCancelled()
+            self.breaker.before()
+            try:
+                result = func(self._attemptTimeout(startTime))
+            except Exception as e:
+                if cancelToken is not None and cancelToken.cancelled:
+                    # The failure may come from the cancel itself: settle the
+                    # breaker without counting it, then report the cancel
+                    self.breaker.releaseTrial()
+                    cancelToken.raiseIfCancelled()
+                delay = self._nextStep(attempt, classifyError(e), startTime)
+                if cancelToken is not None:
+                    cancelToken.wait(delay)
+                else:
+                    time.sleep(delay)
+                continue
+            self.breaker.recordSuccess()
+            return result
+
+    async def callAsync(self, func):
+        """Await `func(timeout)` until it succeeds, or raise a GeminiError"""
+        startTime = time.monotonic()
+        for attempt in range(self.maxAttempts):
+            self.breaker.before()
+            try:
+                timeout = self._attemptTimeout(startTime)
+                result = await asyncio.wait_for(func(timeout), timeout)
+            except asyncio.CancelledError:
+                self.breaker.releaseTrial()
+                raise
+            except Exception as e:
+                await asyncio.sleep(self._nextStep(attempt, classifyError(e), startTime))
+                continue
+            self.breaker.recordSuccess()
+            return result
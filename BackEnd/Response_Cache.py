@@ -0,0 +1,185 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalizePrompt(textPrompt):
+    """Normalize a prompt so trivial whitespace/Unicode differences share a cache key"""
+    textPrompt = unicodedata.normalize("NFC", textPrompt or "")
+    return " ".join(textPrompt.split())
+
+
+def hashFile(path, chunkSize=1024 * 1024):
+    """Return the SHA-256 hex digest of a file's bytes"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunkSize), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    Content-addressed cache of Gemini responses.
+
+    Entries are keyed by a hash of the normalized prompt, the image bytes,
+    the model name and the generation config. A small in-memory LRU tier
+    sits in front of an on-disk tier bounded by size and age.
+    """
+
+    def __init__(
+        self,
+        cacheDir=".cache/responses",
+        maxMemoryEntries=128,
+        maxDiskBytes=50 * 1024 * 1024,
+        ttl=7 * 24 * 3600,
+        enabled=True,
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            cacheDir: Directory of the on-disk tier
+            maxMemoryEntries: Number of responses kept in the memory tier
+            maxDiskBytes: Size limit of the on-disk tier in bytes
+            ttl: Time in seconds before an entry expires
+            enabled: Set to False to bypass the cache entirely
+        """
+        self.cacheDir = cacheDir
+        self.maxMemoryEntries = maxMemoryEntries
+        self.maxDiskBytes = maxDiskBytes
+        self.ttl = ttl
+        self.enabled = enabled
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memoryHits = 0
+        self.diskHits = 0
+        self.misses = 0
+
+    @staticmethod
+    def makeKey(textPrompt, imageDigest=None, modelName="", generationConfig=None, context=None):
+        """
+        Build the cache key.
+
+        `imageDigest` is the SHA-256 of the image bytes and `context` an
+        optional fingerprint of the conversation history.
+        """
+        payload = json.dumps(
+            {
+                "prompt": normalizePrompt(textPrompt),
+                "image": imageDigest,
+                "model": modelName,
+                "config": generationConfig,
+                "context": context,
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _diskPath(self, key):
+        return os.path.join(self.cacheDir, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached response for `key`, or None"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                created, response = entry
+                if now - created <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.memoryHits += 1
+                    return response
+                del self._memory[key]
+
+        # Fall back to the on-disk tier
+        try:
+            with open(self._diskPath(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            if now - entry["created"] <= self.ttl:
+                with self._lock:
+                    self._remember(key, entry["created"], entry["response"])
+                    self.diskHits += 1
+                return entry["response"]
+            os.remove(self._diskPath(key))
+        except (OSError, ValueError, KeyError):
+            pass
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key, response):
+        """Store a response in both tiers"""
+        if not self.enabled or not response:
+            return
+
+        created = time.time()
+        with self._lock:
+            self._remember(key, created, response)
+
+        try:
+            os.makedirs(self.cacheDir, exist_ok=True)
+            tmpPath = self._diskPath(key) + ".tmp"
+            with open(tmpPath, "w", encoding="utf-8") as f:
+                json.dump({"created": created, "response": response}, f)
+            os.replace(tmpPath, self._diskPath(key))
+            self._trimDisk()
+        except OSError as e:
+            print(f"Error writing response cache: {e}")
+
+    def _remember(self, key, created, response):
+        self._memory[key] = (created, response)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxMemoryEntries:
+            self._memory.popitem(last=False)
+
+    def _trimDisk(self):
+        """Drop expired entries, then the oldest ones until under the size limit"""
+        now = time.time()
+        entries = []
+        for entry in os.scandir(self.cacheDir):
+            if not entry.name.endswith(".json"):
+                continue
+            stat = entry.stat()
+            if now - stat.st_mtime > self.ttl:
+                os.remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.maxDiskBytes:
+                break
+            os.remove(path)
+            total -= size
+
+    def clear(self):
+        """Empty both tiers"""
+        with self._lock:
+            self._memory.clear()
+        if os.path.isdir(self.cacheDir):
+            for entry in os.scandir(self.cacheDir):
+                if entry.name.endswith(".json"):
+                    os.remove(entry.path)
+
+    def stats(self):
+        """Return hit/miss counters"""
+        with self._lock:
+            hits = self.memoryHits + self.diskHits
+            lookups = hits + self.misses
+            return {
+                "memoryHits": self.memoryHits,
+                "diskHits": self.diskHits,
+                "misses": self.misses,
+                "hitRate": hits / lookups if lookups else 0.0,
+                "memoryEntries": len(self._memory),
+            }
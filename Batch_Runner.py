@@ -0,0 +1,186 @@
+"""
+Headless batch mode: run a JSONL or CSV file of prompts (with optional
+image paths) through Gemini without opening the GUI.
+
+Each input record has an `id`, a `prompt` and an optional `image` path.
+Results are appended to the output JSONL as soon as each item finishes,
+and items whose id already has a successful result there are skipped,
+so an interrupted run can simply be started again. Malformed input lines
+and empty responses are recorded as failed items, retried by the next run.
+
+Usage:
+    python Batch_Runner.py prompts.jsonl results.jsonl --concurrency 4 --rpm 30
+"""
+import argparse
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from BackEnd.GEMINI_BackEnd import (
+    geminiSession,
+    requestGeminiResponse,
+    requestScheduler,
+    requireApiKey,
+)
+from BackEnd.Request_Scheduler import PRIORITY_BATCH
+
+
+def parse_line(line):
+    """Parse one JSONL input line into (row, error)"""
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return {}, f"Malformed input line: {e}"
+    if not isinstance(row, dict):
+        return {}, "Malformed input line: expected a JSON object"
+    return row, None
+
+
+def read_records(path):
+    """
+    Yield {"id", "prompt", "image"} records from a JSONL or CSV file.
+
+    Records without an id are numbered by their line (or CSV row). A
+    malformed JSONL line is yielded with an "error" as well, and the id
+    "line-<number>", so it is reported like a failed item instead of
+    aborting the run.
+    """
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            rows = (
+                (number, row, None)
+                for number, row in enumerate(csv.DictReader(f), start=1)
+            )
+        else:
+            rows = (
+                (number, *parse_line(line))
+                for number, line in enumerate(f, start=1)
+                if line.strip()
+            )
+
+        for number, row, error in rows:
+            record = {
+                "id": f"line-{number}" if error else str(row.get("id") or number),
+                "prompt": row.get("prompt") or "",
+                "image": row.get("image") or None,
+            }
+            if error:
+                record["error"] = error
+            yield record
+
+
+def read_results(output_path):
+    """Yield the results already in the output file"""
+    if not os.path.exists(output_path):
+        return
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # Torn last line after a crash
+
+
+def completed_ids(output_path):
+    """IDs that already have a successful result in the output file"""
+    return {
+        str(result.get("id"))
+        for result in read_results(output_path)
+        if result.get("error") is None
+    }
+
+
+def run_batch(input_path, output_path, concurrency=4, rpm=0, use_cache=True):
+    """Process every pending record and append the results to `output_path`"""
+    done, reported = set(), set()
+    for result in read_results(output_path):
+        (reported if result.get("error") else done).add(str(result.get("id")))
+    # Concurrency and rate limits are enforced by the shared request scheduler
+    requestScheduler.setConcurrency(concurrency)
+    if rpm:
+        requestScheduler.setRateLimit(geminiSession.modelName, rpm)
+    write_lock = threading.Lock()
+    # Bound queued work so huge inputs are not loaded all at once
+    slots = threading.BoundedSemaphore(concurrency * 2)
+    counts = {"ok": 0, "failed": 0, "skipped": 0}
+
+    with open(output_path, "a", encoding="utf-8") as output:
+
+        def write_result(record, response, error, elapsed):
+            result = {
+                "id": record["id"],
+                "prompt": record["prompt"],
+                "image": record["image"],
+                "response": response,
+                "error": error,
+                "elapsed": round(elapsed, 3),
+            }
+            with write_lock:
+                output.write(json.dumps(result, ensure_ascii=False) + "\n")
+                output.flush()
+                counts["failed" if error else "ok"] += 1
+
+        def process(record):
+            try:
+                start_time = time.monotonic()
+                try:
+                    response, error = requestGeminiResponse(
+                        record["image"],
+                        record["prompt"],
+                        useCache=use_cache,
+                        priority=PRIORITY_BATCH,
+                    ), None
+                except Exception as e:
+                    response, error = None, f"{type(e).__name__}: {e}"
+                if not response and error is None:
+                    # Not done: a later run tries it again
+                    error = "Empty response from Gemini"
+
+                write_result(record, response, error, time.monotonic() - start_time)
+            finally:
+                slots.release()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for record in read_records(input_path):
+                if "error" in record:
+                    # A malformed line stays malformed: report it once
+                    if record["id"] in reported:
+                        counts["skipped"] += 1
+                    else:
+                        write_result(record, None, record["error"], 0.0)
+                    continue
+                if record["id"] in done:
+                    counts["skipped"] += 1
+                    continue
+                slots.acquire()
+                executor.submit(process, record)
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run prompts through Gemini in batch")
+    parser.add_argument("input", help="JSONL or CSV file with id, prompt and image columns")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requests in flight")
+    parser.add_argument("--rpm", type=float, default=0, help="Max requests per minute (0 = unlimited)")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the response cache")
+    args = parser.parse_args()
+    requireApiKey()
+
+    counts = run_batch(
+        args.input,
+        args.output,
+        concurrency=max(1, args.concurrency),
+        rpm=args.rpm,
+        use_cache=not args.no_cache,
+    )
+    print(f"Done: {counts['ok']} ok, {counts['failed']} failed, {counts['skipped']} skipped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Probe a local stand-in of the Gemini endpoint through the client's pooled
+session, then send a real request. The script reports:
+
+- the probe round trip times, cold and warm;
+- the new connections the endpoint saw (the request should reuse the
+  probe's connection);
+- whether the probe notices the endpoint going away.
+
+Exits with status 1 if the request opens a new connection or the
+outage goes unnoticed.
+
+Run from the project root:  python -m Benchmarks.Api_Probe
+"""
+import sys
+
+from BackEnd.GEMINI_BackEnd import GeminiSession
+from Benchmarks.Stub_Server import StubGeminiServer
+from Status_Checker import HttpsProbe
+
+stub = StubGeminiServer().start()
+
+PROBES = 20
+TIMEOUT = 2
+
+if __name__ == "__main__":
+    session = GeminiSession("benchmark-key", transport="rest", apiEndpoint=stub.endpoint)
+    probe = HttpsProbe(session.apiHost, session=session.httpSession, session_host=session.apiHost)
+
+    rtts = [probe(TIMEOUT) for _ in range(PROBES)]
+    reachable = all(rtt is not None for rtt in rtts)
+    warm = sorted(rtts[1:])[len(rtts) // 2] if reachable else float("nan")
+    print(f"probe {probe.name}: reachable {reachable}")
+    if reachable:
+        print(f"rtt: first {rtts[0] * 1000:.2f} ms, then median {warm * 1000:.2f} ms")
+
+    connections = stub.connections
+    text = session.getModel().generate_content(["ping"]).text
+    reused = stub.connections == connections
+    print(
+        f"request after probing: {stub.connections - connections} new connections "
+        f"({stub.connections} in total for {PROBES} probes and the request)"
+    )
+
+    stub.stop()
+    # A real outage also breaks the pooled keep-alive connection
+    session.httpSession().close()
+    down = probe(TIMEOUT) is None
+    print(f"endpoint stopped, probe reports it unreachable: {down}")
+    sys.exit(0 if reachable and text and reused and down else 1)
@@ -0,0 +1,97 @@
+"""
+Run the ConnectionMonitor against a local listening socket (the stand-in
+for a DNS server) with short intervals. The script reports:
+
+- how many checks the adaptive interval makes while the connection is
+  stable, compared to checking at the fast interval;
+- how quickly subscribers hear about an outage;
+- the round trip time percentiles;
+- whether any probe socket is left open.
+
+The old probe never closed its sockets and changed the process-wide
+default timeout. Exits with status 1 if a socket leaks, the global
+timeout changes or the outage is not reported.
+
+Run from the project root:  python -m Benchmarks.Connection_Monitor
+"""
+import os
+import socket
+import sys
+import threading
+import time
+
+from Status_Checker import ConnectionMonitor
+
+FAST_INTERVAL = 0.02
+SLOW_INTERVAL = 0.32
+STABLE_TIME = 2.0
+
+
+def open_sockets():
+    """Number of sockets held by this process (Linux), or None if unknown"""
+    try:
+        fds = os.listdir("/proc/self/fd")
+    except OSError:
+        return None
+    count = 0
+    for fd in fds:
+        try:
+            count += os.readlink(f"/proc/self/fd/{fd}").startswith("socket:")
+        except OSError:
+            pass  # e.g. the descriptor used to list the directory
+    return count
+
+
+if __name__ == "__main__":
+    server = socket.create_server(("127.0.0.1", 0))
+    server.listen(128)
+    port = server.getsockname()[1]
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            conn.close()
+
+    threading.Thread(target=accept, daemon=True).start()
+
+    sockets_before = open_sockets()
+    changes = []
+    monitor = ConnectionMonitor(
+        probes=[("127.0.0.1", port)],
+        fast_interval=FAST_INTERVAL,
+        slow_interval=SLOW_INTERVAL,
+        timeout=0.2,
+    )
+    monitor.subscribe(lambda connected: changes.append((time.perf_counter(), connected)))
+    monitor.start()
+    time.sleep(STABLE_TIME)
+    stable_checks = monitor.checks
+
+    # Outage: nothing listens on the port any more
+    server.shutdown(socket.SHUT_RDWR)  # Also wakes the accept thread
+    server.close()
+    outage = time.perf_counter()
+    monitor.check_now()
+    deadline = outage + 2
+    while len(changes) < 2 and time.perf_counter() < deadline:
+        time.sleep(0.005)
+    monitor.stop()
+    sockets_after = open_sockets()
+
+    fixed_checks = int(STABLE_TIME / FAST_INTERVAL)
+    rtt = monitor.rtt_percentiles()
+    print(f"stable for {STABLE_TIME:.0f} s: {stable_checks} checks, {fixed_checks} at a fixed interval")
+    print("rtt: " + ", ".join(f"p{p} {ms:.2f} ms" for p, ms in rtt.items()))
+    reported = len(changes) >= 2 and changes[1][1] is False
+    if reported:
+        print(f"outage reported to subscribers {(changes[1][0] - outage) * 1000:.0f} ms after check_now()")
+    else:
+        print("outage not reported")
+    # The listening socket was open before and is closed now
+    leaked = None if sockets_before is None else sockets_after - (sockets_before - 1)
+    print(f"probe sockets left open: {leaked if leaked is not None else 'unknown'}")
+    print(f"global default timeout untouched: {socket.getdefaulttimeout() is None}")
+    sys.exit(0 if reported and not leaked and socket.getdefaulttimeout() is None else 1)
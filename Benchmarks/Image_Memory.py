@@ -0,0 +1,52 @@
+"""
+Check that the Python-side peak memory of one image request stays bounded
+for a large (24 megapixel) synthetic photo, using tracemalloc and a local
+stub endpoint. Exits with status 1 when the bound is exceeded.
+
+Run from the project root:  python -m Benchmarks.Image_Memory
+"""
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from PIL import Image
+
+from BackEnd.GEMINI_BackEnd import GeminiSession, buildContentParts
+from Benchmarks.Stub_Server import StubGeminiServer
+
+stub = StubGeminiServer().start()
+
+# Peak traced allocations allowed per request
+PEAK_BOUND = 8 * 1024 * 1024
+
+
+def makeLargeImage(path):
+    # Noise keeps the JPEG from compressing to almost nothing
+    noise = Image.effect_noise((6000, 4000), 64).convert("RGB")
+    noise.save(path, format="JPEG", quality=95)
+
+
+if __name__ == "__main__":
+    session = GeminiSession("benchmark-key", transport="rest", apiEndpoint=stub.endpoint)
+    model = session.getModel()
+    model.generate_content(["warm-up"])
+
+    with tempfile.TemporaryDirectory() as tmpDir:
+        imagePath = os.path.join(tmpDir, "large.jpg")
+        makeLargeImage(imagePath)
+        sourceSize = os.path.getsize(imagePath)
+
+        tracemalloc.start()
+        contentParts = buildContentParts(imagePath, "Describe this image")
+        model.generate_content(contentParts)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    payloadSize = len(contentParts[1]["data"])
+    stub.stop()
+
+    print(f"source file   {sourceSize / 1024 / 1024:7.2f} MB")
+    print(f"sent payload  {payloadSize / 1024 / 1024:7.2f} MB")
+    print(f"traced peak   {peak / 1024 / 1024:7.2f} MB (bound {PEAK_BOUND / 1024 / 1024:.0f} MB)")
+    sys.exit(0 if peak <= PEAK_BOUND else 1)
@@ -0,0 +1,88 @@
+"""
+Scroll a window of image bubbles down a long image-heavy conversation
+and back up, checking that the chat image loader keeps resident bitmaps
+under its memory cap and re-reads evicted images from the downscaled
+on-disk cache instead of decoding the originals again. Decoding runs
+inline instead of on the worker pool. Exits with status 1 if the cap is
+exceeded or an original is decoded twice.
+
+Run from the project root:  python -m Benchmarks.Image_Residency
+"""
+import os
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from Ui.Image_Loader import ChatImageLoader
+
+MESSAGES = 40
+WINDOW = 5  # Bubbles materialized around the viewport
+MEMORY_CAP = 8 * 1024 * 1024
+
+
+class InlineDispatcher:
+    """Runs the work immediately, like RequestDispatcher minus the threads"""
+
+    def submit(self, func, *args, on_done=None, on_error=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            on_error(e, time.perf_counter() - start)
+        else:
+            on_done(result, time.perf_counter() - start)
+
+
+def scroll(loader, paths, positions):
+    """Show bubbles [top, top + WINDOW) for each position; return peak resident bytes"""
+    shown = {}
+    peak = 0
+    for top in positions:
+        wanted = set(range(top, min(top + WINDOW, len(paths))))
+        for index in list(shown):
+            if index not in wanted:
+                loader.release(shown.pop(index))
+        for index in wanted - set(shown):
+            owner = f"view-{index}"
+            loader.load(paths[index], "bubble", lambda image, size: None, owner=owner)
+            shown[index] = owner
+        peak = max(peak, loader.resident_bytes)
+    return peak
+
+
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as tmpDir:
+        paths = []
+        for i in range(MESSAGES):
+            path = os.path.join(tmpDir, f"photo-{i}.jpg")
+            Image.linear_gradient("L").resize((2400, 1800)).convert("RGB").save(path)
+            paths.append(path)
+
+        loader = ChatImageLoader(
+            InlineDispatcher(),
+            max_bytes=MEMORY_CAP,
+            cache_dir=os.path.join(tmpDir, "cache"),
+        )
+        start = time.perf_counter()
+        down = scroll(loader, paths, range(MESSAGES))
+        first_pass = time.perf_counter() - start
+
+        start = time.perf_counter()
+        up = scroll(loader, paths, reversed(range(MESSAGES)))
+        second_pass = time.perf_counter() - start
+
+        stats = loader.stats()
+        bubble = loader.image_bytes((348, 261))
+        print(f"{MESSAGES} image messages, {WINDOW} on screen, cap {MEMORY_CAP // 1024} KB")
+        print(f"scroll down: {first_pass * 1000:.0f} ms, peak resident {down // 1024} KB")
+        print(f"scroll up:   {second_pass * 1000:.0f} ms, peak resident {up // 1024} KB")
+        print(
+            f"resident now {stats['resident_bytes'] // 1024} KB in {stats['resident_images']} images, "
+            f"{stats['evictions']} evictions, {stats['decodes']} decodes, {stats['disk_hits']} disk cache reads"
+        )
+
+    # One bubble may be added on top of a full cache before eviction runs
+    within_cap = max(down, up) <= MEMORY_CAP + bubble
+    sys.exit(0 if within_cap and stats["decodes"] == MESSAGES else 1)
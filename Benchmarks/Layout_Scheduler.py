@@ -0,0 +1,123 @@
+"""
+Replay a streamed response through the LayoutScheduler on a minimal
+event loop. The chunks arrive every couple of milliseconds, and each
+one requests a relayout and a scroll to the bottom, the way
+stream_ai_response does. The script counts the layout passes, the
+scrolls actually made and the forced updates (the old code forced an
+update() and scrolled for every chunk). Halfway through, the reader
+scrolls up to check that the view stops following the stream. Exits
+with status 1 if requests are not merged, an update is forced or the
+view is pulled back down.
+
+Run from the project root:  python -m Benchmarks.Layout_Scheduler
+"""
+import heapq
+import itertools
+import sys
+import time
+
+from Ui.Layout_Scheduler import LayoutScheduler
+
+CHUNKS = 300
+CHUNK_INTERVAL = 2  # Milliseconds between streamed chunks
+LINE_HEIGHT = 20
+VIEW_HEIGHT = 600
+
+
+class EventLoop:
+    """
+    Just enough of Tk's after()/after_idle()/after_cancel() for the
+    scheduler, counting update()/update_idletasks() calls
+    """
+
+    def __init__(self):
+        self._queue = []
+        self._order = itertools.count()
+        self._cancelled = set()
+        self.forced_updates = 0
+
+    def update(self):
+        self.forced_updates += 1
+
+    def update_idletasks(self):
+        self.forced_updates += 1
+
+    def after(self, ms, callback, *args):
+        job = next(self._order)
+        heapq.heappush(
+            self._queue, (time.perf_counter() + ms / 1000, job, lambda: callback(*args))
+        )
+        return job
+
+    def after_idle(self, callback, *args):
+        return self.after(0, callback, *args)
+
+    def after_cancel(self, job):
+        self._cancelled.add(job)
+
+    def run(self):
+        while self._queue:
+            due, job, callback = heapq.heappop(self._queue)
+            time.sleep(max(0.0, due - time.perf_counter()))
+            if job not in self._cancelled:
+                callback()
+
+
+class FakeCanvas:
+    """Scrolled view whose content grows by one line per laid out chunk"""
+
+    def __init__(self):
+        self.content_height = VIEW_HEIGHT
+        self.top = 0
+        self.scrolls = 0
+
+    def yview(self):
+        return (
+            self.top / self.content_height,
+            (self.top + VIEW_HEIGHT) / self.content_height,
+        )
+
+    def yview_moveto(self, fraction):
+        self.scrolls += 1
+        self.top = max(0, fraction * self.content_height - VIEW_HEIGHT)
+
+
+if __name__ == "__main__":
+    loop = EventLoop()
+    canvas = FakeCanvas()
+    layout = LayoutScheduler(loop, canvas)
+    pending = {"lines": 0}
+
+    def relayout():
+        canvas.content_height += pending["lines"] * LINE_HEIGHT
+        pending["lines"] = 0
+
+    state = {"top_when_scrolled_up": None}
+
+    def on_chunk(index):
+        pending["lines"] += 1
+        layout.request(relayout)
+        layout.scroll_to_bottom()
+        if index == CHUNKS // 2:
+            # The reader scrolls up to an earlier message
+            canvas.top = 0
+            layout.cancel_scroll()  # Bound to the mouse wheel and scrollbar
+            state["top_when_scrolled_up"] = canvas.top
+
+    for index in range(CHUNKS):
+        loop.after(index * CHUNK_INTERVAL, on_chunk, index)
+
+    start = time.perf_counter()
+    loop.run()
+    elapsed = time.perf_counter() - start
+
+    stats = layout.stats()
+    print(f"{CHUNKS} chunks over {elapsed * 1000:.0f} ms")
+    print(
+        f"{stats['passes']} layout passes for {stats['requests']} requests, "
+        f"{canvas.scrolls} scrolls, {loop.forced_updates} forced updates"
+    )
+    stayed_up = canvas.top == state["top_when_scrolled_up"]
+    print(f"view left alone after scrolling up: {stayed_up}")
+    merged = stats["passes"] < CHUNKS / 2 and loop.forced_updates == 0
+    sys.exit(0 if merged and stayed_up else 1)
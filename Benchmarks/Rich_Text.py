@@ -0,0 +1,130 @@
+"""
+Measure rendering of a large AI response: markdown parse time with and
+without the parse cache, and the widgets needed per message by the old
+label-per-block layout against the single rich text widget. When a
+display is available the render time of both layouts is measured too,
+along with the time until progressive rendering shows its first screen.
+Exits with status 1 if a cached parse is not faster than a cold one.
+
+Run from the project root:  python -m Benchmarks.Rich_Text
+"""
+import sys
+import time
+import tkinter as tk
+
+from Style.UiConfig import ContentStyles, ThemeManager
+from Ui.Rich_Text import ParseCache, RichTextView, parse_markdown
+
+SECTIONS = 150
+REPEATS = 20
+
+
+def make_response(sections=SECTIONS):
+    """A long answer mixing headings, paragraphs, lists and code blocks"""
+    lines = []
+    for i in range(sections):
+        lines.append(f"## Section {i}")
+        lines.append(
+            f"Paragraph {i} explains **an important point** with *some emphasis* "
+            f"and a call to `function_{i}()` that wraps over several lines of text."
+        )
+        lines.append(f"- first point about item {i}")
+        lines.append(f"  - nested detail with **bold** text")
+        lines.append(f"1. numbered step {i}")
+        if i % 3 == 0:
+            lines.extend(["```python", f"def function_{i}():", f"    return {i}", "```"])
+    return "\n".join(lines)
+
+
+def label_widget_count(blocks):
+    """Widgets the label based renderer creates for the same content"""
+    count = 0
+    text_run = False
+    for block in blocks:
+        if block[0] == "code":
+            count += 2  # Container frame + label
+            text_run = False
+        elif not text_run:
+            count += 1  # Consecutive text lines share one label
+            text_run = True
+    return count
+
+
+def timed(func, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = func()
+    return (time.perf_counter() - start) / repeats, result
+
+
+def render_labels(parent, theme_manager, blocks):
+    import customtkinter as ctk
+
+    frame = ctk.CTkFrame(parent, fg_color="transparent")
+    text_lines = []
+
+    def flush():
+        if text_lines:
+            ctk.CTkLabel(
+                frame,
+                **ContentStyles.get_Ai_Response_style(theme_manager, "\n".join(text_lines)),
+            ).pack(fill=tk.X, pady=(0, 5), anchor=tk.W)
+            text_lines.clear()
+
+    for block in blocks:
+        if block[0] == "code":
+            flush()
+            code_frame = ctk.CTkFrame(
+                frame, **ContentStyles.get_Code_container_style(theme_manager)
+            )
+            code_frame.pack(fill=tk.X, pady=(0, 5), anchor=tk.W)
+            ctk.CTkLabel(
+                code_frame, **ContentStyles.get_Code_label_style(theme_manager, block[2])
+            ).pack(fill=tk.X)
+        else:
+            text_lines.append("".join(span for span, _ in block[-1]))
+    flush()
+    frame.pack()
+    frame.update_idletasks()
+    return frame
+
+
+def render_rich_text(parent, theme_manager, blocks, progressive=False):
+    view = RichTextView(parent, theme_manager)
+    view.render(blocks, progressive=progressive)
+    view.pack()
+    view.text.update_idletasks()
+    return view
+
+
+if __name__ == "__main__":
+    message = make_response()
+    print(f"response: {len(message) // 1024} KB, {message.count(chr(10)) + 1} lines")
+
+    cold, blocks = timed(lambda: parse_markdown(message))
+    cache = ParseCache()
+    cache.parse(message)
+    cached, _ = timed(lambda: cache.parse(message), repeats=REPEATS * 10)
+    print(f"parse: {cold * 1000:.2f} ms cold, {cached * 1000:.3f} ms from cache")
+
+    labels = label_widget_count(blocks)
+    print(f"widgets per message: {labels} with labels, 1 with rich text")
+
+    try:
+        import customtkinter as ctk
+
+        root = ctk.CTk()
+    except tk.TclError:
+        print("no display available, render timing skipped")
+    else:
+        theme_manager = ThemeManager(is_dark_mode=False)
+        label_time, frame = timed(lambda: render_labels(root, theme_manager, blocks), 3)
+        rich_time, view = timed(lambda: render_rich_text(root, theme_manager, blocks), 3)
+        first_screen, view = timed(
+            lambda: render_rich_text(root, theme_manager, blocks, progressive=True), 3
+        )
+        print(f"render: {label_time * 1000:.0f} ms with labels, {rich_time * 1000:.0f} ms with rich text")
+        print(f"progressive rich text: first screen after {first_screen * 1000:.0f} ms")
+        root.destroy()
+
+    sys.exit(0 if cached < cold else 1)
@@ -0,0 +1,72 @@
+"""
+Exercise the async request scheduler against a local stub endpoint that
+injects latency: checks the global concurrency limit, that interactive
+requests overtake queued batch work, and the per-model rate limit.
+Exits with status 1 if any check fails.
+
+Run from the project root:  python -m Benchmarks.Scheduler_Latency
+"""
+import asyncio
+import os
+import sys
+import time
+
+from Benchmarks.Stub_Server import StubGeminiServer
+
+LATENCY = 0.2
+stub = StubGeminiServer(latency=LATENCY).start()
+os.environ["GEMINI_CACHE"] = "0"
+
+from BackEnd import GEMINI_BackEnd as backend  # noqa: E402
+from BackEnd.Request_Scheduler import PRIORITY_BATCH, RequestScheduler  # noqa: E402
+
+# Not the module session, whose key comes from .env / .env.local
+backend.geminiSession = backend.GeminiSession(
+    "benchmark-key", transport="rest", apiEndpoint=stub.endpoint
+)
+
+
+async def priorityCheck():
+    backend.requestScheduler = RequestScheduler(maxConcurrency=2)
+    finished = []
+    start = time.perf_counter()
+
+    async def send(name, priority):
+        await backend.generateGeminiResponseAsync(None, name, priority=priority)
+        finished.append((name, time.perf_counter() - start))
+
+    batch = [asyncio.create_task(send(f"batch-{i}", PRIORITY_BATCH)) for i in range(8)]
+    await asyncio.sleep(LATENCY / 2)  # Batch work is already queued
+    interactive = [asyncio.create_task(send(f"gui-{i}", 0)) for i in range(2)]
+    await asyncio.gather(*batch, *interactive)
+
+    order = [name for name, _ in finished]
+    guiDone = max(order.index("gui-0"), order.index("gui-1"))
+    print(f"completion order: {' '.join(order)}")
+    print(f"max requests at once on the server: {stub.maxInFlight} (limit 2)")
+    for name, elapsed in finished:
+        if name.startswith("gui"):
+            print(f"{name} finished after {elapsed * 1000:.0f} ms")
+    return stub.maxInFlight <= 2 and guiDone <= 3
+
+
+async def rateLimitCheck():
+    stub.latency = 0
+    backend.requestScheduler = RequestScheduler(
+        maxConcurrency=8, rateLimits={backend.geminiSession.modelName: 240}
+    )
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(backend.generateGeminiResponseAsync(None, f"rate-{i}") for i in range(12))
+    )
+    elapsed = time.perf_counter() - start
+    # Burst of 4 tokens, then 4 per second: 8 more requests need about 2 seconds
+    print(f"12 requests at 240 rpm took {elapsed:.2f} s (expected about 2 s)")
+    return elapsed >= 1.8
+
+
+if __name__ == "__main__":
+    ok = asyncio.run(priorityCheck())
+    ok = asyncio.run(rateLimitCheck()) and ok
+    stub.stop()
+    sys.exit(0 if ok else 1)
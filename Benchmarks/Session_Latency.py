@@ -0,0 +1,54 @@
+"""
+Compare per-request latency of configure-and-construct per call (old path)
+against the long-lived GeminiSession, using a local stub endpoint.
+
+Run from the project root:  python -m Benchmarks.Session_Latency
+"""
+import statistics
+import time
+
+import google.generativeai as genai
+
+from BackEnd.GEMINI_BackEnd import GeminiSession
+from Benchmarks.Stub_Server import StubGeminiServer
+
+stub = StubGeminiServer().start()
+
+API_KEY = "benchmark-key"
+ROUNDS = 50
+
+
+def oldPath():
+    genai.configure(
+        api_key=API_KEY,
+        transport="rest",
+        client_options={"api_endpoint": stub.endpoint},
+    )
+    model = genai.GenerativeModel("gemini-2.0-flash-lite")
+    return model.generate_content(["ping"]).text
+
+
+def measure(call):
+    call()  # Exclude one-time imports from the numbers
+    samples = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def report(name, call):
+    connections = stub.connections
+    median, worst = measure(call)
+    print(
+        f"{name:<10} median {median:7.2f} ms   worst {worst:7.2f} ms   "
+        f"new connections {stub.connections - connections}"
+    )
+
+
+if __name__ == "__main__":
+    session = GeminiSession(API_KEY, transport="rest", apiEndpoint=stub.endpoint)
+    report("before", oldPath)
+    report("after", lambda: session.getModel().generate_content(["ping"]).text)
+    stub.stop()
@@ -0,0 +1,144 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def candidate(text):
+    return {
+        "candidates": [
+            {
+                "content": {"role": "model", "parts": [{"text": text}]},
+                "finishReason": "STOP",
+            }
+        ]
+    }
+
+
+class StubGeminiServer:
+    """
+    Local stand-in for the Gemini REST endpoint.
+
+    Answers every generateContent call with a fixed text after an optional
+    injected latency, and counts requests, new TCP connections and the
+    highest number of requests handled at once. Status codes queued in
+    `failures` (optionally as (status, retryAfter)) are answered first.
+    """
+
+    def __init__(self, reply="ok", latency=0.0, port=0, streamChunks=3, streamDelay=0.0):
+        self.reply = reply
+        self.latency = latency
+        self.streamChunks = streamChunks
+        self.streamDelay = streamDelay
+        self.requests = 0
+        self.connections = 0
+        self.inFlight = 0
+        self.failures = []
+        self.streamsAborted = 0
+        self.maxInFlight = 0
+        self.apiKeys = set()  # x-goog-api-key values seen, on any method
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # Keep-alive, like the real endpoint
+            disable_nagle_algorithm = True
+
+            def setup(self):
+                super().setup()
+                server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def parse_request(self):
+                ok = super().parse_request()
+                if ok and "x-goog-api-key" in self.headers:
+                    server.apiKeys.add(self.headers["x-goog-api-key"])
+                return ok
+
+            def do_HEAD(self):
+                self.send_response(200)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def do_GET(self):
+                self.do_HEAD()
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                with server._lock:
+                    server.requests += 1
+                    server.inFlight += 1
+                    server.maxInFlight = max(server.maxInFlight, server.inFlight)
+                if server.latency:
+                    time.sleep(server.latency)
+                with server._lock:
+                    server.inFlight -= 1
+                    failure = server.failures.pop(0) if server.failures else None
+
+                if failure is not None:
+                    status, retryAfter = failure if isinstance(failure, tuple) else (failure, None)
+                    body = json.dumps({"error": {"code": status, "message": "injected failure"}}).encode("utf-8")
+                    self.send_response(status)
+                    self.send_header("Content-Type", "application/json")
+                    self.send_header("Content-Length", str(len(body)))
+                    if retryAfter is not None:
+                        self.send_header("Retry-After", str(retryAfter))
+                    self.end_headers()
+                    self.wfile.write(body)
+                    return
+
+                if ":streamGenerateContent" in self.path:
+                    self.sendStream()
+                    return
+
+                body = json.dumps(candidate(server.reply)).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def sendStream(self):
+                """Send the reply split into a chunked JSON array, one piece at a time"""
+                size = max(1, -(-len(server.reply) // server.streamChunks))
+                pieces = [server.reply[i : i + size] for i in range(0, len(server.reply), size)]
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                try:
+                    for index, piece in enumerate(pieces):
+                        prefix = "[" if index == 0 else ","
+                        self.writeChunk(prefix + json.dumps(candidate(piece)))
+                        if server.streamDelay:
+                            time.sleep(server.streamDelay)
+                    self.writeChunk("]")
+                    self.wfile.write(b"0\r\n\r\n")
+                except (BrokenPipeError, ConnectionResetError):
+                    server.streamsAborted += 1
+
+            def writeChunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,175 @@
+"""
+Measure the cost of one theme-transition tick over a large widget set,
+comparing per-widget color math (rebuilding the role map and parsing hex
+strings for every widget) with the precomputed TransitionTable, then play
+a whole transition through the frame-budgeted TransitionAnimator on a
+minimal event loop and report its FPS and worst frame. A burst of
+message fade-ins then plays on the same AnimationClock, to count the
+timer callbacks it takes compared to one after() chain per message.
+Widgets are stand-ins that only record their options, so only the color
+work is timed and no display is needed. Exits with status 1 if the
+table is not faster, a frame runs far over budget or the fades do not
+share the clock's ticks.
+
+Run from the project root:  python -m Benchmarks.Theme_Transition
+"""
+import heapq
+import itertools
+import sys
+import time
+
+from PIL import ImageColor
+
+from Style.UiConfig import ThemeManager
+from Ui.Animation_Clock import AnimationClock
+from Ui.Theme_Transition import (
+    WIDGET_STYLES,
+    TransitionAnimator,
+    TransitionTable,
+    fade_in_table,
+    theme_colors,
+)
+
+WIDGETS = 5000
+STEPS = 15
+FRAME_INTERVAL = 12
+FRAME_BUDGET = 8
+ROLES = ("textbox", "action_button", "message_label", "user_label", "code_label")
+FADES = 40
+FADE_STEPS = 10
+FADE_DURATION = 120
+
+
+class FakeWidget:
+    def __init__(self, role):
+        self.role = role
+        self.options = {}
+
+    def configure(self, **options):
+        self.options.update(options)
+
+    def winfo_exists(self):
+        return True
+
+
+def interpolate_color(old_color, new_color, factor):
+    old_rgb = ImageColor.getrgb(old_color)
+    new_rgb = ImageColor.getrgb(new_color)
+    blended = tuple(int(old_rgb[i] + (new_rgb[i] - old_rgb[i]) * factor) for i in range(3))
+    return f"#{blended[0]:02x}{blended[1]:02x}{blended[2]:02x}"
+
+
+def per_widget_tick(widgets, old_colors, theme_manager, factor):
+    """The color math every widget used to do on every tick"""
+    for widget in widgets:
+        # Role map rebuilt (and every color normalized) for each widget
+        role_map = theme_colors(theme_manager)
+        style = WIDGET_STYLES[widget.role]
+        widget.configure(
+            **{
+                option: interpolate_color(old_colors[role], role_map[role], factor)
+                for option, role in style.items()
+            }
+        )
+
+
+def table_tick(widgets, table, step):
+    for widget in widgets:
+        widget.configure(**table.style(step, widget.role))
+
+
+class EventLoop:
+    """Just enough of Tk's after()/after_idle() to drive the animator"""
+
+    def __init__(self):
+        self._queue = []
+        self._order = itertools.count()
+        self.callbacks = 0
+
+    def after(self, ms, callback):
+        job = next(self._order)
+        heapq.heappush(self._queue, (time.perf_counter() + ms / 1000, job, callback))
+        return job
+
+    def after_idle(self, callback):
+        return self.after(0, callback)
+
+    def run(self):
+        while self._queue:
+            due, _, callback = heapq.heappop(self._queue)
+            time.sleep(max(0.0, due - time.perf_counter()))
+            self.callbacks += 1
+            callback()
+
+
+def measure(tick):
+    start = time.perf_counter()
+    for step in range(STEPS + 1):
+        tick(step)
+    return (time.perf_counter() - start) / (STEPS + 1)
+
+
+if __name__ == "__main__":
+    theme_manager = ThemeManager(is_dark_mode=False)
+    old_colors = theme_colors(theme_manager)
+    theme_manager.toggle_theme()
+    widgets = [FakeWidget(ROLES[i % len(ROLES)]) for i in range(WIDGETS)]
+
+    before = measure(
+        lambda step: per_widget_tick(widgets, old_colors, theme_manager, step / STEPS)
+    )
+    expected = {id(widget): dict(widget.options) for widget in widgets}
+
+    start = time.perf_counter()
+    table = TransitionTable(old_colors, theme_colors(theme_manager), STEPS)
+    build = time.perf_counter() - start
+    after = measure(lambda step: table_tick(widgets, table, step))
+
+    # Both paths must land on the same final colors
+    same = all(expected[id(widget)] == widget.options for widget in widgets)
+    print(f"{WIDGETS} widgets, {STEPS + 1} ticks")
+    print(f"per-widget color math: {before * 1000:.2f} ms per tick")
+    print(f"table build: {build * 1000:.2f} ms once per switch")
+    print(f"table lookup: {after * 1000:.2f} ms per tick ({before / after:.1f}x faster)")
+    print(f"final colors match: {same}")
+
+    # Whole transition, half of the widgets animated and half snapped
+    loop = EventLoop()
+    clock = AnimationClock(loop, frame_interval=FRAME_INTERVAL, frame_budget=FRAME_BUDGET)
+    animator = TransitionAnimator(
+        clock,
+        table,
+        [(widget, widget.role) for widget in widgets[: WIDGETS // 2]],
+        [(widget, widget.role) for widget in widgets[WIDGETS // 2 :]],
+        duration=STEPS * FRAME_INTERVAL,
+    ).start()
+    loop.run()
+    stats = animator.stats
+    print(
+        f"animated transition: {stats['duration_ms']:.0f} ms, {stats['fps']:.0f} FPS, "
+        f"worst frame {stats['worst_frame_ms']:.1f} ms (budget {FRAME_BUDGET} ms), "
+        f"{stats['dropped_steps']} of {STEPS} steps dropped"
+    )
+    # One configure may straddle the deadline, so allow a little slack
+    within_budget = stats["worst_frame_ms"] < FRAME_BUDGET * 1.5
+
+    # A burst of messages fading in at once, each with two themed widgets
+    fade_table = fade_in_table(theme_colors(theme_manager), FADE_STEPS)
+    loop.callbacks = 0
+    for i in range(FADES):
+        bubble = FakeWidget("user_label")
+        TransitionAnimator(
+            clock,
+            fade_table,
+            [(bubble, "user_label"), (FakeWidget("font_Secondary"), "font_Secondary")],
+            duration=FADE_DURATION,
+            widget=bubble,
+        ).start()
+    loop.run()
+    chained = FADES * (FADE_STEPS + 1)
+    print(
+        f"{FADES} fade-ins: {loop.callbacks} clock callbacks, "
+        f"against {chained} with one after() chain per message"
+    )
+    shared = loop.callbacks < chained / 4 and clock.running == 0
+    sys.exit(0 if same and after < before and within_budget and shared else 1)
@@ -1,44 +1,216 @@
 import socket
 import threading
 import time
+from collections import deque
+from urllib.parse import urlsplit
+
+# (host, port) pairs probed in order until one answers
+DEFAULT_TARGETS = [("8.8.8.8", 53), ("1.1.1.1", 53)]
+
+
+class TcpProbe:
+    """
+    Probe that opens (and closes) a TCP connection to `host`:`port`.
+
+    A probe is any callable taking a timeout in seconds and returning the
+    round trip time in seconds, or None if the target did not answer. A
+    probe's `timeout` attribute, if not None, replaces the monitor's.
+    """
+    def __init__(self, host, port, timeout=None):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.name = f"tcp://{host}:{port}"
+
+    def __call__(self, timeout):
+        start = time.perf_counter()
+        try:
+            # The timeout only applies to this socket, which is always closed
+            with socket.create_connection((self.host, self.port), timeout=timeout):
+                return time.perf_counter() - start
+        except OSError:
+            return None
+
+
+class HttpsProbe:
+    """
+    Probe sending a HEAD request to an API host.
+
+    Any answer below 500 counts as reachable. Given the API client's pooled
+    session, the probe keeps a warm connection ready for the next real
+    request. That session carries the API key, so it is only used when `url`
+    points at `session_host`; any other host gets a plain session.
+    `url`, `session` and `session_host` may be callables, resolved on first
+    use. DNS, TCP and TLS may all happen within one probe, hence the longer
+    default timeout.
+    """
+    def __init__(self, url, session=None, timeout=5, session_host=None):
+        self._url = url
+        self._session = session
+        self._session_host = session_host
+        self.timeout = timeout
+        self._own_session = None
+        self.name = url if isinstance(url, str) else "https"
+
+    def _resolve(self):
+        url = self._url() if callable(self._url) else self._url
+        session = None
+        host = self._session_host() if callable(self._session_host) else self._session_host
+        if host and urlsplit(url).netloc == urlsplit(host).netloc:
+            session = self._session() if callable(self._session) else self._session
+        if session is None:
+            # No pooled session to share (e.g. gRPC client, or another host): keep our own
+            if self._own_session is None:
+                import requests
+                self._own_session = requests.Session()
+            session = self._own_session
+        self.name = url
+        return url, session
+
+    def __call__(self, timeout):
+        start = time.perf_counter()
+        try:
+            url, session = self._resolve()
+            response = session.head(url, timeout=timeout, allow_redirects=False)
+            response.close()
+        except Exception:
+            return None
+        if response.status_code >= 500:
+            return None
+        return time.perf_counter() - start
+
+
+def parse_targets(text):
+    """Parse "host:port,host:port" into a list of (host, port) pairs"""
+    targets = []
+    for item in text.split(","):
+        host, _, port = item.strip().rpartition(":")
+        if host and port.isdigit():
+            targets.append((host, int(port)))
+    return targets
+
 
 class ConnectionMonitor:
     """
     A class that monitors internet connectivity in the background.
+
+    Connected means one of the probes answers (see TcpProbe); the state is
+    None (unknown) until the first check is done. Checks run often right
+    after the state changes and back off while it stays the same. State
+    changes are pushed to subscribers; callbacks run on the monitor thread.
     """
-    def __init__(self, check_interval=1):
+    def __init__(
+        self,
+        probes=DEFAULT_TARGETS,
+        fast_interval=1,
+        slow_interval=15,
+        timeout=1,
+        history=100,
+    ):
         """
         Initialize the connection monitor.
-        
+
         Args:
-            check_interval: Time in seconds between connection checks
+            probes: Probes, or (host, port) pairs for TCP probes; one answering is enough
+            fast_interval: Time in seconds between checks after a state change
+            slow_interval: Longest time in seconds between checks while stable
+            timeout: Time in seconds to wait for each probe, unless it sets its own
+            history: Number of round trip times kept for the percentiles
         """
-        self.check_interval = check_interval
+        self.probes = [
+            TcpProbe(*probe) if isinstance(probe, tuple) else probe for probe in probes
+        ]
+        self.fast_interval = fast_interval
+        self.slow_interval = slow_interval
+        self.timeout = timeout
+        self.interval = fast_interval
         self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
         self._monitor_thread = None
-        self.is_connected = False
-    
-    def _check_connection(self, host="8.8.8.8", port=53, timeout=1):
-        """
-        Attempts to connect to a DNS server (default: Google DNS).
-        Returns True if successful, False otherwise.
-        """
-        try:
-            socket.setdefaulttimeout(timeout)
-            socket.socket(socket.AF_INET, socket.SOCK_STREAM).connect((host, port))
-            return True
-        except socket.error:
-            return False
-    
+        self._subscribers = []
+        self._rtts = deque(maxlen=history)
+        self._last_good = 0  # Index of the probe that answered last
+        self.is_connected = None  # Unknown until the first check
+        self.checks = 0
+        self.failures = 0
+
+    def subscribe(self, callback):
+        """Call `callback(is_connected)` whenever the connection state changes"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def _check_connection(self):
+        """Run the probes, the last one that answered first; True if any answers"""
+        order = [self._last_good] + [
+            i for i in range(len(self.probes)) if i != self._last_good
+        ]
+        for index in order:
+            if index >= len(self.probes):
+                continue
+            probe = self.probes[index]
+            rtt = probe(getattr(probe, "timeout", None) or self.timeout)
+            if rtt is not None:
+                self._last_good = index
+                self._rtts.append(rtt)
+                return True
+        return False
+
     def _monitor_connection(self):
-        """Background thread that continuously checks connection"""
+        """Background thread that checks the connection at an adaptive interval"""
         while not self._stop_event.is_set():
-            # Update connection status
-            self.is_connected = self._check_connection()
-            
-            # Wait before checking again
-            self._stop_event.wait(self.check_interval)
-    
+            connected = self._check_connection()
+            self.checks += 1
+            if not connected:
+                self.failures += 1
+
+            if connected != self.is_connected:
+                self.is_connected = connected
+                # Watch closely after a change, in case it flips back
+                self.interval = self.fast_interval
+                self._notify(connected)
+            else:
+                self.interval = min(self.interval * 2, self.slow_interval)
+
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+
+    def _notify(self, connected):
+        for callback in list(self._subscribers):
+            if self._stop_event.is_set():
+                return
+            try:
+                callback(connected)
+            except Exception as e:
+                print(f"Error in connection callback: {e}")
+
+    def check_now(self):
+        """Run the next check right away, e.g. after a request failed"""
+        self._wake_event.set()
+
+    def rtt_percentiles(self, percentiles=(50, 90, 99)):
+        """Round trip times in milliseconds at the given percentiles (nearest rank)"""
+        samples = sorted(self._rtts)
+        if not samples:
+            return {}
+        return {
+            p: samples[min(len(samples) - 1, max(0, round(p / 100 * len(samples)) - 1))]
+            * 1000
+            for p in percentiles
+        }
+
+    def stats(self):
+        return {
+            "connected": self.is_connected,
+            "probe": self.probes[self._last_good].name if self.probes else None,
+            "interval": self.interval,
+            "checks": self.checks,
+            "failures": self.failures,
+            "rtt_ms": self.rtt_percentiles(),
+        }
+
     def start(self):
         """Start monitoring the internet connection"""
         if self._monitor_thread is None or not self._monitor_thread.is_alive():
@@ -47,12 +219,13 @@ class ConnectionMonitor:
             self._monitor_thread.start()
             return True
         return False
-    
+
     def stop(self):
         """Stop monitoring the internet connection"""
         if self._monitor_thread and self._monitor_thread.is_alive():
             self._stop_event.set()
+            self._wake_event.set()
             self._monitor_thread.join(timeout=1.0)
             self._monitor_thread = None
             return True
-        return False
\ No newline at end of file
+        return False
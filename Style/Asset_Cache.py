@@ -0,0 +1,110 @@
+import os
+from customtkinter import CTkImage
+from PIL import Image
+
+ASSET_DIRS = ("Assets/Icons", "Assets/Logo")
+
+
+class AssetCache:
+    """
+    Icons and logos from the asset folders, decoded at most once and
+    shared as CTkImages.
+
+    Each (name, size) pair maps to a single CTkImage built from a bitmap
+    already scaled for the window's DPI `scaling`, so CTk does not resize
+    it again. Scaled bitmaps can be persisted to `cache_dir`, letting
+    later starts skip decoding the large source files.
+    """
+
+    def __init__(self, dirs=ASSET_DIRS, cache_dir=None, scaling=1.0):
+        """
+        Initialize the cache.
+
+        Args:
+            dirs: Folders whose PNG files are available by file name
+            cache_dir: Directory for scaled bitmaps, or None to keep them in memory only
+            scaling: DPI scaling factor the bitmaps are prepared for
+        """
+        self.cache_dir = cache_dir
+        self.scaling = scaling
+        self._paths = {}  # name -> source file
+        self._sources = {}  # name -> decoded source image
+        self._bitmaps = {}  # (name, pixel size) -> scaled image
+        self._images = {}  # (name, size) -> shared CTkImage
+
+        for folder in dirs:
+            if os.path.isdir(folder):
+                for entry in os.scandir(folder):
+                    name, extension = os.path.splitext(entry.name)
+                    if extension.lower() == ".png":
+                        self._paths[name] = entry.path
+
+    def path(self, name):
+        return self._paths.get(name)
+
+    def source(self, name):
+        """Full size source image, decoded on first use"""
+        if name not in self._sources:
+            img = Image.open(self._paths[name])
+            img.load()
+            self._sources[name] = img
+        return self._sources[name]
+
+    def _disk_path(self, name, pixel_size):
+        if not self.cache_dir:
+            return None
+        mtime = os.stat(self._paths[name]).st_mtime_ns
+        return os.path.join(
+            self.cache_dir, f"{name}-{pixel_size[0]}x{pixel_size[1]}-{mtime}.png"
+        )
+
+    def bitmap(self, name, pixel_size):
+        """`name` resized to `pixel_size`, from memory, disk or the source"""
+        key = (name, pixel_size)
+        if key in self._bitmaps:
+            return self._bitmaps[key]
+
+        disk_path = self._disk_path(name, pixel_size)
+        img = None
+        if disk_path and os.path.exists(disk_path):
+            try:
+                img = Image.open(disk_path)
+                img.load()
+            except OSError:
+                img = None  # Unreadable entry: rebuild it
+
+        if img is None:
+            img = self.source(name)
+            if img.size != pixel_size:
+                img = img.resize(pixel_size, Image.Resampling.LANCZOS)
+            if disk_path:
+                try:
+                    os.makedirs(self.cache_dir, exist_ok=True)
+                    img.save(disk_path, format="PNG")
+                except OSError as e:
+                    print(f"Error writing asset cache: {e}")
+
+        self._bitmaps[key] = img
+        return img
+
+    def image(self, name, size):
+        """Shared CTkImage of `name` at `size`, or None if there is no such asset"""
+        size = tuple(size)
+        key = (name, size)
+        if key not in self._images:
+            if name not in self._paths:
+                return None
+            # Same rounding as CTkImage, so it uses the bitmap as is
+            pixel_size = (round(size[0] * self.scaling), round(size[1] * self.scaling))
+            self._images[key] = CTkImage(
+                light_image=self.bitmap(name, pixel_size), size=size
+            )
+        return self._images[key]
+
+    def preload(self, requests):
+        """Prepare the (name, size) images needed at startup"""
+        for name, size in requests:
+            self.image(name, size)
+
+
+assets = AssetCache(cache_dir=os.getenv("LAMSA_ASSET_CACHE_DIR", ".cache/assets"))
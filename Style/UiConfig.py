@@ -1,6 +1,7 @@
-from customtkinter import CTkImage
-from PIL import Image
 import os
+from Style.Asset_Cache import assets
+
+ICON_SIZE = (16, 16)
 
 
 class ThemeManager:
@@ -39,10 +40,8 @@ class ThemeManager:
 
     @staticmethod
     def Icons(name):
-        path = f"Assets/Icons/{name}.png"
-        if os.path.exists(path):
-            return {"icon": CTkImage(Image.open(path), size=(16, 16))}
-        # raise FileNotFoundError(f"Icon not found: {path}")
+        # Shared instance from the asset cache; None if the icon is missing
+        return {"icon": assets.image(name, ICON_SIZE)}
 
     def update_theme_colors(self):
         self.define_colors()
@@ -216,6 +215,20 @@ class ContentStyles:
             "corner_radius": 9,
         }
 
+    @staticmethod
+    def get_Rich_Text_style(theme_manager):
+        return {
+            "width": 300,
+            "font": ("Jura", 16),
+            "heading_sizes": (22, 19, 17),
+            "code_font": ("Courier New", 14),
+            "list_indent": 18,
+            "fg_color": theme_manager.primaryColor,
+            "text_color": theme_manager.font_Secondary,
+            "code_bg": theme_manager.code_bg,
+            "code_color": theme_manager.code_font,
+        }
+
     @staticmethod
     def get_Main_Title(theme_manager, text):
         return {
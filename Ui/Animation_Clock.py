@@ -0,0 +1,106 @@
+import time
+import tkinter as tk
+
+
+class AnimationClock:
+    """
+    One timer driving every running animation at a fixed frame rate.
+
+    Each tick advances all animations in a single callback, within a
+    shared per-frame budget, and the timer stops as soon as nothing is
+    running. An animation is any object with:
+
+        step(now, deadline) -> True while it is still running
+        busy                -> True if its current frame is not fully painted
+        widget              -> widget it belongs to, or None
+
+    Busy animations are continued in idle callbacks before the next tick,
+    letting input events through in between. Animations are dropped when
+    their widget is destroyed or through `cancel(widget)`.
+    """
+
+    def __init__(self, root, frame_interval=12, frame_budget=8):
+        """
+        Initialize the clock.
+
+        Args:
+            root: Tk widget used to schedule callbacks
+            frame_interval: Time in milliseconds between ticks
+            frame_budget: Time in milliseconds one callback may spend animating
+        """
+        self.root = root
+        self.frame_interval = frame_interval
+        self.frame_budget = frame_budget / 1000
+        self._animations = []
+        self._job = None
+        self.ticks = 0
+
+    def add(self, animation):
+        """Start driving `animation` from the next tick"""
+        self._animations.append(animation)
+        if self._job is None:
+            self._job = self.root.after_idle(self._tick)
+        return animation
+
+    def remove(self, animation):
+        if animation in self._animations:
+            self._animations.remove(animation)
+        self._stop_if_idle()
+
+    def cancel(self, widget=None):
+        """Drop the animations of `widget` (default: all of them)"""
+        self._animations = [
+            animation
+            for animation in self._animations
+            if widget is not None and animation.widget is not widget
+        ]
+        self._stop_if_idle()
+
+    def _stop_if_idle(self):
+        if not self._animations and self._job is not None:
+            self.root.after_cancel(self._job)
+            self._job = None
+
+    @property
+    def running(self):
+        return len(self._animations)
+
+    def _tick(self):
+        self._job = None
+        now = time.perf_counter()
+        deadline = now + self.frame_budget
+        self.ticks += 1
+
+        # Finish frames left half painted before starting new ones
+        continuing = any(animation.busy for animation in self._animations)
+        for animation in list(self._animations):
+            if continuing and not animation.busy:
+                continue
+            if time.perf_counter() >= deadline:
+                break
+            if not self._alive(animation):
+                self._animations.remove(animation)
+                continue
+            try:
+                running = animation.step(now, deadline)
+            except tk.TclError:
+                running = False  # Widget destroyed mid-animation
+            if not running:
+                self._animations.remove(animation)
+
+        if not self._animations:
+            return  # Idle: no timer until the next animation starts
+        if any(animation.busy for animation in self._animations):
+            self._job = self.root.after_idle(self._tick)
+        else:
+            self._job = self.root.after(self.frame_interval, self._tick)
+
+    @staticmethod
+    def _alive(animation):
+        widget = animation.widget
+        if widget is None:
+            return True
+        try:
+            return bool(widget.winfo_exists())
+        except tk.TclError:
+            return False
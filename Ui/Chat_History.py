@@ -0,0 +1,290 @@
+import bisect
+import math
+import customtkinter as ctk
+from Ui.Message_Views import VIEW_CLASSES
+
+
+class ChatMessage:
+    """Chat message model, kept separately from the widgets that display it"""
+
+    def __init__(self, source, text="", image_path=None, streaming=False, on_stop=None):
+        self.source = source  # "user", "ai" or "system"
+        self.text = text
+        self.image_path = image_path
+        self.image_size = None  # Displayed image size, once known
+        self.streaming = streaming
+        self.on_stop = on_stop  # Stop action while a response is pending
+        self.height = None  # Measured height in pixels, None until materialized
+        self.view = None
+
+
+class VirtualChatList:
+    """
+    Virtualized message list inside a CTkScrollableFrame.
+
+    Only messages in (or near) the viewport have widgets; they are taken
+    from a pool of recycled views. Everything above and below is replaced
+    by two spacer frames sized from measured or estimated heights, so the
+    cost of scrolling, resizing and theme switches follows what is visible
+    rather than the length of the conversation.
+    """
+
+    def __init__(self, app, scroll_frame, overscan=400, pool_size=12):
+        """
+        Initialize the list.
+
+        Args:
+            app: LamsaApp providing theme and rendering helpers
+            scroll_frame: CTkScrollableFrame that hosts the messages
+            overscan: Extra pixels above and below the viewport kept materialized
+            pool_size: Idle views kept per message kind
+        """
+        self.app = app
+        self.scroll_frame = scroll_frame
+        self.canvas = scroll_frame._parent_canvas
+        self.overscan = overscan
+        self.pool_size = pool_size
+
+        self.messages = []
+        self.visible = {}  # message -> view
+        self._pool = {kind: [] for kind in VIEW_CLASSES}
+        self._offsets = None  # Cached prefix sums of message heights
+
+        self.top_spacer = self._make_spacer()
+        self.bottom_spacer = self._make_spacer()
+        self.top_spacer.pack(side="top", fill="x")
+        self.bottom_spacer.pack(side="top", fill="x")
+
+        # Re-evaluate the visible window whenever the canvas scrolls
+        scrollbar = scroll_frame._scrollbar
+
+        def on_scroll(first, last):
+            scrollbar.set(first, last)
+            self.schedule_update()
+
+        self.canvas.configure(yscrollcommand=on_scroll)
+
+    def _make_spacer(self):
+        return ctk.CTkFrame(
+            self.scroll_frame, fg_color="transparent", height=1, corner_radius=0
+        )
+
+    @property
+    def scaling(self):
+        return self.app._get_widget_scaling()
+
+    # --- Message model -------------------------------------------------
+
+    def append(self, message):
+        """Add a message at the end and materialize it if it is in view"""
+        self.messages.append(message)
+        self._offsets = None
+        self.update_window()
+        return message
+
+    def remove(self, message):
+        if message not in self.messages:
+            return
+        if message in self.visible:
+            self._release(message)
+        self.messages.remove(message)
+        self._offsets = None
+        self.schedule_update()
+
+    def refresh(self, message):
+        """Rebind a message's view after its content or state changed"""
+        view = self.visible.get(message)
+        if view is not None:
+            view.bind(message)
+        self.invalidate(message)
+
+    def invalidate(self, message):
+        """Re-measure a message whose height changed"""
+        message.height = None
+        self._offsets = None
+        self.schedule_update()
+
+    def feed(self, message, chunk):
+        """Append streamed text to a message and its view, if materialized"""
+        message.text += chunk
+        if message.view is not None:
+            message.view.feed(chunk)
+        message.height = None
+        self._offsets = None
+
+    def finish_stream(self, message, text):
+        """Mark a streamed message as complete with its final `text`"""
+        message.streaming = False
+        message.on_stop = None
+        message.text = text
+        if message.view is not None:
+            message.view.finish()
+        message.height = None
+        self._offsets = None
+        self.schedule_update()
+
+    def clear(self):
+        for message in list(self.visible):
+            self._release(message)
+        self.messages = []
+        self._offsets = None
+        self.schedule_update()
+
+    # --- Heights ---------------------------------------------------------
+
+    def estimate_height(self, message):
+        """Estimate a message's height in pixels before it has been laid out"""
+        if message.height is not None:
+            return message.height
+
+        chars_per_line = 33  # About 300px of Jura 16
+        lines = sum(
+            max(1, math.ceil(len(line) / chars_per_line))
+            for line in (message.text or " ").splitlines() or [""]
+        )
+        height = 25 + lines * 22  # Outer padding + text lines
+        if message.source == "user":
+            height += 20
+            if message.image_path:
+                height += 20 + (message.image_size[1] if message.image_size else 260)
+        elif message.source == "ai":
+            height += 30  # Copy icon row
+        return int(height * self.scaling)
+
+    def _offsets_table(self):
+        if self._offsets is None:
+            offsets = [0]
+            for message in self.messages:
+                offsets.append(offsets[-1] + self.estimate_height(message))
+            self._offsets = offsets
+        return self._offsets
+
+    def _measure(self):
+        """Record the real height of materialized messages"""
+        changed = False
+        pady = int(25 * self.scaling)
+        for message, view in self.visible.items():
+            height = view.frame.winfo_reqheight() + pady
+            if height > 1 + pady and height != message.height:
+                message.height = height
+                changed = True
+        if changed:
+            self._offsets = None
+        return changed
+
+    def total_height(self):
+        return self._offsets_table()[-1]
+
+    # --- Windowing -----------------------------------------------------
+
+    def schedule_update(self):
+        """Coalesce window updates into the app's next layout pass"""
+        self.app.layout.request(self.update_window)
+
+    def visible_range(self, overscan=None):
+        """Indices [first, last) of the messages in the viewport, plus `overscan` pixels"""
+        overscan = self.overscan if overscan is None else overscan
+        offsets = self._offsets_table()
+        if not self.messages:
+            return 0, 0
+
+        total = offsets[-1]
+        content_height = self.scroll_frame.winfo_height()
+        if content_height <= 1:
+            content_height = total  # Not laid out yet
+
+        top_fraction, bottom_fraction = self.canvas.yview()
+        if bottom_fraction >= 0.999:
+            # At the bottom (or everything fits): follow the end of the list
+            bottom = total
+            top = total - max(self.canvas.winfo_height(), 1)
+        else:
+            top = top_fraction * content_height
+            bottom = bottom_fraction * content_height
+
+        first = max(0, bisect.bisect_right(offsets, top - overscan) - 1)
+        last = min(len(self.messages), bisect.bisect_left(offsets, bottom + overscan) + 1)
+        return first, max(first + 1, last)
+
+    def update_window(self):
+        """Materialize the messages in view and recycle the rest"""
+        self._measure()
+
+        first, last = self.visible_range()
+        wanted = self.messages[first:last]
+        wanted_set = set(wanted)
+
+        for message in list(self.visible):
+            if message not in wanted_set:
+                self._release(message)
+
+        created = False
+        for message in wanted:
+            if message not in self.visible:
+                self.visible[message] = self._acquire(message)
+                created = True
+
+        offsets = self._offsets_table()
+        self._set_spacer(self.top_spacer, offsets[first])
+        self._set_spacer(self.bottom_spacer, offsets[-1] - offsets[last])
+
+        if created:
+            # Re-pack in message order between the two spacers
+            for message in wanted:
+                view = self.visible[message]
+                view.frame.pack(**view.pack_options, before=self.bottom_spacer)
+            # Measure once Tk has laid the new widgets out
+            self.app.layout.request(self._measure)
+
+        self._update_on_screen()
+
+    def _update_on_screen(self):
+        """Let views pause background work (e.g. progressive rendering) off screen"""
+        first, last = self.visible_range(overscan=0)
+        on_screen = set(self.messages[first:last])
+        for message, view in self.visible.items():
+            view.set_on_screen(message in on_screen)
+
+    def scroll_to(self, message):
+        """Scroll so that the top of `message` is at the top of the viewport"""
+        if message not in self.messages:
+            return
+        offsets = self._offsets_table()
+        if offsets[-1] > 0:
+            self.canvas.yview_moveto(offsets[self.messages.index(message)] / offsets[-1])
+
+    def theme_owners_in_viewport(self):
+        """ThemeRegistry owners of the views currently on screen"""
+        first, last = self.visible_range(overscan=0)
+        owners = []
+        for message in self.messages[first:last]:
+            view = self.visible.get(message)
+            if view is not None:
+                owners.extend(view.theme_owners)
+        return owners
+
+    def _set_spacer(self, spacer, height):
+        # Spacer heights are given in unscaled units, like every CTk size
+        spacer.configure(height=max(1, int(height / self.scaling)))
+
+    def _acquire(self, message):
+        pool = self._pool[message.source]
+        view = pool.pop() if pool else VIEW_CLASSES[message.source](self.app, self.scroll_frame)
+        view.bind(message)
+        return view
+
+    def _release(self, message):
+        view = self.visible.pop(message)
+        # A fade still running would paint over the view's next message
+        self.app.animations.cancel(view.frame)
+        view.unbind()
+        view.frame.pack_forget()
+        pool = self._pool[view.kind]
+        if len(pool) < self.pool_size:
+            pool.append(view)
+        else:
+            view.destroy()
+
+    def widget_count(self):
+        """Number of live message views (visible + pooled), for diagnostics"""
+        return len(self.visible) + sum(len(pool) for pool in self._pool.values())
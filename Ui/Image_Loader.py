@@ -0,0 +1,256 @@
+import hashlib
+import os
+from collections import OrderedDict
+import customtkinter as ctk
+from PIL import Image, ImageDraw
+
+BUBBLE_WIDTH = 348
+BUBBLE_RADIUS = 9
+PREVIEW_SIZE = (30, 30)
+PLACEHOLDER_SIZES = {"bubble": (BUBBLE_WIDTH, 196), "preview": PREVIEW_SIZE}
+
+
+def decode_scaled(img, size):
+    """Decode an opened image at no less than `size`, as cheaply as possible"""
+    # JPEG: let the decoder scale down by 1/2, 1/4 or 1/8 while decoding
+    img.draft("RGB", size)
+    if img.mode not in ("RGB", "RGBA", "L", "LA"):
+        img = img.convert("RGBA")  # e.g. palette images, which reduce() rejects
+    # Cheap integer downscale before the final high quality resize
+    factor = min(img.width // max(1, size[0]), img.height // max(1, size[1]))
+    if factor >= 2:
+        img = img.reduce(factor)
+    return img
+
+
+def rounded(img, radius):
+    """RGBA copy of `img` with rounded corners"""
+    img = img.convert("RGBA")
+    mask = Image.new("L", img.size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0) + img.size, radius=radius, fill=255)
+    img.putalpha(mask)
+    return img
+
+
+def make_bubble_image(path, width=BUBBLE_WIDTH, radius=BUBBLE_RADIUS):
+    """Chat bubble image: `width` wide, aspect ratio kept, rounded corners"""
+    with Image.open(path) as img:
+        height = max(1, int(img.height * width / img.width))
+        img = decode_scaled(img, (width, height))
+        img = img.resize((width, height), Image.Resampling.LANCZOS)
+    return rounded(img, radius)
+
+
+def make_preview_image(path, size=PREVIEW_SIZE):
+    """Small attachment thumbnail fitting in `size`"""
+    with Image.open(path) as img:
+        img = decode_scaled(img, size)
+        img.thumbnail(size, Image.Resampling.LANCZOS)
+        img.load()
+    return img
+
+
+PROCESSORS = {"bubble": make_bubble_image, "preview": make_preview_image}
+
+
+class ChatImageLoader:
+    """
+    Decodes chat bubble images and attachment previews on a worker pool
+    and keeps their bitmaps resident within a memory cap.
+
+    Images are handed back on the Tk thread as CTkImages. Each displayed
+    image is pinned by its owner (the view showing it); unpinned images
+    stay cached until the resident size exceeds `max_bytes`, then the
+    least recently used are dropped. Processed images are also written
+    to a small on-disk cache, so an evicted image that scrolls back into
+    view is re-read at display size instead of decoding the original.
+    """
+
+    def __init__(
+        self,
+        dispatcher,
+        max_bytes=32 * 1024 * 1024,
+        cache_dir=".cache/images",
+        max_disk_bytes=64 * 1024 * 1024,
+    ):
+        """
+        Initialize the loader.
+
+        Args:
+            dispatcher: RequestDispatcher that runs the decoding
+            max_bytes: Resident size above which unpinned images are evicted
+            cache_dir: Directory of downscaled images, or None to disable it
+            max_disk_bytes: Size limit of the on-disk cache
+        """
+        self.dispatcher = dispatcher
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.max_disk_bytes = max_disk_bytes
+        self._cache = OrderedDict()  # (path, mtime, kind) -> (CTkImage, size)
+        self._owners = {}  # owner -> key of the image it shows
+        self._pending = {}  # key -> callbacks waiting for the same image
+        self._placeholders = {}
+        self.resident_bytes = 0
+        self.evictions = 0
+        self.disk_hits = 0
+        self.decodes = 0
+
+    @staticmethod
+    def cache_key(path, kind):
+        path = os.path.realpath(path)
+        return path, os.stat(path).st_mtime_ns, kind
+
+    @staticmethod
+    def image_bytes(size):
+        # RGBA bitmap held by Pillow plus the Tk photo image made from it
+        return size[0] * size[1] * 4 * 2
+
+    def load(self, path, kind, on_ready, owner=None):
+        """
+        Return the cached (CTkImage, size) for `path`, or None and decode it
+        in the background, calling `on_ready(image, size)` when done.
+        The image stays pinned for `owner` until `release(owner)`.
+        """
+        try:
+            key = self.cache_key(path, kind)
+        except OSError as e:
+            print(f"Error loading image: {e}")
+            return None
+
+        if owner is not None:
+            self._owners[owner] = key
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached
+
+        waiting = self._pending.get(key)
+        if waiting is not None:
+            # Already being decoded: just wait for the same result
+            waiting.append(on_ready)
+            return None
+
+        self._pending[key] = [on_ready]
+        self.dispatcher.submit(
+            self._decode,
+            key,
+            on_done=lambda result, elapsed: self._finish(key, *result),
+            on_error=lambda error, elapsed: self._fail(key, error),
+        )
+        return None
+
+    def release(self, owner):
+        """Unpin the image shown by `owner`, making it evictable"""
+        if self._owners.pop(owner, None) is not None:
+            self._evict()
+
+    def _disk_path(self, key):
+        if not self.cache_dir:
+            return None
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.png")
+
+    def _decode(self, key):
+        """Worker side: (image, read from disk cache)"""
+        path, _, kind = key
+        disk_path = self._disk_path(key)
+        if disk_path and os.path.exists(disk_path):
+            try:
+                img = Image.open(disk_path)
+                img.load()
+                return img, True
+            except OSError:
+                pass  # Unreadable entry: decode the original again
+
+        img = PROCESSORS[kind](path)
+        if disk_path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                img.save(disk_path, format="PNG")
+                self._trim_disk()
+            except OSError as e:
+                print(f"Error writing image cache: {e}")
+        return img, False
+
+    def _trim_disk(self):
+        """Drop the oldest downscaled images until under the size limit"""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".png"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                pass  # Removed by another worker
+            total -= size
+
+    def _finish(self, key, img, from_disk):
+        if from_disk:
+            self.disk_hits += 1
+        else:
+            self.decodes += 1
+
+        # CTkImage is created here, on the Tk thread
+        entry = (ctk.CTkImage(light_image=img, dark_image=img, size=img.size), img.size)
+        self._cache[key] = entry
+        self.resident_bytes += self.image_bytes(img.size)
+
+        for on_ready in self._pending.pop(key, []):
+            on_ready(*entry)
+        self._evict()
+
+    def _fail(self, key, error):
+        self._pending.pop(key, None)
+        print(f"Error loading image: {error}")
+
+    def _evict(self):
+        """Drop least recently used unpinned images while over the memory cap"""
+        if self.resident_bytes <= self.max_bytes:
+            return
+        pinned = set(self._owners.values())
+        for key in list(self._cache):
+            if self.resident_bytes <= self.max_bytes:
+                break
+            if key in pinned:
+                continue
+            _, size = self._cache.pop(key)
+            self.resident_bytes -= self.image_bytes(size)
+            self.evictions += 1
+
+    def stats(self):
+        return {
+            "resident_bytes": self.resident_bytes,
+            "resident_images": len(self._cache),
+            "pinned_images": len(set(self._owners.values())),
+            "evictions": self.evictions,
+            "disk_hits": self.disk_hits,
+            "decodes": self.decodes,
+        }
+
+    def placeholder(self, kind, color, size=None):
+        """
+        Plain rounded box shown while an image of `kind` is decoded, at the
+        image's known `size` so nothing moves when it arrives.
+        """
+        if size is not None:
+            # One-off, not cached: sizes vary with every image
+            return self._make_placeholder(color, tuple(size))
+
+        key = (kind, color)
+        if key not in self._placeholders:
+            self._placeholders[key] = self._make_placeholder(
+                color, PLACEHOLDER_SIZES[kind]
+            )
+        return self._placeholders[key]
+
+    @staticmethod
+    def _make_placeholder(color, size):
+        img = rounded(Image.new("RGB", size, color), BUBBLE_RADIUS)
+        return ctk.CTkImage(light_image=img, dark_image=img, size=size)
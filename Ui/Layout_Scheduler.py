@@ -0,0 +1,112 @@
+import time
+
+
+class LayoutScheduler:
+    """
+    Merges relayout and scroll requests into one idle-time pass per frame.
+
+    Callbacks given to `request` run once per pass however often they were
+    requested, followed by at most one scroll. Scrolling to the bottom only
+    happens if the view was at the bottom when it was requested (unless
+    forced) and the user has not scrolled since (`cancel_scroll`), so a
+    user reading older messages is not pulled down.
+    """
+
+    def __init__(self, root, canvas, frame_interval=16, settle_rounds=2):
+        """
+        Initialize the scheduler.
+
+        Args:
+            root: Tk widget used to schedule callbacks
+            canvas: Canvas of the scrollable frame to keep scrolled
+            frame_interval: Minimum time in milliseconds between two passes
+            settle_rounds: Idle rounds re-checking the bottom while the layout grows
+        """
+        self.root = root
+        self.canvas = canvas
+        self.frame_interval = frame_interval
+        self.settle_rounds = settle_rounds
+        self._callbacks = {}  # Ordered, one entry per callback
+        self._scroll = None  # Scroll action of the next pass
+        self._job = None
+        self._settle_job = None
+        self._last_pass = 0.0
+        self.requests = 0
+        self.passes = 0
+
+    def at_bottom(self):
+        try:
+            return self.canvas.yview()[1] >= 0.999
+        except Exception:
+            return False
+
+    def request(self, callback):
+        """Run `callback` in the next pass"""
+        self.requests += 1
+        self._callbacks[callback] = None
+        self._schedule()
+
+    def scroll_to_bottom(self, force=False):
+        """Scroll to the end in the next pass, if the view is at the bottom now"""
+        self.requests += 1
+        if force or self.at_bottom():
+            self._scroll = self._scroll or self._to_bottom
+            self._schedule()
+
+    def scroll_with(self, scroll):
+        """Run `scroll()` as the next pass's scroll, instead of going to the bottom"""
+        self.requests += 1
+        self._scroll = scroll
+        self._schedule()
+
+    def cancel_scroll(self):
+        """The user scrolled: drop a pending scroll to the bottom"""
+        if self._scroll == self._to_bottom:
+            self._scroll = None
+        if self._settle_job is not None:
+            self.root.after_cancel(self._settle_job)
+            self._settle_job = None
+
+    def _schedule(self):
+        if self._job is not None:
+            return
+        wait = self.frame_interval - (time.perf_counter() - self._last_pass) * 1000
+        if wait > 0:
+            # A pass just ran: wait for the next frame
+            self._job = self.root.after(int(wait) + 1, self._run)
+        else:
+            self._job = self.root.after_idle(self._run)
+
+    def _run(self):
+        self._job = None
+        self._last_pass = time.perf_counter()
+        self.passes += 1
+
+        callbacks = list(self._callbacks)
+        self._callbacks.clear()
+        scroll, self._scroll = self._scroll, None
+        # Requests made from here on go to the next pass
+        for callback in callbacks:
+            callback()
+        if scroll is not None:
+            scroll()
+
+    def _to_bottom(self, rounds=None):
+        self.canvas.yview_moveto(1.0)
+        # The scroll region may still grow while nested layouts settle
+        rounds = self.settle_rounds if rounds is None else rounds
+        if self._settle_job is not None:
+            self.root.after_cancel(self._settle_job)
+            self._settle_job = None
+        if rounds > 0:
+            self._settle_job = self.root.after_idle(self._settle, rounds - 1)
+
+    def _settle(self, rounds):
+        self._settle_job = None
+        if not self.at_bottom():
+            self._to_bottom(rounds)
+        elif rounds > 0:
+            self._settle_job = self.root.after_idle(self._settle, rounds - 1)
+
+    def stats(self):
+        return {"requests": self.requests, "passes": self.passes}
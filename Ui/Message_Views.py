@@ -0,0 +1,257 @@
+import tkinter as tk
+import customtkinter as ctk
+from Style.UiConfig import ContentStyles
+from Ui.Rich_Text import RichTextView, parse_cache
+from Ui.Stream_Renderer import StreamRenderer
+
+
+class MessageView:
+    """
+    Reusable widget tree for one chat message.
+
+    Views are created once, then bound to different messages as they
+    scroll in and out of the viewport. Their themed widgets are kept in the
+    app's ThemeRegistry under the frames listed by `theme_owners`.
+    """
+
+    kind = None
+    pack_options = {"fill": tk.X, "padx": 0, "pady": (10, 15), "anchor": tk.W}
+
+    def __init__(self, app, parent):
+        self.app = app
+        self.registry = app.theme_registry
+        self.message = None
+        self.frame = ctk.CTkFrame(parent, width=348, fg_color="transparent")
+
+    @property
+    def theme_owners(self):
+        """Registry owners holding this view's themed widgets"""
+        return [self.frame]
+
+    def bind(self, message):
+        self.message = message
+        message.view = self
+
+    def unbind(self):
+        if self.message is not None:
+            self.message.view = None
+        self.message = None
+
+    @property
+    def rendering(self):
+        """True while the view is still rendering its message"""
+        return False
+
+    def set_on_screen(self, on_screen):
+        """Called by the chat list as the view enters or leaves the viewport"""
+
+    def destroy(self):
+        self.unbind()
+        for owner in self.theme_owners:
+            self.registry.unregister(owner)
+        self.frame.destroy()
+
+    def clear(self, frame):
+        """Destroy the children of `frame` and forget their themed widgets"""
+        self.registry.unregister(frame)
+        for child in frame.winfo_children():
+            child.destroy()
+
+
+class UserMessageView(MessageView):
+    kind = "user"
+    pack_options = {"fill": tk.X, "padx": 0, "pady": (10, 15), "anchor": tk.E}
+
+    def __init__(self, app, parent):
+        super().__init__(app, parent)
+        self.img_label = ctk.CTkLabel(
+            self.frame,
+            text="",
+            compound="top",
+            justify="right",
+            fg_color="transparent",
+            corner_radius=9,
+            padx=0,
+            pady=10,
+        )
+        self.message_label = ctk.CTkLabel(
+            self.frame,
+            **ContentStyles.get_ChatLable_style(app.theme_manager, ""),
+        )
+        self.message_label.pack(fill=tk.Y, anchor=tk.E, padx=0, pady=0)
+        self.registry.register(self.frame, self.img_label, "user_label")
+        self.registry.register(self.frame, self.message_label, "user_label")
+
+    def bind(self, message):
+        super().bind(message)
+        theme = self.app.theme_manager
+
+        # --- Optional image container ---
+        ctk_img = None
+        if message.image_path:
+            ctk_img = self.app.load_chat_image(
+                message, lambda image: self._image_ready(message, image), owner=self
+            )
+        if ctk_img is not None:
+            self.img_label.configure(image=ctk_img)
+            self.img_label.pack(
+                fill=tk.Y, anchor=tk.E, padx=0, pady=10, before=self.message_label
+            )
+        else:
+            self.img_label.pack_forget()
+
+        self.message_label.configure(
+            text=message.text,
+            text_color=theme.font_Secondary,
+            fg_color=theme.secondaryColor,
+        )
+
+    def _image_ready(self, message, image):
+        # The view may have been recycled for another message meanwhile
+        if self.message is message:
+            self.img_label.configure(image=image)
+
+    def unbind(self):
+        # Drop the image reference so it can be freed while the view is pooled
+        self.img_label.configure(image="")
+        self.app.image_loader.release(self)
+        super().unbind()
+
+
+class AiMessageView(MessageView):
+    kind = "ai"
+    pack_options = {"fill": tk.Y, "padx": 0, "pady": (10, 15), "anchor": tk.W}
+
+    def __init__(self, app, parent):
+        super().__init__(app, parent)
+        # Controls (copy icon / stop action) sit under the content
+        self.controls_frame = ctk.CTkFrame(self.frame, fg_color="transparent")
+        self.controls_frame.pack(fill=tk.Y, anchor=tk.S, side=tk.BOTTOM)
+
+        # Create an inner frame to contain all message components (aligned left)
+        self.content_frame = ctk.CTkFrame(self.frame, fg_color="transparent", width=328)
+        self.content_frame.pack(side=tk.LEFT, padx=10)
+
+        # The finished message and its copy icon are built once and only
+        # re-rendered on bind; streamed labels and the stop action come and go
+        self.rich_text = RichTextView(self.content_frame, app.theme_manager)
+        self.registry.register(self.frame, self.rich_text, "rich_text")
+        self.copy_icon = app.add_copy_icon(
+            self.controls_frame,
+            lambda: self.message.text if self.message is not None else "",
+            on_widget=self.registry.callback(self.frame),
+        )
+        self.stream_frame = ctk.CTkFrame(self.content_frame, fg_color="transparent")
+        self.renderer = None
+        self.stop_button = None
+
+    @property
+    def theme_owners(self):
+        return [self.frame, self.stream_frame, self.controls_frame]
+
+    @property
+    def rendering(self):
+        return self.rich_text.rendering
+
+    def set_on_screen(self, on_screen):
+        # Progressive rendering only runs while the message can be seen
+        if on_screen:
+            self.rich_text.resume()
+        else:
+            self.rich_text.pause()
+
+    def bind(self, message):
+        super().bind(message)
+        self.end_stream()
+
+        if message.streaming:
+            self.rich_text.cancel()
+            self.rich_text.pack_forget()
+            self.copy_icon.pack_forget()
+            # Replay what has arrived so far, then keep appending
+            self.stream_frame.pack(fill=tk.X, anchor=tk.W)
+            self.renderer = StreamRenderer(
+                self.app.theme_manager,
+                self.stream_frame,
+                on_widget=self.registry.callback(self.stream_frame),
+            )
+            if message.text:
+                self.renderer.feed(message.text)
+            if message.on_stop:
+                self.stop_button = self.app.add_stop_button(
+                    self.controls_frame,
+                    message.on_stop,
+                    on_widget=self.registry.callback(self.controls_frame),
+                )
+        else:
+            self.show_rich_text()
+
+    def end_stream(self):
+        """Drop the streamed labels and the stop action, if any"""
+        self.renderer = None
+        if self.stream_frame.winfo_manager():
+            self.clear(self.stream_frame)
+            self.stream_frame.pack_forget()
+        if self.stop_button is not None:
+            self.registry.unregister(self.controls_frame)
+            self.stop_button.destroy()
+            self.stop_button = None
+
+    def show_rich_text(self):
+        # Parsed once per distinct message, then served from the cache
+        self.rich_text.render(parse_cache.parse(self.message.text))
+        self.rich_text.pack(fill=tk.X, padx=0, pady=(0, 5), anchor=tk.W)
+        self.copy_icon.pack(fill=tk.Y, anchor=tk.S, side=tk.BOTTOM, padx=0, pady=(3, 0))
+
+    def feed(self, chunk):
+        if self.renderer is not None:
+            self.renderer.feed(chunk)
+
+    def finish(self):
+        """Finalize a streamed message: re-render it as rich text and show the copy icon"""
+        # The streamed labels give way to the rich text widget
+        self.end_stream()
+        self.show_rich_text()
+
+    def unbind(self):
+        self.renderer = None
+        self.rich_text.cancel()
+        super().unbind()
+
+
+class SystemMessageView(MessageView):
+    kind = "system"
+
+    def __init__(self, app, parent):
+        super().__init__(app, parent)
+        self.message_label = ctk.CTkLabel(
+            self.frame,
+            **ContentStyles.get_Ai_Response_style(app.theme_manager, ""),
+        )
+        self.message_label.pack(side=tk.TOP, fill=tk.Y, anchor=tk.W, padx=0, pady=0)
+        self.registry.register(self.frame, self.message_label, "message_label")
+        self.stop_button = None
+
+    @property
+    def theme_owners(self):
+        # The stop button is registered under itself so it can come and go
+        return [self.frame] + ([self.stop_button] if self.stop_button else [])
+
+    def bind(self, message):
+        super().bind(message)
+        self.message_label.configure(
+            text=message.text, text_color=self.app.theme_manager.font_Secondary
+        )
+        if self.stop_button is not None:
+            self.registry.unregister(self.stop_button)
+            self.stop_button.destroy()
+            self.stop_button = None
+        if message.on_stop:
+            self.stop_button = self.app.add_stop_button(self.frame, message.on_stop)
+            self.registry.register(self.stop_button, self.stop_button, "font_Main")
+
+
+VIEW_CLASSES = {
+    view_class.kind: view_class
+    for view_class in (UserMessageView, AiMessageView, SystemMessageView)
+}
@@ -0,0 +1,114 @@
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+class RequestDispatcher:
+    """
+    Runs blocking backend calls on a worker pool and hands the results
+    back to the Tk main thread through a thread-safe queue.
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=30):
+        """
+        Initialize the dispatcher.
+
+        Args:
+            root: Tk widget used to schedule `after()` callbacks
+            max_workers: Number of background worker threads
+            poll_interval: Time in milliseconds between result queue drains
+        """
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="lamsa-request"
+        )
+        self._results = queue.Queue()
+        self._poll_job = None
+        self.in_flight = 0
+
+    def submit(self, func, *args, on_done=None, on_error=None, **kwargs):
+        """
+        Run `func(*args, **kwargs)` on a worker thread.
+
+        `on_done(result, elapsed)` or `on_error(exception, elapsed)` is called
+        on the Tk main thread once the call finishes.
+        """
+        start_time = time.monotonic()
+
+        def run():
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                self._post(on_error, e, time.monotonic() - start_time, finished=True)
+                return
+            self._post(on_done, result, time.monotonic() - start_time, finished=True)
+
+        return self._start(run)
+
+    def submit_stream(
+        self, func, *args, on_chunk=None, on_done=None, on_error=None, **kwargs
+    ):
+        """
+        Iterate the generator returned by `func(*args, **kwargs)` on a worker thread.
+
+        Every yielded item is passed to `on_chunk(item)` on the Tk main thread,
+        followed by `on_done(elapsed)` or `on_error(exception, elapsed)`.
+        """
+        start_time = time.monotonic()
+
+        def run():
+            try:
+                for chunk in func(*args, **kwargs):
+                    self._post(on_chunk, chunk)
+            except Exception as e:
+                self._post(on_error, e, time.monotonic() - start_time, finished=True)
+                return
+            self._post(on_done, time.monotonic() - start_time, finished=True)
+
+        return self._start(run)
+
+    def _start(self, run):
+        self.in_flight += 1
+        future = self._executor.submit(run)
+        self._schedule_poll()
+        return future
+
+    def _post(self, callback, *args, finished=False):
+        # Only the queue is touched from the worker thread
+        self._results.put((callback, args, finished))
+
+    def _schedule_poll(self):
+        if self._poll_job is None:
+            self._poll_job = self.root.after(self.poll_interval, self._drain)
+
+    def _drain(self):
+        """Deliver every finished result to its callback (Tk main thread)"""
+        self._poll_job = None
+        while True:
+            try:
+                callback, args, finished = self._results.get_nowait()
+            except queue.Empty:
+                break
+
+            if finished:
+                self.in_flight -= 1
+            try:
+                if callback:
+                    callback(*args)
+            except Exception as e:
+                print(f"Error in request callback: {e}")
+
+        # Keep polling only while requests are still running
+        if self.in_flight > 0:
+            self._schedule_poll()
+
+    def shutdown(self):
+        """Stop polling and discard any queued work"""
+        if self._poll_job is not None:
+            try:
+                self.root.after_cancel(self._poll_job)
+            except Exception:
+                pass
+            self._poll_job = None
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,386 @@
+import hashlib
+import math
+import re
+import time
+import tkinter as tk
+from collections import OrderedDict
+from tkinter import font as tkfont
+from Style.UiConfig import ContentStyles
+
+HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*)$")
+LIST_PATTERN = re.compile(r"^(\s*)([-*+]|\d+[.)])\s+(.*)$")
+INLINE_PATTERN = re.compile(
+    r"\*\*(?P<bold>.+?)\*\*"
+    r"|__(?P<bold_alt>.+?)__"
+    r"|`(?P<code>[^`]+)`"
+    r"|(?<![\w*])\*(?P<italic>[^*\s](?:[^*]*[^*\s])?)\*(?![\w*])"
+)
+
+INLINE_TAGS = {"bold": "bold", "bold_alt": "bold", "code": "inline_code", "italic": "italic"}
+
+
+def parse_inline(text):
+    """Split a line into (text, tag) spans; tag is None for plain text"""
+    spans = []
+    position = 0
+    for match in INLINE_PATTERN.finditer(text):
+        if match.start() > position:
+            spans.append((text[position : match.start()], None))
+        group = match.lastgroup
+        spans.append((match.group(group), INLINE_TAGS[group]))
+        position = match.end()
+    if position < len(text):
+        spans.append((text[position:], None))
+    return tuple(spans)
+
+
+def parse_markdown(message):
+    """
+    Parse a response into a tuple of blocks:
+
+        ("heading", level, spans)
+        ("paragraph", spans)
+        ("list_item", depth, marker, spans)
+        ("code", language, text)
+
+    Empty lines are dropped, like in the label based renderer.
+    """
+    blocks = []
+    code_lines = None
+    language = ""
+
+    for line in message.splitlines():
+        if line.strip().startswith("```"):
+            if code_lines is None:
+                code_lines = []
+                language = line.strip()[3:].strip()
+            else:
+                blocks.append(("code", language, "\n".join(code_lines)))
+                code_lines = None
+            continue
+
+        if code_lines is not None:
+            code_lines.append(line)
+            continue
+
+        if not line.strip():
+            continue
+
+        heading = HEADING_PATTERN.match(line.strip())
+        if heading:
+            blocks.append(
+                ("heading", len(heading.group(1)), parse_inline(heading.group(2)))
+            )
+            continue
+
+        item = LIST_PATTERN.match(line)
+        if item:
+            depth = len(item.group(1).expandtabs(4)) // 2
+            marker = item.group(2)
+            marker = "•" if marker in "-*+" else marker
+            blocks.append(("list_item", depth, marker, parse_inline(item.group(3))))
+            continue
+
+        blocks.append(("paragraph", parse_inline(line.strip())))
+
+    # Unfinished code block (message ended without closing ```)
+    if code_lines:
+        blocks.append(("code", language, "\n".join(code_lines)))
+
+    return tuple(blocks)
+
+
+class ParseCache:
+    """LRU of parsed messages, keyed by a hash of the message text"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(message):
+        return hashlib.blake2b(message.encode("utf-8"), digest_size=16).digest()
+
+    def parse(self, message):
+        key = self.key(message)
+        blocks = self._entries.get(key)
+        if blocks is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return blocks
+
+        self.misses += 1
+        blocks = parse_markdown(message)
+        self._entries[key] = blocks
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return blocks
+
+    def clear(self):
+        self._entries.clear()
+
+
+parse_cache = ParseCache()
+
+
+class RichTextView:
+    """
+    Shows a parsed message in a single read-only tk.Text.
+
+    Bold, italics, headings, lists and code blocks are text tags, so a
+    message costs one widget however long it is. Long messages are
+    rendered progressively and can be paused while off screen. Themed
+    through `configure(fg_color=, text_color=, code_bg=, code_color=)`
+    like the CTk widgets around it.
+    """
+
+    # Estimated lines rendered before returning; the rest comes in chunks
+    first_screen_lines = 40
+    # Seconds one idle callback may spend rendering
+    chunk_budget = 0.008
+
+    def __init__(self, parent, theme_manager):
+        self.style = ContentStyles.get_Rich_Text_style(theme_manager)
+        self._blocks = None
+        self._next = 0
+        self._job = None
+        scaling = getattr(parent, "_get_widget_scaling", lambda: 1.0)()
+        self.scaling = scaling
+
+        base_font = self._font(self.style["font"])
+        self.fonts = {"base": base_font}
+        self._list_tags = set()
+        self.text = tk.Text(
+            parent,
+            wrap="word",
+            font=base_font,
+            width=max(1, round(self.style["width"] * scaling / base_font.measure("0"))),
+            height=1,
+            borderwidth=0,
+            highlightthickness=0,
+            padx=0,
+            pady=0,
+            cursor="arrow",
+            takefocus=0,
+        )
+        self._chars_per_line = int(self.text.cget("width"))
+        self._configure_tags()
+        self.configure(
+            fg_color=self.style["fg_color"],
+            text_color=self.style["text_color"],
+            code_bg=self.style["code_bg"],
+            code_color=self.style["code_color"],
+        )
+        # Re-fit the height once the text is wrapped at its real width
+        self.text.bind("<Configure>", lambda e: self.fit_height())
+
+    def _font(self, spec, **options):
+        # Same pixel sizing as CTk's font scaling
+        family, size = spec[0], spec[1]
+        return tkfont.Font(
+            family=family, size=-abs(round(size * self.scaling)), **options
+        )
+
+    def _configure_tags(self):
+        style = self.style
+        family = style["font"][0]
+        indent = round(style["list_indent"] * self.scaling)
+        gap = round(5 * self.scaling)
+
+        self.fonts["bold"] = self._font(style["font"], weight="bold")
+        self.fonts["italic"] = self._font(style["font"], slant="italic")
+        self.fonts["code"] = self._font(style["code_font"])
+        self.text.tag_configure("bold", font=self.fonts["bold"])
+        self.text.tag_configure("italic", font=self.fonts["italic"])
+        self.text.tag_configure("inline_code", font=self.fonts["code"])
+        self.text.tag_configure("block", spacing3=gap)
+        self.text.tag_configure(
+            "code_block",
+            font=self.fonts["code"],
+            lmargin1=gap * 2,
+            lmargin2=gap * 2,
+            rmargin=gap * 2,
+            spacing1=gap,
+        )
+
+        for level, heading_size in enumerate(style["heading_sizes"], start=1):
+            self.fonts[f"h{level}"] = self._font(
+                (family, heading_size), weight="bold"
+            )
+            self.text.tag_configure(
+                f"h{level}", font=self.fonts[f"h{level}"], spacing1=gap
+            )
+
+        self._list_indent = indent
+        self._bullet_width = self.fonts["base"].measure("• ")
+
+    def _list_tag(self, depth):
+        tag = f"list{depth}"
+        if tag not in self._list_tags:
+            margin = depth * self._list_indent
+            self.text.tag_configure(
+                tag, lmargin1=margin, lmargin2=margin + self._bullet_width
+            )
+            self._list_tags.add(tag)
+        return tag
+
+    def render(self, blocks, progressive=True):
+        """
+        Replace the content with parsed `blocks` (see parse_markdown).
+
+        Long messages are rendered progressively: the first screenful right
+        away, the rest in chunks from idle callbacks, with the full height
+        reserved up front from an estimate.
+        """
+        self.cancel()
+        self._blocks = blocks
+        self._next = 0
+        text = self.text
+        text.configure(state="normal")
+        text.delete("1.0", "end")
+
+        estimated_lines = self.estimate_lines(blocks)
+        if not progressive or estimated_lines <= self.first_screen_lines:
+            self._insert_blocks()
+            text.configure(state="disabled")
+            self._complete()
+            return
+
+        # Reserve the estimated height so the scrollbar does not jump
+        text.configure(height=estimated_lines)
+        self._insert_blocks(max_lines=self.first_screen_lines)
+        text.configure(state="disabled")
+        self.resume()
+
+    @property
+    def rendering(self):
+        """True while part of the message is still waiting to be rendered"""
+        return self._blocks is not None and self._next < len(self._blocks)
+
+    def pause(self):
+        """Stop rendering chunks until `resume` (e.g. while off screen)"""
+        if self._job is not None:
+            self.text.after_cancel(self._job)
+            self._job = None
+
+    def resume(self):
+        if self.rendering and self._job is None:
+            self._job = self.text.after_idle(self._render_chunk)
+
+    def cancel(self):
+        """Drop whatever is left to render"""
+        self.pause()
+        self._blocks = None
+
+    def _render_chunk(self):
+        self._job = None
+        deadline = time.perf_counter() + self.chunk_budget
+        try:
+            self.text.configure(state="normal")
+            self._insert_blocks(deadline=deadline)
+            self.text.configure(state="disabled")
+        except tk.TclError:
+            self._blocks = None  # Destroyed while rendering
+            return
+
+        if self.rendering:
+            # Let pending events through before the next chunk
+            self._job = self.text.after_idle(self._render_chunk)
+        else:
+            self._complete()
+
+    def _complete(self):
+        self._blocks = None
+        self.fit_height()
+
+    def _insert_blocks(self, max_lines=None, deadline=None):
+        """Insert blocks from the cursor, up to an estimated line count or deadline"""
+        blocks = self._blocks
+        lines = 0
+        while self._next < len(blocks):
+            block = blocks[self._next]
+            self._next += 1
+            self._insert_block(block, last=self._next == len(blocks))
+            lines += self._block_lines(block)
+            if max_lines is not None and lines >= max_lines:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+
+    def _insert_block(self, block, last):
+        text = self.text
+        newline = "" if last else "\n"
+        kind = block[0]
+        if kind == "code":
+            text.insert("end", block[2] + newline, ("code_block", "block"))
+        elif kind == "heading":
+            tag = f"h{min(block[1], len(self.style['heading_sizes']))}"
+            self._insert_spans(block[2], (tag, "block"))
+            text.insert("end", newline, (tag, "block"))
+        elif kind == "list_item":
+            tag = self._list_tag(block[1])
+            text.insert("end", block[2] + " ", (tag, "block"))
+            self._insert_spans(block[3], (tag, "block"))
+            text.insert("end", newline, (tag, "block"))
+        else:
+            self._insert_spans(block[1], ("block",))
+            text.insert("end", newline, ("block",))
+
+    def _insert_spans(self, spans, tags):
+        for span_text, span_tag in spans:
+            self.text.insert(
+                "end", span_text, tags + ((span_tag,) if span_tag else ())
+            )
+
+    def _block_lines(self, block):
+        """Estimated display lines of a block once wrapped"""
+        chars_per_line = self._chars_per_line
+        if block[0] == "code":
+            return sum(
+                max(1, math.ceil(len(line) / chars_per_line))
+                for line in block[2].split("\n")
+            )
+        length = sum(len(span_text) for span_text, _ in block[-1])
+        if block[0] == "list_item":
+            length += len(block[2]) + 1 + 2 * block[1]
+        return max(1, math.ceil(length / chars_per_line))
+
+    def estimate_lines(self, blocks):
+        return max(1, sum(self._block_lines(block) for block in blocks))
+
+    def fit_height(self):
+        """Size the widget to its wrapped line count"""
+        if self.rendering:
+            return  # Keep the reserved height until everything is in
+        try:
+            lines = self.text.count("1.0", "end-1c", "displaylines")
+        except tk.TclError:
+            return
+        if isinstance(lines, tuple):
+            lines = lines[0]
+        # `count` gives the line breaks between the indices
+        self.text.configure(height=(lines or 0) + 1)
+
+    def configure(self, fg_color=None, text_color=None, code_bg=None, code_color=None):
+        if fg_color is not None:
+            self.text.configure(background=fg_color, selectforeground=fg_color)
+        if text_color is not None:
+            self.text.configure(foreground=text_color, selectbackground=text_color)
+        if code_bg is not None:
+            self.text.tag_configure("code_block", background=code_bg)
+            self.text.tag_configure("inline_code", background=code_bg)
+        if code_color is not None:
+            self.text.tag_configure("code_block", foreground=code_color)
+            self.text.tag_configure("inline_code", foreground=code_color)
+
+    def pack(self, **options):
+        self.text.pack(**options)
+
+    def pack_forget(self):
+        self.text.pack_forget()
+
+    def destroy(self):
+        self.cancel()
+        self.text.destroy()
@@ -0,0 +1,114 @@
+import re
+import tkinter as tk
+import customtkinter as ctk
+from Style.UiConfig import ContentStyles
+
+BOLD_PATTERN = re.compile(r"\*\*(.*?)\*\*")
+
+
+def clean_text_line(line):
+    """Apply the basic markdown-like cleanup used for AI text lines"""
+    if line.strip().startswith("- "):
+        line = "• " + line.strip()[2:]
+    # Clean up markdown formatting (just remove for now)
+    return BOLD_PATTERN.sub(r"\1", line)
+
+
+def clean_response_text(message):
+    """Strip a response and drop its empty lines"""
+    message = message.strip()
+    return "\n".join(line for line in message.splitlines() if line.strip())
+
+
+class StreamRenderer:
+    """
+    Builds an AI message inside `parent_frame` from streamed text chunks.
+
+    Text is appended to the current block label as it arrives; a code block
+    gets its own container and is finalized when its closing fence arrives.
+    """
+
+    def __init__(self, theme_manager, parent_frame, on_widget=None):
+        """
+        Initialize the renderer.
+
+        Args:
+            theme_manager: ThemeManager providing the current colors
+            parent_frame: Frame the message widgets are packed into
+            on_widget: Optional `on_widget(widget, role)` called for every themed widget
+        """
+        self.theme_manager = theme_manager
+        self.parent_frame = parent_frame
+        self._register = on_widget or (lambda widget, role: None)
+        self._chunks = []
+        self._pending = ""  # Incomplete last line
+        self._in_code_block = False
+        self._block_lines = []
+        self._block_label = None
+
+    def feed(self, chunk):
+        """Append a chunk of response text"""
+        self._chunks.append(chunk)
+        self._pending += chunk
+        *lines, self._pending = self._pending.split("\n")
+        for line in lines:
+            self._add_line(line)
+        self._refresh_block(self._pending)
+
+    def finish(self):
+        """Flush the remaining text and return the cleaned full message"""
+        if self._pending:
+            self._add_line(self._pending)
+            self._pending = ""
+        self._refresh_block()
+        return clean_response_text("".join(self._chunks))
+
+    def _add_line(self, line):
+        # Empty lines are dropped, like in the non-streaming renderer
+        if not line.strip():
+            return
+
+        if line.strip().startswith("```"):
+            # Commit the current block before switching between text and code
+            self._refresh_block()
+            self._in_code_block = not self._in_code_block
+            self._block_lines = []
+            self._block_label = None
+            return
+
+        if not self._in_code_block:
+            line = clean_text_line(line)
+        self._block_lines.append(line)
+
+    def _refresh_block(self, tail=""):
+        """Show the current block, including the incomplete `tail` line"""
+        lines = list(self._block_lines)
+        if tail.strip() and not tail.strip().startswith("```"):
+            lines.append(tail if self._in_code_block else clean_text_line(tail))
+        if not lines:
+            return
+
+        text = "\n".join(lines)
+        if self._block_label is not None:
+            self._block_label.configure(text=text)
+        elif self._in_code_block:
+            code_frame = ctk.CTkFrame(
+                self.parent_frame,
+                **ContentStyles.get_Code_container_style(self.theme_manager),
+            )
+            code_frame.pack(fill=tk.X, padx=0, pady=(0, 5), anchor=tk.W)
+            self._register(code_frame, "code_container")
+
+            self._block_label = ctk.CTkLabel(
+                code_frame,
+                **ContentStyles.get_Code_label_style(self.theme_manager, text),
+            )
+            self._block_label.pack(fill=tk.X, padx=0, pady=0)
+            self._register(self._block_label, "code_label")
+        else:
+            self._block_label = ctk.CTkLabel(
+                self.parent_frame,
+                **ContentStyles.get_Ai_Response_style(self.theme_manager, text),
+            )
+            self._block_label.pack(fill=tk.X, padx=0, pady=(0, 5), anchor=tk.W)
+            self._register(self._block_label, "message_label")
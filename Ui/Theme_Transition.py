@@ -0,0 +1,308 @@
+import time
+import tkinter as tk
+from PIL import Image, ImageColor
+
+# ThemeManager attributes that take part in a theme switch
+THEME_ROLES = (
+    "primaryColor",
+    "secondaryColor",
+    "tertiaryColor_ON",
+    "tertiaryColor_OFF",
+    "font_Main",
+    "font_Secondary",
+    "font_Tertiary",
+    "base_bg",
+    "hover_bg",
+    "active_bg",
+    "code_bg",
+    "code_font",
+)
+
+# Widget role -> configure() option -> theme role
+WIDGET_STYLES = {
+    "window": {"fg_color": "primaryColor"},
+    "font_Main": {"text_color": "font_Main"},
+    "font_Secondary": {"text_color": "font_Secondary"},
+    "font_Tertiary": {"text_color": "font_Tertiary"},
+    "base_bg": {"fg_color": "base_bg"},
+    "secondaryColor": {"fg_color": "secondaryColor"},
+    "action_container": {"fg_color": "secondaryColor", "border_color": "base_bg"},
+    "option_button": {
+        "fg_color": "base_bg",
+        "hover_color": "hover_bg",
+        "text_color": "font_Secondary",
+    },
+    "option_button_selected": {
+        "fg_color": "active_bg",
+        "hover_color": "hover_bg",
+        "text_color": "font_Tertiary",
+    },
+    "action_button": {
+        "fg_color": "base_bg",
+        "hover_color": "hover_bg",
+        "text_color": "font_Secondary",
+    },
+    "status_button": {
+        "fg_color": "tertiaryColor_OFF",
+        "hover_color": "tertiaryColor_OFF",
+    },
+    "textbox": {
+        "fg_color": "base_bg",
+        "text_color": "font_Secondary",
+        "border_color": "hover_bg",
+    },
+    "chat_frame": {"fg_color": "primaryColor"},
+    "attachment_preview": {"fg_color": "base_bg", "border_color": "hover_bg"},
+    "code_container": {"fg_color": "code_bg"},
+    "code_label": {"text_color": "code_font"},
+    "user_label": {"fg_color": "secondaryColor", "text_color": "font_Secondary"},
+    "message_label": {"fg_color": "primaryColor", "text_color": "font_Secondary"},
+    "rich_text": {
+        "fg_color": "primaryColor",
+        "text_color": "font_Secondary",
+        "code_bg": "code_bg",
+        "code_color": "code_font",
+    },
+}
+
+
+def normalize_color(color):
+    try:
+        rgb = ImageColor.getrgb(str(color))
+        return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
+    except:
+        return str(color).lower()
+
+
+def theme_colors(theme_manager):
+    """Normalized colors of every theme role for the current theme"""
+    return {role: normalize_color(getattr(theme_manager, role)) for role in THEME_ROLES}
+
+
+class TransitionTable:
+    """
+    Colors for every step of a theme transition, computed once per switch.
+
+    All roles are blended together as one pixel strip per step, and the
+    configure() options of each widget role are resolved ahead of time,
+    so an animation tick is a lookup followed by `configure`.
+    """
+
+    def __init__(self, old_colors, new_colors, steps):
+        """
+        Build the table.
+
+        Args:
+            old_colors: Theme role -> color before the switch
+            new_colors: Theme role -> color after the switch
+            steps: Number of animation steps; step `steps` is the new theme
+        """
+        self.steps = max(1, steps)
+        frames = self._blend_frames(old_colors, new_colors)
+        self._styles = [
+            {
+                widget_role: {option: frame[role] for option, role in options.items()}
+                for widget_role, options in WIDGET_STYLES.items()
+            }
+            for frame in frames
+        ]
+
+    def _blend_frames(self, old_colors, new_colors):
+        """Theme role -> hex color, for each step from 0 to `steps`"""
+        blended, fixed = [], {}
+        old_rgb, new_rgb = [], []
+        for role in THEME_ROLES:
+            new = new_colors[role]
+            try:
+                old_rgb.append(ImageColor.getrgb(old_colors[role]))
+                new_rgb.append(ImageColor.getrgb(new))
+                blended.append(role)
+            except (ValueError, AttributeError, KeyError):
+                # e.g. "transparent": switch straight to the new value
+                fixed[role] = new
+
+        old_strip = Image.new("RGB", (max(1, len(blended)), 1))
+        new_strip = Image.new("RGB", old_strip.size)
+        old_strip.putdata(old_rgb)
+        new_strip.putdata(new_rgb)
+
+        frames = []
+        for step in range(self.steps + 1):
+            strip = Image.blend(old_strip, new_strip, step / self.steps)
+            frame = dict(fixed)
+            for role, (r, g, b) in zip(blended, strip.getdata()):
+                frame[role] = f"#{r:02x}{g:02x}{b:02x}"
+            frames.append(frame)
+        return frames
+
+    def style(self, step, widget_role):
+        """configure() options for `widget_role` at `step`, or None if unknown"""
+        return self._styles[min(max(step, 0), self.steps)].get(widget_role)
+
+
+def fade_in_table(colors, steps, background="primaryColor"):
+    """TransitionTable bringing every role in from the `background` role's color"""
+    return TransitionTable({role: colors[background] for role in colors}, colors, steps)
+
+
+class ThemeRegistry:
+    """
+    Index of themed widgets by role, grouped by the frame that owns them.
+
+    Widgets are registered when they are created and dropped together with
+    their owner, so a theme switch iterates this index directly instead of
+    walking the widget tree on every step.
+    """
+
+    def __init__(self):
+        self._owners = {}  # owner -> {widget role: [widgets]}
+
+    def register(self, owner, widget, role):
+        self._owners.setdefault(owner, {}).setdefault(role, []).append(widget)
+
+    def unregister(self, owner):
+        """Forget every widget registered under `owner`"""
+        self._owners.pop(owner, None)
+
+    def callback(self, owner):
+        """`on_widget(widget, role)` callback registering under `owner`"""
+        return lambda widget, role: self.register(owner, widget, role)
+
+    def owners(self):
+        return list(self._owners)
+
+    def entries(self, owners=None):
+        """(widget, role) pairs of `owners` (default: all)"""
+        for owner in self._owners if owners is None else owners:
+            for role, widgets in self._owners.get(owner, {}).items():
+                for widget in widgets:
+                    yield widget, role
+
+    def __len__(self):
+        return sum(
+            len(widgets) for roles in self._owners.values() for widgets in roles.values()
+        )
+
+
+class TransitionAnimator:
+    """
+    Plays a TransitionTable over a list of widgets on an AnimationClock.
+
+    Each frame paints the step matching the elapsed time, so steps are
+    dropped rather than the animation running late. When the clock's frame
+    budget runs out the remaining widgets are painted in later idle
+    callbacks, letting input events through in between. Widgets that are
+    set straight to the final colors (`snap_items`) are handled the same
+    way at the end.
+    """
+
+    def __init__(
+        self,
+        clock,
+        table,
+        items,
+        snap_items=(),
+        duration=180,
+        widget=None,
+        on_done=None,
+    ):
+        """
+        Initialize the animator.
+
+        Args:
+            clock: AnimationClock driving the animation
+            table: TransitionTable with the colors of every step
+            items: (widget, role) pairs to animate
+            snap_items: (widget, role) pairs to set to the final colors only
+            duration: Target length of the animation in milliseconds
+            widget: Widget whose destruction cancels the animation
+            on_done: Called with the transition stats when finished
+        """
+        self.clock = clock
+        self.table = table
+        self.items = list(items)
+        self.snap_items = list(snap_items)
+        self.duration = duration
+        self.widget = widget
+        self.on_done = on_done
+
+        self._start = None
+        self._phase = "animate"  # Then "snap", then "done"
+        self._step = 0
+        self._cursor = 0
+        self._shown = set()
+        self.frames = 0
+        self.worst_frame = 0.0
+        self.stats = None
+
+    def start(self):
+        self._start = time.perf_counter()
+        self.clock.add(self)
+        return self
+
+    def cancel(self):
+        self.clock.remove(self)
+
+    @property
+    def busy(self):
+        """True while a frame (or the final snap) is only partly painted"""
+        return self._phase == "snap" or self._cursor > 0
+
+    def _step_at(self, now):
+        if self.duration <= 0:
+            return self.table.steps
+        progress = (now - self._start) * 1000 / self.duration
+        return min(self.table.steps, max(1, int(progress * self.table.steps)))
+
+    def _paint(self, items, step, deadline):
+        """Paint `items` from the cursor until done or past `deadline`"""
+        while self._cursor < len(items):
+            widget, role = items[self._cursor]
+            self._cursor += 1
+            style = self.table.style(step, role)
+            if style is not None:
+                try:
+                    widget.configure(**style)
+                except tk.TclError:
+                    pass  # Destroyed during the transition
+            if time.perf_counter() >= deadline:
+                break
+        return self._cursor >= len(items)
+
+    def step(self, now, deadline):
+        """Paint the frame for `now` until done or past `deadline`; False once finished"""
+        slice_start = time.perf_counter()
+
+        if self._phase == "animate":
+            if self._cursor == 0:
+                # New frame: jump to the step for the current time
+                self._step = self._step_at(now)
+            if self._paint(self.items, self._step, deadline):
+                self.frames += 1
+                self._shown.add(self._step)
+                self._cursor = 0
+                if self._step >= self.table.steps:
+                    self._phase = "snap"
+        elif self._paint(self.snap_items, self.table.steps, deadline):
+            self._phase = "done"
+
+        self._record(slice_start)
+        if self._phase == "done":
+            self._finish()
+            return False
+        return True
+
+    def _record(self, slice_start):
+        self.worst_frame = max(self.worst_frame, time.perf_counter() - slice_start)
+
+    def _finish(self):
+        elapsed = time.perf_counter() - self._start
+        self.stats = {
+            "duration_ms": elapsed * 1000,
+            "frames": self.frames,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "worst_frame_ms": self.worst_frame * 1000,
+            "dropped_steps": self.table.steps - len(self._shown),
+        }
+        if self.on_done:
+            self.on_done(self.stats)
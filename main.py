@@ -1,33 +1,80 @@
 import os
-import time
+import queue
 import tkinter as tk
 import customtkinter as ctk
-from PIL import ImageColor, Image, ImageDraw, ImageTk
-from Status_Checker import ConnectionMonitor
-from Style.UiConfig import ThemeManager, ContentStyles, LayoutSettings
-from BackEnd.GEMINI_BackEnd import generateGeminiResponse
-import ctypes
+from Status_Checker import ConnectionMonitor, HttpsProbe, parse_targets
+from Style.Asset_Cache import assets
+from Style.UiConfig import ICON_SIZE, ThemeManager, ContentStyles, LayoutSettings
+from BackEnd.GEMINI_BackEnd import (
+    CancelToken,
+    GeminiError,
+    geminiSession,
+    newChatSession,
+    requestGeminiResponse,
+    requireApiKey,
+    streamGeminiResponse,
+)
+from BackEnd.Offline_Queue import OfflineQueue
+from Ui.Image_Loader import ChatImageLoader
+from Ui.Request_Dispatcher import RequestDispatcher
+from Ui.Stream_Renderer import clean_response_text
+from Ui.Animation_Clock import AnimationClock
+from Ui.Chat_History import ChatMessage, VirtualChatList
+from Ui.Layout_Scheduler import LayoutScheduler
+from Ui.Theme_Transition import (
+    WIDGET_STYLES,
+    ThemeRegistry,
+    TransitionAnimator,
+    TransitionTable,
+    fade_in_table,
+    theme_colors,
+)
 
 textPrompt = None
 imgFile = None
 
 # Create connection monitor instance
-connection_monitor = ConnectionMonitor(check_interval=1)  # Check every 1 second
+# Sends are gated on the Gemini API host answering, through the client's
+# own pooled session (unless plain TCP targets are configured instead; a
+# LAMSA_PROBE_URL on another host is probed without the API key)
+connection_monitor = ConnectionMonitor(
+    probes=parse_targets(os.getenv("LAMSA_PROBE_TARGETS", ""))
+    or [
+        HttpsProbe(
+            os.getenv("LAMSA_PROBE_URL") or geminiSession.apiHost,
+            session=geminiSession.httpSession,
+            session_host=geminiSession.apiHost,
+            # DNS + TCP + TLS + HEAD: far more than the 1 s a TCP probe gets
+            timeout=float(os.getenv("LAMSA_PROBE_TIMEOUT", "5")),
+        )
+    ]
+)
 
 
-def normalize_color(color):
-    try:
-        rgb = ImageColor.getrgb(str(color))
-        return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}"
-    except:
-        return str(color).lower()
+# In-app notice shown under prompts queued while offline
+OFFLINE_NOTICE = "No connection: this message will be sent once you're back online."
 
 
 class LamsaApp(ctk.CTk):
+    # Synchronous update / update idletasks runs, counted in debug mode so new ones show up
+    forced_updates = 0
+
     def __init__(self):
         super().__init__()
+        self.debug = bool(os.getenv("LAMSA_DEBUG"))
+        if self.debug:
+            self.count_forced_updates()
+
+        # Scale icons once for this window's DPI, before any widget uses them
+        assets.scaling = self._get_widget_scaling()
+        assets.preload(
+            [("Bot", (186, 186)), ("light_Icon", ICON_SIZE), ("dark_Icon", ICON_SIZE)]
+            + [(name, ICON_SIZE) for name, in LayoutSettings.get_Status_layout()]
+        )
 
         self.theme_manager = ThemeManager(is_dark_mode=False)
+        # Chat widgets that follow the theme, indexed by role
+        self.theme_registry = ThemeRegistry()
         self.old_colors = {}
         self.save_current_colors()
 
@@ -49,38 +96,67 @@ class LamsaApp(ctk.CTk):
         self.SelectFile_button = None  # Will store reference to Select image button
         self.create_widgets()
 
+        # Background workers for Gemini requests
+        self.request_dispatcher = RequestDispatcher(self, max_workers=4)
+        # Open the Gemini connection before the first message is sent
+        self.request_dispatcher.submit(geminiSession.warmUp)
+        # Chat images and previews are decoded on their own small pool
+        self.image_dispatcher = RequestDispatcher(self, max_workers=2)
+        self.image_loader = ChatImageLoader(
+            self.image_dispatcher,
+            max_bytes=int(os.getenv("LAMSA_IMAGE_MEMORY_MB", "32")) * 1024 * 1024,
+            cache_dir=os.getenv("LAMSA_IMAGE_CACHE_DIR", ".cache/images"),
+        )
+
         self.animation_steps = 15
         self.animation_delay = 12
         self.transitioning = False
+        self.theme_transition = None  # Color table of the current theme switch
+        self.theme_animator = None
+        self.animation_frame_budget = 8  # ms of painting per callback
+        self.transition_stats = None  # FPS / worst frame of the last switch
+        # Single timer shared by the theme transition and message fade-ins
+        self.animations = AnimationClock(
+            self,
+            frame_interval=self.animation_delay,
+            frame_budget=self.animation_frame_budget,
+        )
 
         # Message animation parameters
         self.message_animation_steps = 10
-        self.message_animation_delay = 10
-
-        # Start the connection monitor
+        self.message_animation_duration = 120  # ms
+        self.fade_table = None  # Fade-in colors for the current theme
+
+        # Render Gemini responses chunk by chunk as they arrive
+        self.stream_responses = True
+
+        # Conversation history sent with every request (token budgeted)
+        self.chat_session = newChatSession()
+
+        # Prompts written while offline, sent in order once the connection is back
+        self.offline_queue = OfflineQueue(os.getenv("LAMSA_OUTBOX_DIR", ".cache/outbox"))
+        self.offline_concurrency = 2  # Queued prompts sent at once without a chat session
+        self.offline_retry_delay = 5000  # ms before retrying, unless the error says otherwise
+        self.offline_retry_job = None
+        self.offline_notices = {}  # entry id -> pending notice in the chat
+        self.offline_in_flight = set()
+        self.offline_results = {}  # entry id -> (response, error) waiting for earlier ones
+        self.offline_shown = set()  # Ids of entries whose image copy the chat shows
+        self.offline_kept_images = []  # Image copies of sent entries, deleted on close
+        self.show_offline_queue()
+
+        # The monitor reports state changes from its own thread through a queue,
+        # which the Tk thread checks (changes made before mainloop are kept too)
+        self.connection_events = queue.Queue()
+        self.connection_poll_interval = 250  # ms
+        self.connection_poll_job = None
+        connection_monitor.subscribe(self.on_connection_change)
         connection_monitor.start()
-
-        # Update connection status periodically
-        self.update_connection_status()
+        self.refresh_connection_button()
+        self.poll_connection_events()
 
     def save_current_colors(self):
-        self.old_colors = {
-            key: normalize_color(value)
-            for key, value in {
-                "primaryColor": self.theme_manager.primaryColor,
-                "secondaryColor": self.theme_manager.secondaryColor,
-                "tertiaryColor_ON": self.theme_manager.tertiaryColor_ON,
-                "tertiaryColor_OFF": self.theme_manager.tertiaryColor_OFF,
-                "font_Main": self.theme_manager.font_Main,
-                "font_Secondary": self.theme_manager.font_Secondary,
-                "font_Tertiary": self.theme_manager.font_Tertiary,
-                "base_bg": self.theme_manager.base_bg,
-                "hover_bg": self.theme_manager.hover_bg,
-                "active_bg": self.theme_manager.active_bg,
-                "code_bg": self.theme_manager.code_bg,
-                "code_font": self.theme_manager.code_font,
-            }.items()
-        }
+        self.old_colors = theme_colors(self.theme_manager)
 
     def create_widgets(self):
         self.configure(fg_color=self.theme_manager.primaryColor)
@@ -116,9 +192,7 @@ class LamsaApp(ctk.CTk):
         self.initial_frame = ctk.CTkFrame(chat_frame, fg_color="transparent")
         self.initial_frame.pack(expand=True)  # This will center the frame
 
-        img = ctk.CTkImage(
-            light_image=Image.open("Assets/Icons/Bot.png"), size=(186, 186)
-        )
+        img = assets.image("Bot", (186, 186))
         img_label = ctk.CTkLabel(self.initial_frame, image=img, text="")
         img_label.pack(pady=(0))
 
@@ -138,6 +212,17 @@ class LamsaApp(ctk.CTk):
         # Add chat scroll frame to widget_refs
         self.widget_refs.append((self.chat_scroll, "chat_frame"))
 
+        # Messages are kept as a model; only those near the viewport get widgets
+        # Scrolling and relayout requests, merged into one pass per frame
+        self.layout = LayoutScheduler(self, self.chat_scroll._parent_canvas)
+        # Scrolling by hand takes precedence over a pending scroll to the bottom
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.bind_all(sequence, lambda e: self.layout.cancel_scroll(), add="+")
+        self.chat_scroll._scrollbar.bind(
+            "<Button-1>", lambda e: self.layout.cancel_scroll(), add="+"
+        )
+        self.chat_list = VirtualChatList(self, self.chat_scroll)
+
         Action_frame = ctk.CTkFrame(
             main_frame, **ContentStyles.get_Action_Container_style(self.theme_manager)
         )
@@ -218,10 +303,7 @@ class LamsaApp(ctk.CTk):
         bottom_btns_frame.pack_propagate(False)
 
         def Icons(name):
-            path = f"Assets/Icons/{name}.png"
-            if os.path.exists(path):
-                return {"icon": ctk.CTkImage(Image.open(path), size=(21, 21))}
-            return {"icon": None}  # Return dict with None icon if file doesn't exist
+            return {"icon": assets.image(name, (21, 21))}  # None if the file doesn't exist
 
         for text in LayoutSettings.get_Action_layout():
             btn = ctk.CTkButton(
@@ -311,46 +393,48 @@ class LamsaApp(ctk.CTk):
                 fill=tk.X, padx=0, pady=(0, 5), before=self.textbox
             )
 
-        try:
-            # Create a thumbnail for the preview
-            img = Image.open(img_path)
-            img.thumbnail((30, 30))
-
-            # Store the thumbnail to prevent garbage collection
-            self.thumbnail_image = ImageTk.PhotoImage(img)
-
-            # Get filename for display
-            filename = os.path.basename(img_path)
-            if len(filename) > 20:
-                filename = filename[:17] + "..."
-
-            # Create preview layout
-            preview_label = ctk.CTkLabel(
-                self.attachment_preview,
-                text=filename,
-                image=self.thumbnail_image,
-                compound="left",
-                padx=5,
-                pady=2,
-                font=("Segoe UI", 10),
-            )
-            preview_label.pack(side=tk.LEFT, padx=5)
-
-            # Add remove button
-            remove_btn = ctk.CTkButton(
-                self.attachment_preview,
-                text="✕",
-                width=20,
-                height=20,
-                fg_color="transparent",
-                hover_color=self.theme_manager.hover_bg,
-                text_color=self.theme_manager.font_Secondary,
-                command=self.remove_attachment,
-            )
-            remove_btn.pack(side=tk.RIGHT, padx=5)
+        # Get filename for display
+        filename = os.path.basename(img_path)
+        if len(filename) > 20:
+            filename = filename[:17] + "..."
 
-        except Exception as e:
-            print(f"Error creating preview: {e}")
+        def on_thumbnail(image, size):
+            if preview_label.winfo_exists():
+                preview_label.configure(image=image)
+
+        # The thumbnail is decoded in the background; show a placeholder until then
+        cached = self.image_loader.load(
+            img_path, "preview", on_thumbnail, owner="attachment_preview"
+        )
+
+        # Create preview layout
+        preview_label = ctk.CTkLabel(
+            self.attachment_preview,
+            text=filename,
+            image=(
+                cached[0]
+                if cached
+                else self.image_loader.placeholder("preview", self.theme_manager.hover_bg)
+            ),
+            compound="left",
+            padx=5,
+            pady=2,
+            font=("Segoe UI", 10),
+        )
+        preview_label.pack(side=tk.LEFT, padx=5)
+
+        # Add remove button
+        remove_btn = ctk.CTkButton(
+            self.attachment_preview,
+            text="✕",
+            width=20,
+            height=20,
+            fg_color="transparent",
+            hover_color=self.theme_manager.hover_bg,
+            text_color=self.theme_manager.font_Secondary,
+            command=self.remove_attachment,
+        )
+        remove_btn.pack(side=tk.RIGHT, padx=5)
 
     def remove_attachment(self):
         global imgFile
@@ -363,6 +447,8 @@ class LamsaApp(ctk.CTk):
                 text_color=self.theme_manager.font_Secondary,
             )
 
+        self.image_loader.release("attachment_preview")
+
         # Hide preview
         if (
             hasattr(self, "attachment_preview")
@@ -372,220 +458,164 @@ class LamsaApp(ctk.CTk):
 
     def display_user_message(self, message, imgFile):
         """Display a message from the user in the chat frame with styled label and optional image."""
-        # Main container for the whole message (text + optional image) set to fixed width (348px)
-        message_container = ctk.CTkFrame(
-            self.chat_scroll,
-            width=348,
-            fg_color="transparent",
+        chat_message = self.chat_list.append(
+            ChatMessage("user", message, image_path=imgFile)
         )
-        message_container.message_source = "user"
-        message_container.pack(fill=tk.X, padx=0, pady=(10, 15), anchor=tk.E)
-
-        # --- Optional image container ---
-        if imgFile:
-            try:
-                # Load and resize image maintaining aspect ratio
-                img = Image.open(imgFile)
-                original_width, original_height = img.size
-                max_width = 348
-                scale = max_width / original_width
-                new_height = int(original_height * scale)
-
-                # Resize image first
-                img = img.resize((max_width, new_height), Image.Resampling.LANCZOS)
-
-                # Apply rounded corners (with a radius of 9 pixels)
-                # Ensure image has an alpha channel
-                img = img.convert("RGBA")
-                w, h = img.size
-
-                # Create a mask
-                mask = Image.new("L", (w, h), 0)
-                draw = ImageDraw.Draw(mask)
-                # Draw a rounded rectangle on the mask (filled white)
-                draw.rounded_rectangle((0, 0, w, h), radius=9, fill=255)
-
-                # Apply the mask to the image
-                img.putalpha(mask)
-
-                # Create a CTkImage from the processed image
-                ctk_img = ctk.CTkImage(
-                    light_image=img,
-                    dark_image=img,
-                    size=(max_width, new_height),
-                )
-
-                img_label = ctk.CTkLabel(
-                    message_container,
-                    text="",
-                    image=ctk_img,
-                    compound="top",
-                    justify="right",
-                    fg_color="transparent",
-                    corner_radius=9,
-                    padx=0,
-                    pady=10,
-                )
-                img_label.pack(fill=tk.Y, anchor=tk.E, padx=0, pady=10)
-
-            except Exception as e:
-                print(f"Error loading image: {e}")
-
-        message_label = ctk.CTkLabel(
-            message_container,
-            **ContentStyles.get_ChatLable_style(self.theme_manager, message),
-        )
-        message_label.pack(fill=tk.Y, anchor=tk.E, padx=0, pady=0)
 
         # Animate the message appearance
-        self.animate_message_appearance(message_container)
-        # Scroll to bottom
-        self.after(50, self.scroll_to_bottom)
+        if chat_message.view is not None:
+            self.animate_message_appearance(chat_message.view)
+        # The user's own message is always brought into view
+        self.scroll_to_bottom(force=True)
+
+    def load_chat_image(self, chat_message, on_ready, owner=None):
+        """
+        Image for a user message bubble: the cached image, or a placeholder
+        while it is decoded in the background; `on_ready(image)` then gets
+        the final one. Returns None if the image can't be read. The image
+        stays resident until `image_loader.release(owner)`.
+        """
+
+        def ready(image, size):
+            chat_message.image_size = size
+            on_ready(image)
+            # The bubble's height changed
+            self.chat_list.invalidate(chat_message)
+            if self.chat_list.messages and self.chat_list.messages[-1] is chat_message:
+                self.scroll_to_bottom()
+
+        cached = self.image_loader.load(
+            chat_message.image_path, "bubble", ready, owner=owner
+        )
+        if cached is not None:
+            chat_message.image_size = cached[1]
+            return cached[0]
+        if not os.path.exists(chat_message.image_path):
+            return None
+        # Sized like the real image when it was shown before (e.g. evicted)
+        return self.image_loader.placeholder(
+            "bubble", self.theme_manager.base_bg, chat_message.image_size
+        )
 
     def display_ai_response(self, message):
         """Display a response from the AI in the chat frame with improved layout"""
         # Clean extra newlines before processing
-        message = message.strip()  # Remove leading/trailing whitespace
-        message = "\n".join(
-            line for line in message.splitlines() if line.strip()
-        )  # Remove empty lines
+        message = clean_response_text(message)
 
-        # Create a single message frame for all content
-        message_frame = ctk.CTkFrame(
-            self.chat_scroll,
-            width=348,
-            fg_color="transparent",
-        )
-        message_frame.message_source = "ai"
-        message_frame.pack(fill=tk.Y, padx=0, pady=(10, 15), anchor=tk.W)
+        chat_message = self.chat_list.append(ChatMessage("ai", message))
 
-        # Create an inner frame to contain all message components (aligned left)
-        content_frame = ctk.CTkFrame(
-            message_frame,
-            fg_color="transparent",
-            width=328,
-        )
-        content_frame.pack(side=tk.LEFT, padx=10)
+        # Animate the message appearance
+        if chat_message.view is not None:
+            self.animate_message_appearance(chat_message.view)
 
-        # Render the message content within the content frame
-        self.render_gemini_message(content_frame, message)
+        if chat_message.view is not None and chat_message.view.rendering:
+            # Long answer: show its beginning while the rest is rendered
+            self.layout.scroll_with(lambda: self.chat_list.scroll_to(chat_message))
+        else:
+            self.scroll_to_bottom()
 
-        # Add copy icon under the response
-        self.add_copy_icon(message_frame, message)
+    def stream_ai_response(self, waiting_message, cancel_token):
+        """Return (on_chunk, on_done, on_error) callbacks that render a streamed response"""
+        stream = {"message": None}
 
-        # Animate the message appearance
-        self.animate_message_appearance(message_frame)
-
-        # Scroll to bottom after a short delay
-        self.after(50, self.scroll_to_bottom)
-
-    def render_gemini_message(self, parent_frame, message):
-        """Render message content with proper formatting for code blocks and text"""
-        import re
-
-        lines = message.splitlines()
-        in_code_block = False
-        code_lines = []
-        current_text_block = []
-
-        def render_text_block():
-            if current_text_block:
-                text_content = "\n".join(current_text_block)
-                text_label = ctk.CTkLabel(
-                    parent_frame,
-                    **ContentStyles.get_Ai_Response_style(
-                        self.theme_manager, text_content
-                    ),
-                )
-                text_label.pack(fill=tk.X, padx=0, pady=(0, 5), anchor=tk.W)
-                current_text_block.clear()
-
-        for line in lines:
-            # Handle code block delimiters
-            if line.strip().startswith("```"):
-                # If we have text content pending, render it before the code block
-                render_text_block()
-
-                in_code_block = not in_code_block
-
-                # When exiting a code block, render it
-                # if not in_code_block and code_lines:
-                #     code_text = "\n".join(code_lines)
-                #     code_frame = ctk.CTkFrame(
-                #         parent_frame,
-                #         **ContentStyles.get_Code_container_style(self.theme_manager),
-                #     )
-                #     code_frame.pack(fill=tk.X, padx=0, pady=(0, 5), anchor=tk.W)
-
-                #     code_label = ctk.CTkLabel(
-                #         code_frame,
-                #         **ContentStyles.get_Code_label_style(
-                #             self.theme_manager, code_text
-                #         ),
-                #     )
-                #     code_label.pack(fill=tk.X, padx=0, pady=0)
-                #     code_lines.clear()
-                # When exiting a code block, render it
-                if not in_code_block and code_lines:
-                    code_text = "\n".join(code_lines)
-                    code_frame = ctk.CTkFrame(
-                        parent_frame,
-                        **ContentStyles.get_Code_container_style(self.theme_manager),
-                    )
-                    # Add attribute to identify this as a code container
-                    code_frame.is_code_container = True
-                    code_frame.pack(fill=tk.X, padx=0, pady=(0, 5), anchor=tk.W)
-
-                    code_label = ctk.CTkLabel(
-                        code_frame,
-                        **ContentStyles.get_Code_label_style(
-                            self.theme_manager, code_text
-                        ),
-                    )
-                    # Add attribute to identify this as a code label
-                    code_label.is_code_label = True
-                    code_label.pack(fill=tk.X, padx=0, pady=0)
-                    code_lines.clear()
+        def remove_waiting_message():
+            self.chat_list.remove(waiting_message)
 
-                continue
+        def finish_message():
+            chat_message = stream["message"]
+            if chat_message is None or not chat_message.streaming:
+                return chat_message is not None
 
-            # Collect code lines or text lines
-            if in_code_block:
-                code_lines.append(line)
-            else:
-                # Handle basic markdown-like formatting
-                if line.strip().startswith("- "):
-                    line = "• " + line.strip()[2:]
-
-                # Clean up markdown formatting (just remove for now)
-                clean_line = re.sub(r"\*\*(.*?)\*\*", r"\1", line)
-                current_text_block.append(clean_line)
-
-        # Handle any remaining text after processing all lines
-        render_text_block()
-
-        # Handle any unfinished code block (in case message ended without closing ```)
-        if code_lines:
-            code_text = "\n".join(code_lines)
-            code_frame = ctk.CTkFrame(
-                parent_frame,
-                **ContentStyles.get_Code_container_style(self.theme_manager),
+            self.chat_list.finish_stream(
+                chat_message, clean_response_text(chat_message.text)
             )
-            code_frame.pack(fill=tk.X, padx=0, pady=(0, 5), anchor=tk.W)
+            self.scroll_to_bottom()
+            return True
 
-            code_label = ctk.CTkLabel(
-                code_frame,
-                **ContentStyles.get_Code_label_style(self.theme_manager, code_text),
-            )
-            code_label.pack(fill=tk.X, padx=0, pady=0)
+        def on_stop():
+            cancel_token.cancel()
+            remove_waiting_message()
+            # Keep whatever was already streamed
+            finish_message()
+
+        def on_chunk(chunk):
+            if cancel_token.cancelled:
+                return
+
+            if stream["message"] is None:
+                # First chunk: replace the waiting message with the AI message
+                remove_waiting_message()
+                stream["message"] = self.chat_list.append(
+                    ChatMessage("ai", streaming=True, on_stop=on_stop)
+                )
+                if stream["message"].view is not None:
+                    self.animate_message_appearance(stream["message"].view)
+
+            self.chat_list.feed(stream["message"], chunk)
+            self.scroll_to_bottom()
+
+        def on_done(elapsed):
+            if cancel_token.cancelled:
+                return
+            remove_waiting_message()
+            if not finish_message():
+                self.display_system_message("No response received from Gemini API.")
+
+        def on_error(error, elapsed):
+            if cancel_token.cancelled:
+                return
+            remove_waiting_message()
+            finish_message()
+            self.display_system_message(self.describe_error(error))
+
+        # Let the user stop the request while it is still waiting
+        waiting_message.on_stop = on_stop
+        self.chat_list.refresh(waiting_message)
 
-    def add_copy_icon(self, parent_frame, message):
-        """Add a small copy text icon under the response frame"""
+        return on_chunk, on_done, on_error
+
+    def add_stop_button(self, parent_frame, on_stop, on_widget=None):
+        """Add a small Stop action that cancels a pending response"""
+        stop_button = ctk.CTkLabel(
+            parent_frame,
+            text="■ Stop",
+            font=("Jura", 13),
+            text_color=self.theme_manager.font_Main,
+            fg_color="transparent",
+            cursor="hand2",
+        )
+        # Pack ahead of the existing content so it sits underneath it
+        packed = parent_frame.pack_slaves()
+        stop_button.pack(
+            side=tk.BOTTOM,
+            anchor=tk.W,
+            padx=10,
+            pady=(3, 0),
+            **({"before": packed[0]} if packed else {}),
+        )
+        stop_button.bind("<Button-1>", lambda e: on_stop())
+
+        def on_enter(e):
+            stop_button.configure(text_color=self.theme_manager.tertiaryColor_OFF)
+
+        def on_leave(e):
+            stop_button.configure(text_color=self.theme_manager.font_Main)
+
+        stop_button.bind("<Enter>", on_enter)
+        stop_button.bind("<Leave>", on_leave)
+        if on_widget:
+            on_widget(stop_button, "font_Main")
+        return stop_button
+
+    def add_copy_icon(self, parent_frame, message, on_widget=None):
+        """
+        Add a small copy text icon under the response frame and return its
+        frame. `message` is the text to copy, or a callable returning it.
+        """
 
         def copy_to_clipboard():
             self.clipboard_clear()
-            self.clipboard_append(message)
-            self.update()
+            self.clipboard_append(message() if callable(message) else message)
 
             # Optional: Show feedback tooltip or briefly change icon to indicate copying
             original_text = copy_icon.cget("text")
@@ -629,59 +659,36 @@ class LamsaApp(ctk.CTk):
 
         copy_icon.bind("<Enter>", on_enter)
         copy_icon.bind("<Leave>", on_leave)
+        if on_widget:
+            on_widget(copy_icon, "font_Secondary")
+        return icon_frame
 
-    def display_system_message(self, message):
+    def display_system_message(self, message, on_stop=None):
         """Display a system message in the chat frame"""
-        message_frame = ctk.CTkFrame(
-            self.chat_scroll,
-            width=348,
-            fg_color="transparent",
-        )
-        message_frame.pack(fill=tk.X, padx=0, pady=(10, 15), anchor=tk.W)
-
-        # Message content
-        message_label = ctk.CTkLabel(
-            message_frame,
-            **ContentStyles.get_Ai_Response_style(self.theme_manager, message),
-        )
-        message_label.pack(
-            side=tk.BOTTOM,
-            fill=tk.Y,
-            anchor=tk.W,
-            padx=0,
-            pady=0,
+        chat_message = self.chat_list.append(
+            ChatMessage("system", message, on_stop=on_stop)
         )
 
-        # Scroll to bottom
-        self.chat_scroll.update()
-        self.chat_scroll._parent_canvas.yview_moveto(1.0)
+        self.scroll_to_bottom()
 
-        # Return the frame so we can remove it later
-        return message_frame
+        # Return the message so we can remove it later
+        return chat_message
 
-    def animate_message_appearance(self, widget, opacity=0):
-        """Animate the appearance of a message by fading it in"""
-        if opacity <= 1.0:
-            # Set the widget's opacity
-            widget.configure(
-                fg_color=self.adjust_color_opacity(widget.cget("fg_color"), opacity)
+    def animate_message_appearance(self, view):
+        """Fade a message view in from the chat background"""
+        if self.fade_table is None:
+            # Built once per theme, shared by every fade
+            self.fade_table = fade_in_table(
+                theme_colors(self.theme_manager), self.message_animation_steps
             )
-            # Schedule the next animation step
-            self.after(
-                self.message_animation_delay,
-                lambda: self.animate_message_appearance(widget, opacity + 0.1),
-            )
-
-    def adjust_color_opacity(self, color, opacity):
-        """Adjust a color's opacity (for animation effects)"""
-        if color == "transparent":
-            return color
-
-        try:
-            rgb = ImageColor.getrgb(color)
-            return f"#{rgb[0]:02x}{rgb[1]:02x}{rgb[2]:02x}{int(opacity * 255):02x}"
-        except:
-            return color
+        self.animations.cancel(view.frame)
+        TransitionAnimator(
+            self.animations,
+            self.fade_table,
+            self.theme_registry.entries(view.theme_owners),
+            duration=self.message_animation_duration,
+            widget=view.frame,
+        ).start()
 
     def start_conversation(self):
         """Switch from initial screen to chat interface"""
@@ -692,27 +699,33 @@ class LamsaApp(ctk.CTk):
         if hasattr(self, "chat_scroll") and not self.chat_scroll.winfo_ismapped():
             self.chat_scroll.pack(fill=tk.BOTH, expand=True, padx=0, pady=10)
 
-    def scroll_to_bottom(self):
-        """Ensure the chat view scrolls to the most recent message"""
-        if hasattr(self, "chat_scroll") and self.chat_scroll.winfo_exists():
-            self.chat_scroll.update()
-            self.chat_scroll._parent_canvas.yview_moveto(1.0)
+    def scroll_to_bottom(self, force=False):
+        """
+        Scroll to the most recent message once the layout is done, if the
+        view is at the bottom already (or `force`)
+        """
+        self.layout.scroll_to_bottom(force)
 
-    def sendRequest(self):
-        # Get current connection status from the monitor
-        is_connected = connection_monitor.is_connected
-        if not is_connected:
+    def count_forced_updates(self):
+        """
+        Count every Tcl `update` (idletasks or not), whichever widget or
+        library calls it, until `restore_update`
+        """
+        self.tk.call("rename", "update", "::lamsa_tcl_update")
 
-            def Mbox(title, text, style):
-                return ctypes.windll.user32.MessageBoxW(0, text, title, style)
+        def update(*args):
+            self.forced_updates += 1
+            return self.tk.call("::lamsa_tcl_update", *args)
 
-            Mbox(
-                "Internet Issue",
-                "No internet connection. Please check your connection.",
-                0,
-            )
-            return
+        self.tk.createcommand("update", update)
 
+    def restore_update(self):
+        """Put back the Tcl `update` replaced by count_forced_updates"""
+        if self.tk.call("info", "commands", "::lamsa_tcl_update"):
+            self.tk.deletecommand("update")
+            self.tk.call("rename", "::lamsa_tcl_update", "update")
+
+    def sendRequest(self):
         global imgFile, textPrompt
         textPrompt = self.textbox.get("1.0", "end-1c")
 
@@ -761,51 +774,230 @@ class LamsaApp(ctk.CTk):
             text_color=self.theme_manager.font_Secondary,
         )
 
+        # Offline (or earlier prompts still queued): keep it for later, in order.
+        # Before the first check the state is unknown (None): try sending.
+        if connection_monitor.is_connected is False or len(self.offline_queue):
+            self.queue_offline_prompt(textPrompt, imgFile)
+            imgFile = None
+            textPrompt = None
+            return
+
         # Show processing message
         processing_msg = "Waiting for response..."
-        waiting_frame = self.display_system_message(processing_msg)
+        waiting_message = self.display_system_message(processing_msg)
+
+        # Run the Gemini call in the background so the window stays responsive
+        cancel_token = CancelToken()
+        if self.stream_responses:
+            on_chunk, on_done, on_error = self.stream_ai_response(
+                waiting_message, cancel_token
+            )
+            self.request_dispatcher.submit_stream(
+                streamGeminiResponse,
+                imgFile,
+                textPrompt,
+                chatSession=self.chat_session,
+                cancelToken=cancel_token,
+                on_chunk=on_chunk,
+                on_done=on_done,
+                on_error=on_error,
+            )
+        else:
+
+            def on_stop():
+                cancel_token.cancel()
+                self.chat_list.remove(waiting_message)
+
+            waiting_message.on_stop = on_stop
+            self.chat_list.refresh(waiting_message)
+            self.request_dispatcher.submit(
+                requestGeminiResponse,
+                imgFile,
+                textPrompt,
+                chatSession=self.chat_session,
+                cancelToken=cancel_token,
+                on_done=lambda response, elapsed: self.on_response_ready(
+                    waiting_message, response, elapsed, cancel_token=cancel_token
+                ),
+                on_error=lambda error, elapsed: self.on_response_ready(
+                    waiting_message, None, elapsed, error, cancel_token
+                ),
+            )
+
+        imgFile = None  # Reset image file after dispatching
+        textPrompt = None  # Reset text prompt after dispatching
+
+    def on_response_ready(
+        self, waiting_message, geminiResponse, elapsed, error=None, cancel_token=None
+    ):
+        """Show a finished request in the chat (runs on the Tk main thread)"""
+        # A stopped request has already been removed from the chat
+        if cancel_token is not None and cancel_token.cancelled:
+            return
+
+        # Ensure minimum wait time of 1 second without blocking the event loop
+        if elapsed < 1.0:
+            self.after(
+                int((1.0 - elapsed) * 1000),
+                lambda: self.on_response_ready(
+                    waiting_message, geminiResponse, 1.0, error, cancel_token
+                ),
+            )
+            return
 
-        # Force update to show the waiting message
-        self.update_idletasks()
+        # Remove the waiting message
+        self.chat_list.remove(waiting_message)
 
-        # Ensure at least 1 second of waiting time
-        start_time = time.time()
+        if error is not None:
+            self.display_system_message(self.describe_error(error))
+        elif geminiResponse:
+            # Display the AI response in chat
+            self.display_ai_response(geminiResponse)
+        else:
+            self.display_system_message("No response received from Gemini API.")
 
+    def describe_error(self, error):
+        """User-facing text for a failed request"""
+        if isinstance(error, GeminiError):
+            return error.userMessage
+        return f"Error: {str(error)}"
+
+    def queue_offline_prompt(self, text_prompt, image_path):
+        """Keep a prompt in the offline queue and show it as pending in the chat"""
         try:
-            # Call Gemini API
-            geminiResponse = generateGeminiResponse(imgFile, textPrompt)
+            entry = self.offline_queue.put(text_prompt, image_path)
+        except OSError as e:
+            self.display_system_message(f"Error: the message could not be queued ({e})")
+            return
+        self.offline_notices[entry["id"]] = self.display_system_message(
+            OFFLINE_NOTICE
+        )
+        if connection_monitor.is_connected:
+            self.drain_offline_queue()
+        else:
+            connection_monitor.check_now()
+
+    def show_offline_queue(self):
+        """Show prompts left queued by a previous run as pending"""
+        for entry in self.offline_queue.entries():
+            self.start_conversation()
+            self.display_user_message(entry["prompt"], entry["image"])
+            if entry["image"]:
+                self.offline_shown.add(entry["id"])
+            self.offline_notices[entry["id"]] = self.display_system_message(
+                OFFLINE_NOTICE
+            )
 
-            # Ensure minimum wait time of 1 second
-            elapsed = time.time() - start_time
-            if elapsed < 1.0:
-                time.sleep(1.0 - elapsed)
+    def drain_offline_queue(self):
+        """Send queued prompts in order, at most `offline_concurrency` at a time"""
+        self.offline_retry_job = None
+        if not connection_monitor.is_connected:
+            return
+        # Each prompt of a conversation needs the answers to the earlier ones
+        limit = 1 if self.chat_session is not None else self.offline_concurrency
+        for entry in self.offline_queue.entries():
+            if len(self.offline_in_flight) >= limit:
+                break
+            entry_id = entry["id"]
+            if entry_id in self.offline_in_flight or entry_id in self.offline_results:
+                continue
+
+            self.offline_in_flight.add(entry_id)
+            self.set_offline_notice(entry_id, "Waiting for response...")
+            self.request_dispatcher.submit(
+                requestGeminiResponse,
+                entry["image"],
+                entry["prompt"],
+                chatSession=self.chat_session,
+                on_done=lambda response, elapsed, entry_id=entry_id: (
+                    self.on_queued_response(entry_id, response, None)
+                ),
+                on_error=lambda error, elapsed, entry_id=entry_id: (
+                    self.on_queued_response(entry_id, None, error)
+                ),
+            )
 
-            # Remove the waiting message
-            if waiting_frame and waiting_frame.winfo_exists():
-                waiting_frame.destroy()
+    def set_offline_notice(self, entry_id, text):
+        notice = self.offline_notices.get(entry_id)
+        if notice is not None:
+            notice.text = text
+            self.chat_list.refresh(notice)
+
+    def on_queued_response(self, entry_id, response, error):
+        """A queued prompt was answered; show answers in queue order"""
+        self.offline_in_flight.discard(entry_id)
+        if isinstance(error, GeminiError) and (
+            error.retryable or error.kind == "circuit_open"
+        ):
+            # Offline again or Gemini busy: leave it queued and try again later
+            self.set_offline_notice(entry_id, OFFLINE_NOTICE)
+            if error.kind == "network":
+                connection_monitor.check_now()
+            self.retry_offline_queue(error.retryAfter)
+            return
 
-            if geminiResponse:
-                # Display the AI response in chat
-                self.display_ai_response(geminiResponse)
+        self.offline_results[entry_id] = (response, error)
+        for entry in self.offline_queue.entries():
+            if entry["id"] not in self.offline_results:
+                break  # An earlier prompt is still waiting for its answer
+            response, error = self.offline_results.pop(entry["id"])
+            # The chat keeps showing the image copy of a restored entry
+            shown = entry["id"] in self.offline_shown
+            self.offline_shown.discard(entry["id"])
+            self.offline_queue.remove(entry["id"], keepImage=shown)
+            if shown:
+                self.offline_kept_images.append(entry["image"])
+            notice = self.offline_notices.pop(entry["id"], None)
+            if notice is not None:
+                self.chat_list.remove(notice)
+            if error is not None:
+                self.display_system_message(self.describe_error(error))
+            elif response:
+                self.display_ai_response(response)
             else:
                 self.display_system_message("No response received from Gemini API.")
 
-            imgFile = None  # Reset image file after processing
-            textPrompt = None  # Reset text prompt after processing
-
-        except Exception as e:
-            # Remove the waiting message
-            if waiting_frame and waiting_frame.winfo_exists():
-                waiting_frame.destroy()
+        self.drain_offline_queue()
 
-            error_message = f"Error: {str(e)}"
-            self.display_system_message(error_message)
-            import traceback
+    def retry_offline_queue(self, retry_after=None):
+        """Drain the queue again after `retry_after` seconds (default `offline_retry_delay`)"""
+        delay = (
+            self.offline_retry_delay
+            if retry_after is None
+            else int(retry_after * 1000)
+        )
+        if self.offline_retry_job is not None:
+            self.after_cancel(self.offline_retry_job)
+        self.offline_retry_job = self.after(delay, self.drain_offline_queue)
+
+    def on_connection_change(self, is_connected):
+        """Connection monitor callback (monitor thread): only touches the queue"""
+        self.connection_events.put(is_connected)
+
+    def poll_connection_events(self):
+        """Handle the latest connection change posted by the monitor (Tk main thread)"""
+        self.connection_poll_job = None
+        changed = False
+        while True:
+            try:
+                is_connected = self.connection_events.get_nowait()
+            except queue.Empty:
+                break
+            changed = True
+        if changed:
+            self.connection_changed(is_connected)
+        self.connection_poll_job = self.after(
+            self.connection_poll_interval, self.poll_connection_events
+        )
 
-            traceback.print_exc()
+    def connection_changed(self, is_connected):
+        self.refresh_connection_button()
+        if is_connected:
+            # Back online: send what was written meanwhile
+            self.drain_offline_queue()
 
-    def update_connection_status(self):
-        """Update the connection status button based on internet connectivity"""
+    def refresh_connection_button(self):
+        """Color the connection status button for the current connectivity"""
         if self.connection_button:
             # Get current connection status from the monitor
             is_connected = connection_monitor.is_connected
@@ -822,9 +1014,6 @@ class LamsaApp(ctk.CTk):
                 fg_color=new_color, hover_color=new_color  # Same color for hover state
             )
 
-        # Schedule the next update (every 1000ms = 1 second)
-        self.after(1000, self.update_connection_status)
-
     def select_option_button(self, selected_text):
         global textPrompt
         textPrompt = selected_text
@@ -850,262 +1039,101 @@ class LamsaApp(ctk.CTk):
         focused_widget = self.focus_get()
 
         self.transitioning = True
+        # Fades would finish in the old theme's colors
+        self.animations.cancel()
+        self.fade_table = None
         self.save_current_colors()
         self.theme_manager.toggle_theme()
         ctk.set_appearance_mode(self.theme_manager.get_theme_mode())
 
         self.theme_toggle.configure(image=self.theme_manager.get_theme_icon())
-        self.animate_color_transition(0)
-        self.after(
-            self.animation_steps * self.animation_delay + 150,
-            lambda: [
-                self.update_all_widget_colors(),
-                setattr(self, "transitioning", False),
-                # Restore focus if widget still exists
-                (
-                    focused_widget.focus_set()
-                    if focused_widget and focused_widget.winfo_exists()
-                    else None
-                ),
-            ],
+        # Every color of every step is computed here, ticks only look them up
+        self.theme_transition = TransitionTable(
+            self.old_colors, theme_colors(self.theme_manager), self.animation_steps
         )
-
-    def animate_color_transition(self, step):
-        if step <= self.animation_steps:
-            factor = step / self.animation_steps
-            self.update_colors_with_transition(factor)
-            self.update_chat_messages(factor)
-            self.after(
-                self.animation_delay, lambda: self.animate_color_transition(step + 1)
+        animated, snapped = self.theme_transition_items()
+        self.theme_animator = TransitionAnimator(
+            self.animations,
+            self.theme_transition,
+            animated,
+            snapped,
+            duration=self.animation_steps * self.animation_delay,
+            on_done=lambda stats: self.on_theme_transition_done(stats, focused_widget),
+        ).start()
+
+    def on_theme_transition_done(self, stats, focused_widget):
+        self.transition_stats = stats
+        if self.debug:
+            print(
+                f"Theme transition: {stats['fps']:.0f} FPS, "
+                f"worst frame {stats['worst_frame_ms']:.1f} ms, "
+                f"{stats['dropped_steps']} steps dropped"
             )
+        # The connection button was left out of the transition
+        self.refresh_connection_button()
+        self.transitioning = False
+        # Restore focus if widget still exists
+        if focused_widget and focused_widget.winfo_exists():
+            focused_widget.focus_set()
 
-    def update_all_widget_colors(self):
-        self.configure(fg_color=self.theme_manager.primaryColor)
-        for widget, role in self.widget_refs:
-            self.update_widget_color(widget, role, 1.0)
-
-        # Update connection status after theme change
-        self.update_connection_status()
-
-        # Ensure all chat messages, including those inside code containers,
-        # are updated to use the new theme.
-        self.update_chat_messages(1.0)
-
-    def update_colors_with_transition(self, factor):
-        transition_primary = self.interpolate_color(
-            self.old_colors["primaryColor"],
-            normalize_color(self.theme_manager.primaryColor),
-            factor,
-        )
-        self.configure(fg_color=transition_primary)
+    def theme_transition_items(self):
+        """(widget, role) pairs to animate, and those to set straight to the new theme"""
+        animated = [(self, "window")]
         for widget, role in self.widget_refs:
-            self.update_widget_color(widget, role, factor)
-
-    def update_widget_color(self, widget, role, factor):
-        role_map = {
-            "primaryColor": normalize_color(self.theme_manager.primaryColor),
-            "secondaryColor": normalize_color(self.theme_manager.secondaryColor),
-            "tertiaryColor_ON": normalize_color(self.theme_manager.tertiaryColor_ON),
-            "tertiaryColor_OFF": normalize_color(self.theme_manager.tertiaryColor_OFF),
-            "font_Main": normalize_color(self.theme_manager.font_Main),
-            "font_Secondary": normalize_color(self.theme_manager.font_Secondary),
-            "font_Tertiary": normalize_color(self.theme_manager.font_Tertiary),
-            "base_bg": normalize_color(self.theme_manager.base_bg),
-            "hover_bg": normalize_color(self.theme_manager.hover_bg),
-            "active_bg": normalize_color(self.theme_manager.active_bg),
-            "code_bg": normalize_color(self.theme_manager.code_bg),
-            "code_font": normalize_color(self.theme_manager.code_font),
-        }
-
-        if role in ("font_Main", "font_Secondary", "font_Tertiary"):
-            old = self.old_colors[role]
-            new = role_map[role]
-            widget.configure(text_color=self.interpolate_color(old, new, factor))
-
-        elif role == "base_bg" or role == "secondaryColor":
-            old = self.old_colors[role]
-            new = role_map[role]
-            widget.configure(fg_color=self.interpolate_color(old, new, factor))
-
-        elif role == "action_container":
-            old_fg = self.old_colors["secondaryColor"]
-            new_fg = role_map["secondaryColor"]
-            old_border = self.old_colors["base_bg"]
-            new_border = role_map["base_bg"]
-            widget.configure(
-                fg_color=self.interpolate_color(old_fg, new_fg, factor),
-                border_color=self.interpolate_color(old_border, new_border, factor),
-            )
-
+            role = self.transition_role(widget, role)
+            if role is not None:
+                animated.append((widget, role))
+
+        # Only chat messages in the viewport are animated
+        on_screen = self.chat_list.theme_owners_in_viewport()
+        animated.extend(self.theme_registry.entries(on_screen))
+        off_screen = set(self.theme_registry.owners()) - set(on_screen)
+        return animated, list(self.theme_registry.entries(off_screen))
+
+    def transition_role(self, widget, role):
+        """Style role used for `widget` during a theme transition, or None to skip it"""
         # Separate handling for option buttons: maintain active colors if selected
-        elif role == "option_button":
-            if widget.cget("text") == textPrompt:
-                old_fg = self.old_colors["active_bg"]
-                new_fg = role_map["active_bg"]
-                old_hover = self.old_colors["hover_bg"]
-                new_hover = role_map["hover_bg"]
-                old_text = self.old_colors["font_Tertiary"]
-                new_text = role_map["font_Tertiary"]
-                widget.configure(
-                    fg_color=self.interpolate_color(old_fg, new_fg, factor),
-                    hover_color=self.interpolate_color(old_hover, new_hover, factor),
-                    text_color=self.interpolate_color(old_text, new_text, factor),
-                )
-            else:
-                old_fg = self.old_colors["base_bg"]
-                new_fg = role_map["base_bg"]
-                old_hover = self.old_colors["hover_bg"]
-                new_hover = role_map["hover_bg"]
-                old_text = self.old_colors["font_Secondary"]
-                new_text = role_map["font_Secondary"]
-                widget.configure(
-                    fg_color=self.interpolate_color(old_fg, new_fg, factor),
-                    hover_color=self.interpolate_color(old_hover, new_hover, factor),
-                    text_color=self.interpolate_color(old_text, new_text, factor),
-                )
+        if role == "option_button" and widget.cget("text") == textPrompt:
+            return "option_button_selected"
 
-        elif role == "action_button":
-            # Skip updating the SelectFile_button so its colors remain unchanged
-            if widget == self.SelectFile_button and imgFile:
-                return
+        # Skip updating the SelectFile_button so its colors remain unchanged
+        if role == "action_button" and widget == self.SelectFile_button and imgFile:
+            return None
 
-            old_fg = self.old_colors["base_bg"]
-            new_fg = role_map["base_bg"]
-            old_hover = self.old_colors["hover_bg"]
-            new_hover = role_map["hover_bg"]
-            old_text = self.old_colors["font_Secondary"]
-            new_text = role_map["font_Secondary"]
-            widget.configure(
-                fg_color=self.interpolate_color(old_fg, new_fg, factor),
-                hover_color=self.interpolate_color(old_hover, new_hover, factor),
-                text_color=self.interpolate_color(old_text, new_text, factor),
-            )
+        # Skip connection button during theme transition as it will be updated separately
+        if role == "status_button" and widget == self.connection_button:
+            return None
 
-        elif role == "status_button":
-            # Skip connection button during theme transition as it will be updated separately
-            if widget == self.connection_button:
-                return
-
-            old = self.old_colors["tertiaryColor_OFF"]
-            new = role_map["tertiaryColor_OFF"]
-            color = self.interpolate_color(old, new, factor)
-            widget.configure(fg_color=color, hover_color=color)
-
-        elif role == "textbox":
-            old_fg = self.old_colors["base_bg"]
-            new_fg = role_map["base_bg"]
-            old_text = self.old_colors["font_Secondary"]
-            new_text = role_map["font_Secondary"]
-            old_border = self.old_colors["hover_bg"]
-            new_border = role_map["hover_bg"]
-
-            widget.configure(
-                fg_color=self.interpolate_color(old_fg, new_fg, factor),
-                text_color=self.interpolate_color(old_text, new_text, factor),
-                border_color=self.interpolate_color(old_border, new_border, factor),
-            )
-
-        # Add handling for chat frame
-        elif role == "chat_frame":
-            old_fg = self.old_colors["primaryColor"]
-            new_fg = role_map["primaryColor"]
-            widget.configure(fg_color=self.interpolate_color(old_fg, new_fg, factor))
-
-        # Add handling for attachment preview
-        elif role == "attachment_preview":
-            old_fg = self.old_colors["base_bg"]
-            new_fg = role_map["base_bg"]
-            old_border = self.old_colors["hover_bg"]
-            new_border = role_map["hover_bg"]
-
-            widget.configure(
-                fg_color=self.interpolate_color(old_fg, new_fg, factor),
-                border_color=self.interpolate_color(old_border, new_border, factor),
-            )
-
-        # Add handling for code container/ label
-        elif role == "code_container":
-            old_bg = self.old_colors["code_bg"]
-            new_bg = role_map["code_bg"]
-            widget.configure(fg_color=self.interpolate_color(old_bg, new_bg, factor))
-
-        elif role == "code_label":
-            old_text = self.old_colors["code_font"]
-            new_text = role_map["code_font"]
-            widget.configure(
-                text_color=self.interpolate_color(old_text, new_text, factor)
-            )
-
-    def update_chat_messages(self, factor):
-        if hasattr(self, "chat_scroll") and self.chat_scroll.winfo_exists():
-            for message_container in self.chat_scroll.winfo_children():
-                if isinstance(message_container, ctk.CTkFrame):
-                    # Determine message source
-                    message_source = getattr(
-                        message_container, "message_source", "unknown"
-                    )
-
-                    # Process based on source
-                    self.process_message_frame(
-                        message_container, factor, message_source
-                    )
-
-    def process_message_frame(self, frame, factor, message_source):
-        # If the frame is a code container, update its own background
-        if hasattr(frame, "is_code_container") and frame.is_code_container:
-            old_bg = self.old_colors["code_bg"]
-            new_bg = normalize_color(self.theme_manager.code_bg)
-            frame.configure(fg_color=self.interpolate_color(old_bg, new_bg, factor))
-
-        # Always process children, regardless of the frame type
-        for child in frame.winfo_children():
-            if isinstance(child, ctk.CTkFrame):
-                self.process_message_frame(child, factor, message_source)
-            elif isinstance(child, ctk.CTkLabel):
-                if hasattr(child, "is_code_label") and child.is_code_label:
-                    # Update code label text color
-                    old_text = self.old_colors["code_font"]
-                    new_text = normalize_color(self.theme_manager.code_font)
-                    child.configure(
-                        text_color=self.interpolate_color(old_text, new_text, factor)
-                    )
-                else:
-                    # Regular label update based on message source
-                    old_text = self.old_colors["font_Secondary"]
-                    new_text = normalize_color(self.theme_manager.font_Secondary)
-                    if message_source == "user":
-                        old_bg = self.old_colors["secondaryColor"]
-                        new_bg = normalize_color(self.theme_manager.secondaryColor)
-                    else:
-                        old_bg = self.old_colors["primaryColor"]
-                        new_bg = normalize_color(self.theme_manager.primaryColor)
-                    child.configure(
-                        fg_color=self.interpolate_color(old_bg, new_bg, factor),
-                        text_color=self.interpolate_color(old_text, new_text, factor),
-                    )
-
-    def interpolate_color(self, old_color, new_color, factor):
-        if old_color in (None, "transparent") or new_color in (None, "transparent"):
-            return new_color
-        try:
-            old_rgb = ImageColor.getrgb(old_color)
-            new_rgb = ImageColor.getrgb(new_color)
-            blended_rgb = tuple(
-                int(old_rgb[i] + (new_rgb[i] - old_rgb[i]) * factor) for i in range(3)
-            )
-            return f"#{blended_rgb[0]:02x}{blended_rgb[1]:02x}{blended_rgb[2]:02x}"
-        except:
-            return new_color
+        return role if role in WIDGET_STYLES else None
 
     def on_closing(self):
         """Clean up resources when closing the application"""
         # Stop the connection monitor
+        connection_monitor.unsubscribe(self.on_connection_change)
         connection_monitor.stop()
+        if self.connection_poll_job is not None:
+            self.after_cancel(self.connection_poll_job)
+        # Drop any pending requests
+        self.request_dispatcher.shutdown()
+        self.image_dispatcher.shutdown()
+        for path in self.offline_kept_images:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        if self.debug:
+            stats = self.layout.stats()
+            print(
+                f"Layout: {stats['passes']} passes for {stats['requests']} requests, "
+                f"{self.forced_updates} forced updates"
+            )
+        self.restore_update()
         # Destroy the window
         self.destroy()
 
 
 if __name__ == "__main__":
+    requireApiKey()
     app = LamsaApp()
     # Set up proper cleanup when closing the window
     app.protocol("WM_DELETE_WINDOW", app.on_closing)
@@ -0,0 +1,48 @@
+import json
+
+import Batch_Runner
+
+
+def write_lines(path, lines):
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def read_results(path):
+    with open(path, encoding="utf-8") as f:
+        return {result["id"]: result for result in map(json.loads, f)}
+
+
+def test_bad_lines_and_empty_responses_are_per_item_errors(tmp_path, monkeypatch):
+    replies = {"a": "answer", "b": None}
+    monkeypatch.setattr(
+        Batch_Runner,
+        "requestGeminiResponse",
+        lambda image, prompt, **kwargs: replies[prompt],
+    )
+    source = tmp_path / "prompts.jsonl"
+    output = tmp_path / "results.jsonl"
+    write_lines(
+        source,
+        [
+            json.dumps({"id": "a", "prompt": "a"}),
+            "",
+            "{not json",
+            json.dumps(["not", "an", "object"]),
+            json.dumps({"id": "b", "prompt": "b"}),
+        ],
+    )
+
+    counts = Batch_Runner.run_batch(str(source), str(output), concurrency=2)
+
+    results = read_results(output)
+    assert counts == {"ok": 1, "failed": 3, "skipped": 0}
+    assert results["a"]["error"] is None
+    assert results["line-3"]["error"].startswith("Malformed input line")
+    assert results["line-4"]["error"].startswith("Malformed input line")
+    assert results["b"]["error"] == "Empty response from Gemini"
+
+    # Resuming retries the unanswered prompt; malformed lines were reported already
+    replies["b"] = "late answer"
+    counts = Batch_Runner.run_batch(str(source), str(output), concurrency=2)
+    assert counts == {"ok": 1, "failed": 0, "skipped": 3}
+    assert Batch_Runner.completed_ids(str(output)) == {"a", "b"}
@@ -0,0 +1,28 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each exits with status 1 when its check fails
+BENCHMARKS = [
+    "Api_Probe",
+    "Image_Memory",
+    "Layout_Scheduler",
+    "Scheduler_Latency",
+    "Session_Latency",
+]
+
+
+@pytest.mark.parametrize("name", BENCHMARKS)
+def test_benchmark_passes_from_the_project_root(name):
+    result = subprocess.run(
+        [sys.executable, "-m", f"Benchmarks.{name}"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=300,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
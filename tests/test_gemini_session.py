@@ -0,0 +1,22 @@
+from BackEnd.GEMINI_BackEnd import GeminiSession
+from Benchmarks.Stub_Server import StubGeminiServer
+
+
+def test_sessions_keep_their_own_endpoint_and_key():
+    stubA = StubGeminiServer(reply="from A").start()
+    stubB = StubGeminiServer(reply="from B").start()
+    try:
+        sessionA = GeminiSession("key-A", transport="rest", apiEndpoint=stubA.endpoint)
+        sessionA.getModel()
+        sessionB = GeminiSession("key-B", transport="rest", apiEndpoint=stubB.endpoint)
+        sessionB.getModel()
+
+        assert sessionA.apiHost() == stubA.endpoint
+        assert sessionB.apiHost() == stubB.endpoint
+        assert sessionA.getModel().generate_content(["ping"]).text == "from A"
+        assert sessionB.getModel().generate_content(["ping"]).text == "from B"
+        assert stubA.apiKeys == {"key-A"}
+        assert stubB.apiKeys == {"key-B"}
+    finally:
+        stubA.stop()
+        stubB.stop()
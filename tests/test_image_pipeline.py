@@ -0,0 +1,31 @@
+import io
+
+import pytest
+from PIL import Image
+
+from BackEnd.Image_Pipeline import ImagePipeline
+
+
+def make_image(mode, size):
+    if mode == "P+transparency":
+        img = Image.new("P", size, 1)
+        img.putpalette([255, 0, 0, 0, 0, 255] + [0] * 762)
+        img.info["transparency"] = 0
+        return img
+    return Image.new(mode, size, 1)
+
+
+@pytest.mark.parametrize("mode", ["P", "P+transparency", "1", "I;16", "CMYK", "LA"])
+def test_large_images_of_any_mode_are_downscaled(tmp_path, mode):
+    path = tmp_path / "large.png"
+    if mode == "CMYK":
+        path = tmp_path / "large.jpg"
+    # Wide enough for the integer reduce() step before the final resize
+    make_image(mode, (1400, 600)).save(path)
+
+    payload = ImagePipeline(maxEdge=100).prepare(str(path))
+
+    with Image.open(io.BytesIO(payload)) as sent:
+        assert sent.format == "JPEG"
+        assert sent.mode == "RGB"
+        assert max(sent.size) == 100
@@ -0,0 +1,18 @@
+import os
+
+from BackEnd.Offline_Queue import OfflineQueue
+
+
+def test_remove_can_keep_the_image_copy(tmp_path):
+    image = tmp_path / "photo.png"
+    image.write_bytes(b"png")
+    queue = OfflineQueue(str(tmp_path / "outbox"))
+    first = queue.put("first", str(image))
+    second = queue.put("second", str(image))
+
+    queue.remove(first["id"], keepImage=True)
+    queue.remove(second["id"])
+
+    assert len(OfflineQueue(queue.queueDir)) == 0
+    assert os.path.exists(first["image"])
+    assert not os.path.exists(second["image"])
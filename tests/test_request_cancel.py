@@ -0,0 +1,42 @@
+import threading
+import time
+
+import pytest
+
+from BackEnd import GEMINI_BackEnd as backend
+from BackEnd.Request_Control import CancelToken
+from BackEnd.Resilience import GeminiError
+from Benchmarks.Stub_Server import StubGeminiServer
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    # About two seconds to send the whole answer
+    server = StubGeminiServer(reply="x" * 40, streamChunks=20, streamDelay=0.1).start()
+    session = backend.GeminiSession("test-key", transport="rest", apiEndpoint=server.endpoint)
+    monkeypatch.setattr(backend, "geminiSession", session)
+    yield server
+    server.stop()
+
+
+def test_answer_is_complete(stub):
+    stub.streamDelay = 0
+    assert backend.requestGeminiResponse(None, "complete", useCache=False) == "x" * 40
+
+
+def test_cancel_closes_the_http_response(stub):
+    token = CancelToken()
+    threading.Timer(0.3, token.cancel).start()
+    start = time.monotonic()
+    with pytest.raises(GeminiError) as info:
+        backend.requestGeminiResponse(None, "slow", useCache=False, cancelToken=token)
+    assert info.value.kind == "cancelled"
+    assert time.monotonic() - start < 1.0
+
+    deadline = time.monotonic() + 2
+    while stub.streamsAborted == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stub.streamsAborted == 1
+    # The worker is free again: a new request does not wait for the old one
+    stub.streamDelay = 0
+    assert backend.requestGeminiResponse(None, "next", useCache=False) == "x" * 40
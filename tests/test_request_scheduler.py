@@ -0,0 +1,88 @@
+import threading
+import time
+
+from BackEnd.Request_Control import CancelToken
+from BackEnd.Request_Scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, RequestScheduler
+from BackEnd.Resilience import GeminiError
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+def test_rate_limited_request_does_not_hold_a_slot_while_waiting():
+    scheduler = RequestScheduler(maxConcurrency=2, rateLimits={"limited": 60})
+    release = threading.Event()
+
+    def hold(modelName):
+        with scheduler.slot(modelName=modelName):
+            release.wait()
+
+    first = threading.Thread(target=hold, args=("limited",))
+    first.start()
+    wait_until(lambda: scheduler.active == 1)
+    # Waits about a second for its rate token
+    second = threading.Thread(target=hold, args=("limited",))
+    second.start()
+    time.sleep(0.05)
+
+    start = time.monotonic()
+    with scheduler.slot():
+        waited = time.monotonic() - start
+    release.set()
+    first.join()
+    second.join()
+    assert waited < 0.5
+    assert scheduler.active == 0
+
+
+def test_interactive_threads_overtake_queued_batch_work():
+    scheduler = RequestScheduler(maxConcurrency=1)
+    order = []
+
+    def send(name, priority):
+        with scheduler.slot(priority):
+            order.append(name)
+
+    with scheduler.slot():
+        threads = [
+            threading.Thread(target=send, args=(f"batch-{i}", PRIORITY_BATCH)) for i in range(3)
+        ]
+        for thread in threads:
+            thread.start()
+        wait_until(lambda: scheduler.queued == 3)
+        threads.append(threading.Thread(target=send, args=("gui", PRIORITY_INTERACTIVE)))
+        threads[-1].start()
+        wait_until(lambda: scheduler.queued == 4)
+    for thread in threads:
+        thread.join()
+
+    assert order[0] == "gui"
+    assert sorted(order[1:]) == ["batch-0", "batch-1", "batch-2"]
+    assert scheduler.active == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    scheduler = RequestScheduler(maxConcurrency=1)
+    token = CancelToken()
+    errors = []
+
+    def send():
+        try:
+            with scheduler.slot(cancelToken=token):
+                pass
+        except GeminiError as e:
+            errors.append(e.kind)
+
+    with scheduler.slot():
+        thread = threading.Thread(target=send)
+        thread.start()
+        wait_until(lambda: scheduler.queued == 1)
+        token.cancel()
+        thread.join()
+    assert errors == ["cancelled"]
+    assert scheduler.queued == 0
+    assert scheduler.active == 0
@@ -0,0 +1,64 @@
+import asyncio
+
+import pytest
+
+from BackEnd.Request_Control import CancelToken
+from BackEnd.Resilience import CircuitBreaker, GeminiError, Resilience
+
+
+def make_resilience():
+    breaker = CircuitBreaker(failureThreshold=1, resetTimeout=0.0)
+    return Resilience(maxAttempts=1, baseDelay=0.0, breaker=breaker)
+
+
+def fail(timeout):
+    raise ConnectionError("connection reset")
+
+
+def test_cancelled_trial_does_not_wedge_the_breaker():
+    resilience = make_resilience()
+    with pytest.raises(GeminiError):
+        resilience.call(fail)
+    assert resilience.breaker.state == "open"
+
+    token = CancelToken()
+
+    def cancelled_trial(timeout):
+        token.cancel()
+        raise ConnectionError("aborted")
+
+    with pytest.raises(GeminiError) as info:
+        resilience.call(cancelled_trial, cancelToken=token)
+    assert info.value.kind == "cancelled"
+    assert resilience.breaker.state == "open"
+
+    assert resilience.call(lambda timeout: "ok") == "ok"
+    assert resilience.breaker.state == "closed"
+
+
+def test_cancelled_async_trial_does_not_wedge_the_breaker():
+    resilience = make_resilience()
+    with pytest.raises(GeminiError):
+        resilience.call(fail)
+
+    async def main():
+        started = asyncio.Event()
+
+        async def hang(timeout):
+            started.set()
+            await asyncio.sleep(60)
+
+        trial = asyncio.ensure_future(resilience.callAsync(hang))
+        await started.wait()
+        trial.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await trial
+        assert resilience.breaker.state == "open"
+
+        async def ok(timeout):
+            return "ok"
+
+        return await resilience.callAsync(ok)
+
+    assert asyncio.run(main()) == "ok"
+    assert resilience.breaker.state == "closed"
@@ -0,0 +1,17 @@
+from BackEnd.GEMINI_BackEnd import GeminiSession
+from Benchmarks.Stub_Server import StubGeminiServer
+from Status_Checker import HttpsProbe
+
+
+def test_probe_to_another_host_sends_no_api_key():
+    api = StubGeminiServer().start()
+    other = StubGeminiServer().start()
+    try:
+        session = GeminiSession("secret-key", transport="rest", apiEndpoint=api.endpoint)
+        probe = HttpsProbe(other.endpoint, session=session.httpSession, session_host=session.apiHost)
+
+        assert probe(2) is not None
+        assert other.apiKeys == set()
+    finally:
+        api.stop()
+        other.stop()